@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Batched ONNX inference benchmark - pick a SCAN batch size per model
+
+Runs recorded frames through each model at several batch sizes and reports
+the session cost per batch and per frame, the resulting throughput, and the
+latency a frame pays at the SCAN frame rate: waiting for the batch to fill
+(capped by SCAN_BATCH_MAX_WAIT_MS) plus the batched call. Models exported
+with a fixed batch of 1 can be re-exported with a dynamic batch dimension
+(--export); the result is checked against single-frame inference before use.
+
+Usage:
+    python benchmark_batching.py --source recordings/scan_aisle.mp4
+    python benchmark_batching.py --source recordings/scan_aisle.mp4 --export --write
+    python benchmark_batching.py --source recordings/scan_aisle.mp4 --models grocery_onnx --sizes 1 2 3 4 --fps 15
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from vision.config import ONNX_MODELS, ONNX_BATCH_MODELS, SCAN_BATCH_MAX_WAIT_MS, SCHEDULER_BUDGETS, SCAN_MODELS
+from vision.config_writer import CONFIG_PATH, format_assignment, write_block
+from vision.frame_source import open_frame_source, PACING_FAST
+from vision.object_detector import ObjectDetector
+
+BASE_DIR = Path(__file__).resolve().parent
+BATCH_SUFFIX = "_batch"
+MIN_GAIN = 0.05  # A larger batch must beat the next smaller one by this much throughput
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure batched ONNX inference throughput vs latency")
+    parser.add_argument("--source", required=True, help="Recorded frames (video file or image directory)")
+    parser.add_argument("--models", nargs="+", default=SCAN_MODELS, choices=SCAN_MODELS,
+                        help="SCAN model keys to benchmark (default: all with a model file)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1, 2, 4, 8], help="Batch sizes to try")
+    parser.add_argument("--frames", type=int, default=64, help="Frames to run per batch size")
+    parser.add_argument("--fps", type=float, default=SCHEDULER_BUDGETS["scan"]["target_rate_hz"],
+                        help="Rate frames reach the batcher (default: SCAN scheduler rate)")
+    parser.add_argument("--wait-ms", type=float, default=SCAN_BATCH_MAX_WAIT_MS,
+                        help="Longest the oldest frame waits for a full batch")
+    parser.add_argument("--max-latency-ms", type=float, default=SCHEDULER_BUDGETS["scan"]["target_latency_ms"],
+                        help="Worst-case frame latency allowed when picking a batch size")
+    parser.add_argument("--export", action="store_true",
+                        help="Re-export fixed-batch models with a dynamic batch dimension")
+    parser.add_argument("--write", action="store_true", help="Record the chosen batch sizes in vision/config.py")
+    return parser.parse_args()
+
+
+def load_frames(source: str, max_frames: int):
+    src = open_frame_source(source, pacing=PACING_FAST)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = src.read()
+        if not ret:
+            break
+        frames.append(frame)
+    src.release()
+    return frames
+
+
+def batch_dim(model_path: Path):
+    """First input's batch dimension: an int for fixed exports, a name (str) for dynamic ones"""
+    import onnx
+
+    model = onnx.load(str(model_path), load_external_data=False)
+    dim = model.graph.input[0].type.tensor_type.shape.dim[0]
+    return dim.dim_value if dim.HasField("dim_value") else (dim.dim_param or "?")
+
+
+def export_dynamic_batch(model_path: Path, output_path: Path) -> None:
+    """
+    Copy of a batch-1 model with a symbolic batch dimension
+
+    Inputs/outputs get dim "batch"; Reshape targets whose leading dimension
+    is a constant 1 (how Ultralytics' static exports flatten the Detect head)
+    get 0, i.e. "copy the input's batch". Intermediate shape annotations are
+    dropped so onnxruntime re-infers them.
+    """
+    import onnx
+    from onnx import numpy_helper
+
+    model = onnx.load(str(model_path))
+    graph = model.graph
+    for value in list(graph.input) + list(graph.output):
+        dims = value.type.tensor_type.shape.dim
+        if dims and dims[0].HasField("dim_value") and dims[0].dim_value == 1:
+            dims[0].dim_param = "batch"
+    del graph.value_info[:]
+
+    initializers = {init.name: init for init in graph.initializer}
+    constants = {n.output[0]: n for n in graph.node if n.op_type == "Constant"}
+    for node in graph.node:
+        if node.op_type != "Reshape":
+            continue
+        shape_name = node.input[1]
+        if shape_name in initializers:
+            tensor = initializers[shape_name]
+        elif shape_name in constants:
+            tensor = next(a.t for a in constants[shape_name].attribute if a.name == "value")
+        else:
+            continue  # Computed at runtime (already batch-aware)
+        shape = numpy_helper.to_array(tensor).copy()
+        if shape.ndim == 1 and shape.size > 1 and shape[0] == 1:
+            shape[0] = 0
+            tensor.CopyFrom(numpy_helper.from_array(shape, tensor.name))
+
+    onnx.checker.check_model(model)
+    onnx.save(model, str(output_path))
+
+
+def run_batches(detector: ObjectDetector, frames, batch_size: int):
+    """
+    Returns:
+        (rows per frame, median ms per batched call)
+    """
+    detector.max_batch = batch_size
+    detector.detect_onnx_batch(frames[:batch_size])  # Warm-up (allocates the batch tensor)
+    rows, times = [], []
+    for start in range(0, len(frames) - batch_size + 1, batch_size):
+        t_start = time.perf_counter()
+        rows.extend(detector.detect_onnx_batch(frames[start:start + batch_size]))
+        times.append((time.perf_counter() - t_start) * 1000)
+    return rows, float(np.median(times))
+
+
+def same_detections(reference, rows, tolerance_px: float = 1.0) -> bool:
+    """Batched rows match single-frame rows (same boxes within tolerance, same classes)"""
+    for a, b in zip(reference, rows):
+        if a.shape != b.shape:
+            return False
+        if len(a) and (np.abs(a[:, :4] - b[:, :4]).max() > tolerance_px or (a[:, 5] != b[:, 5]).any()):
+            return False
+    return True
+
+
+def frames_per_call(batch_size: int, fps: float, wait_ms: float) -> int:
+    """
+    Frames reach the batcher every 1/fps s and a batch runs when full or when
+    its first frame has waited wait_ms, so slow arrivals flush partial batches
+    """
+    return min(batch_size, int(wait_ms // (1000.0 / fps)) + 1)
+
+
+def latency_model(filled: int, call_ms: float, fps: float):
+    """
+    Returns:
+        (mean frame latency ms, worst frame latency ms) - waiting for the
+        batch to fill plus the session call
+    """
+    fill_ms = (filled - 1) * 1000.0 / fps
+    return fill_ms / 2 + call_ms, fill_ms + call_ms
+
+
+def pick_batch_size(table, max_latency_ms: float) -> int:
+    """Largest-throughput size within the latency limit; ties go to the smaller batch"""
+    best = None
+    for row in table:
+        if not row["agrees"] or row["worst_ms"] > max_latency_ms or row["filled"] < row["batch"]:
+            continue
+        if best is None or row["fps"] > best["fps"] * (1 + MIN_GAIN):
+            best = row
+    return best["batch"] if best else 1
+
+
+def write_config(entries):
+    """Rewrite the generated ONNX_BATCH_MODELS block in vision/config.py"""
+    write_block("benchmark_batching.py", format_assignment("ONNX_BATCH_MODELS", entries))
+
+
+
+def main():
+    args = parse_args()
+    sizes = sorted(set(max(1, s) for s in args.sizes) | {1})
+
+    frames = load_frames(args.source, args.frames)
+    if len(frames) < max(sizes):
+        print(f"❌ Need at least {max(sizes)} frames from {args.source} (got {len(frames)})")
+        return
+    print(f"✓ Loaded {len(frames)} frames | arrival {args.fps:.1f} fps | max wait {args.wait_ms:.0f} ms | "
+          f"latency limit {args.max_latency_ms:.0f} ms\n")
+
+    entries = dict(ONNX_BATCH_MODELS)
+    for name in args.models:
+        cfg = ONNX_MODELS[name]
+        model_path = BASE_DIR / cfg["path"]
+        if not model_path.exists():
+            print(f"⚠ {name}: {model_path} not found, skipping")
+            continue
+
+        print(f"=== {name} ({cfg['path']}) ===")
+        run_path = model_path
+        dim = batch_dim(model_path)
+        if dim == 1:
+            exported = model_path.with_name(model_path.stem + BATCH_SUFFIX + ".onnx")
+            if args.export:
+                export_dynamic_batch(model_path, exported)
+                run_path = exported
+                print(f"✓ Dynamic-batch copy written to {exported.name}")
+            elif exported.exists():
+                run_path = exported
+                print(f"ℹ Using existing dynamic-batch copy {exported.name}")
+            else:
+                print("⚠ Fixed batch of 1: only batch 1 is measured (pass --export to re-export)")
+        elif isinstance(dim, int):
+            print(f"ℹ Fixed batch of {dim}: every call runs {dim} frames")
+
+        detector = ObjectDetector(use_yolo=False, use_worker=False, model_choice=name, quantized=False)
+        detector._load_onnx(str(run_path.relative_to(BASE_DIR)))
+        if detector.ort_session is None:
+            print(f"⚠ {name}: could not load {run_path.name}, skipping\n")
+            continue
+        model_dim = batch_dim(run_path)
+        if isinstance(model_dim, int):
+            candidates = [model_dim]
+        else:
+            candidates = sizes
+
+        calls = {}  # batch size -> (rows, median ms per call)
+        for size in candidates:
+            try:
+                calls[size] = run_batches(detector, frames, size)
+            except Exception as e:
+                print(f"  batch {size} failed: {e}")
+                break
+            filled = frames_per_call(size, args.fps, args.wait_ms)
+            if filled not in calls and not isinstance(model_dim, int):
+                calls[filled] = run_batches(detector, frames, filled)
+
+        reference = calls[min(calls)][0] if calls else None
+        table = []
+        print(f"  {'batch':>5} {'call ms':>8} {'ms/frame':>9} {'frames/s':>9} "
+              f"{'filled':>6} {'mean lat':>9} {'worst lat':>10}  notes")
+        for size in candidates:
+            if size not in calls:
+                continue
+            rows, call_ms = calls[size]
+            agrees = same_detections(reference, rows)
+            filled = size if isinstance(model_dim, int) else frames_per_call(size, args.fps, args.wait_ms)
+            mean_ms, worst_ms = latency_model(filled, calls[filled][1], args.fps)
+            row = {
+                "batch": size, "call_ms": call_ms, "fps": size * 1000 / call_ms,
+                "filled": filled, "mean_ms": mean_ms, "worst_ms": worst_ms, "agrees": agrees,
+            }
+            table.append(row)
+
+            notes = []
+            if not agrees:
+                notes.append("❌ differs from batch 1")
+            if filled < size:
+                notes.append(f"flushes at {filled} (wait limit)")
+            if call_ms / size > 1000 / args.fps:
+                notes.append("slower than arrival rate")
+            if worst_ms > args.max_latency_ms:
+                notes.append("over latency limit")
+            print(f"  {size:>5} {call_ms:>8.1f} {call_ms / size:>9.1f} {row['fps']:>9.1f} "
+                  f"{filled:>6} {mean_ms:>9.1f} {worst_ms:>10.1f}  {', '.join(notes)}")
+
+        chosen = pick_batch_size(table, args.max_latency_ms) if not isinstance(model_dim, int) else model_dim
+        print(f"  → batch_size {chosen}\n")
+        detector.close()
+
+        if chosen > 1 or name in entries:
+            entries[name] = {
+                "path": str(run_path.relative_to(BASE_DIR)),
+                "batch_size": chosen,
+                "ms_per_frame": {str(r["batch"]): round(r["call_ms"] / r["batch"], 1) for r in table},
+            }
+
+    if args.write:
+        write_config(entries)
+        print(f"✓ Recorded batch sizes for {len(entries)} model(s) in {CONFIG_PATH}")
+        print("  Enable with SCAN_BATCHING_ENABLED = True (and raise the SCAN rate for sweeps)")
+    else:
+        print("Run with --write to record the batch sizes in vision/config.py")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Fall detection replay evaluation - sensitivity vs cost on recorded footage
+
+Replays a recording through FallDetector at the scheduler's fall cadence,
+once with the legacy search (full-resolution, full-frame HOG on every run, no
+budget) and once with the configured cost-bounded search, using the video's
+own timestamps. Reports search cost per run and per second of video, how
+often the person box agrees with the legacy search, and fall events: against
+labeled fall intervals when given, otherwise against the legacy events.
+
+With --detectors, each person detector backend (vision/person_detectors.py)
+is replayed with the configured search settings instead, to compare their
+ms/frame, how often they still find the person during labeled falls, and
+fall recall.
+
+Usage:
+    python evaluate_falls.py --source recordings/fall_trials.mp4 --falls 4.0-6.0 9.0-11.0
+    python evaluate_falls.py --source recordings/follow_aisle.mp4          # false alarms / cost only
+    python evaluate_falls.py --source recordings/fall_trials.mp4 --falls @recordings/fall_trials.txt
+    python evaluate_falls.py --source recordings/fall_trials.mp4 --falls 4.0-6.0 --detectors hog mog2 onnx
+"""
+
+import argparse
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from vision.config import (
+    SCHEDULER_DETECTOR_RATES_HZ, CAMERA_FPS,
+    FALL_PYRAMID_LEVEL, FALL_HOG_SCALE, FALL_ROI_ENABLED, FALL_ROI_MARGIN,
+    FALL_FULL_SCAN_INTERVAL_S, FALL_COST_BUDGET_MS_PER_S, FALL_PERSON_DETECTOR,
+)
+from vision.fall_detector import FallDetector
+from vision.person_detectors import PERSON_DETECTORS
+from vision.frame_context import FrameContext
+from vision.frame_source import open_frame_source, PACING_FAST
+
+EVENT_GAP_S = 1.0      # fall_detected runs closer than this are one event
+MATCH_IOU = 0.5
+
+
+@dataclass
+class Replay:
+    """Per-run outputs of one detector configuration"""
+    name: str
+    label: str  # Short name for result lines
+    times: List[float] = field(default_factory=list)
+    boxes: List[Optional[Tuple[int, int, int, int]]] = field(default_factory=list)
+    falls: List[bool] = field(default_factory=list)
+    costs_ms: List[float] = field(default_factory=list)
+    detector: Optional[FallDetector] = None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay footage through fall detection and compare search modes",
+                                     fromfile_prefix_chars="@")
+    parser.add_argument("--source", required=True, help="Recorded frames (video file or image directory)")
+    parser.add_argument("--falls", nargs="*", default=[],
+                        help="Labeled fall intervals in seconds, e.g. 4.0-6.0 (or @file with one per line)")
+    parser.add_argument("--rate", type=float, default=SCHEDULER_DETECTOR_RATES_HZ.get("fall", 5.0),
+                        help="Fall detection runs per second (default: scheduler fall rate)")
+    parser.add_argument("--fps", type=float, default=None, help="Override the recording's frame rate")
+    parser.add_argument("--tolerance", type=float, default=1.0,
+                        help="Seconds after a labeled interval ends that a detection still counts")
+    parser.add_argument("--detectors", nargs="+", choices=list(PERSON_DETECTORS),
+                        help="Compare these person detector backends instead of legacy vs configured search")
+    parser.add_argument("--max-frames", type=int, default=100000)
+    return parser.parse_args()
+
+
+def parse_intervals(specs) -> List[Tuple[float, float]]:
+    intervals = []
+    for spec in specs:
+        start, _, end = spec.partition("-")
+        intervals.append((float(start), float(end)))
+    return sorted(intervals)
+
+
+def load_frames(source: str, max_frames: int, fps_override: Optional[float]):
+    """
+    Returns:
+        (frames, fps)
+    """
+    src = open_frame_source(source, pacing=PACING_FAST)
+    fps = fps_override or src.get(cv2.CAP_PROP_FPS) or float(CAMERA_FPS)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = src.read()
+        if not ret:
+            break
+        frames.append(frame.copy())
+    src.release()
+    return frames, fps
+
+
+def replay(name: str, label: str, detector: FallDetector, frames, fps: float, rate: float) -> Replay:
+    """Run the detector on frames spaced 1/rate s apart in video time"""
+    result = Replay(name, label, detector=detector)
+    next_ts = 0.0
+    for i, frame in enumerate(frames):
+        ts = i / fps
+        if ts + 0.5 / fps < next_ts:
+            continue
+        next_ts = ts + 1.0 / rate
+        # Video time, offset so the detector never sees timestamp 0 ("unknown")
+        detection = detector.update(FrameContext(frame, seq=i, timestamp=1.0 + ts))
+        result.times.append(ts)
+        result.boxes.append(detection.bbox if detection.found else None)
+        result.falls.append(detection.fall_detected)
+        result.costs_ms.append(detection.cost_ms)
+    return result
+
+
+def fall_events(run: Replay) -> List[Tuple[float, float]]:
+    """Merge fall_detected runs into (start, end) events"""
+    events = []
+    for ts, fall in zip(run.times, run.falls):
+        if not fall:
+            continue
+        if events and ts - events[-1][1] <= EVENT_GAP_S:
+            events[-1] = (events[-1][0], ts)
+        else:
+            events.append((ts, ts))
+    return events
+
+
+def score_events(events, intervals, tolerance: float):
+    """
+    Returns:
+        (hits, misses, false alarms, mean delay s or None)
+    """
+    hits, delays = 0, []
+    matched = set()
+    for start, end in intervals:
+        for i, (ev_start, ev_end) in enumerate(events):
+            if ev_end >= start and ev_start <= end + tolerance:
+                hits += 1
+                delays.append(max(ev_start - start, 0.0))
+                matched.add(i)
+                break
+    false_alarms = sum(
+        1 for i, (ev_start, ev_end) in enumerate(events)
+        if i not in matched and not any(ev_end >= s and ev_start <= e + tolerance for s, e in intervals)
+    )
+    return hits, len(intervals) - hits, false_alarms, (float(np.mean(delays)) if delays else None)
+
+
+def box_iou(a, b) -> float:
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(x2 - x1, 0) * max(y2 - y1, 0)
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def person_agreement(reference: Replay, run: Replay) -> Tuple[float, float]:
+    """
+    Returns:
+        (recall of the reference's person boxes at IoU >= MATCH_IOU,
+         fraction of runs where run found a person the reference did not)
+    """
+    found = [(a, b) for a, b in zip(reference.boxes, run.boxes) if a is not None]
+    recall = sum(1 for a, b in found if b is not None and box_iou(a, b) >= MATCH_IOU) / len(found) if found else 1.0
+    extra = sum(1 for a, b in zip(reference.boxes, run.boxes) if a is None and b is not None)
+    return recall, extra / max(len(run.boxes), 1)
+
+
+def coverage(run: Replay, intervals) -> Tuple[float, Optional[float]]:
+    """
+    Returns:
+        (fraction of runs with a person, same within labeled falls or None)
+    """
+    found = [b is not None for b in run.boxes]
+    in_fall = [f for ts, f in zip(run.times, found) if any(s <= ts <= e for s, e in intervals)]
+    return (sum(found) / max(len(found), 1),
+            sum(in_fall) / len(in_fall) if in_fall else None)
+
+
+def print_run(run: Replay, duration_s: float) -> None:
+    costs = np.array(run.costs_ms)
+    spent = costs[costs > 0]
+    print(f"  {run.name}:")
+    print(f"    Runs:   {len(run.times)} at {len(run.times) / duration_s:.1f} Hz | "
+          f"{run.detector.format_stats()}")
+    if run.label in PERSON_DETECTORS and run.detector.person_detector.name != run.label:
+        print(f"    ⚠ {run.label} unavailable, ran {run.detector.person_detector.name}")
+    if spent.size:
+        print(f"    Cost:   {spent.mean():.1f} ms/run (p95 {np.percentile(spent, 95):.1f}) | "
+              f"{costs.sum() / duration_s:.1f} ms per second of video")
+
+
+def main():
+    args = parse_args()
+    intervals = parse_intervals(args.falls)
+
+    frames, fps = load_frames(args.source, args.max_frames, args.fps)
+    if not frames:
+        print(f"❌ No frames read from {args.source}")
+        return
+    duration_s = len(frames) / fps
+    print(f"✓ Loaded {len(frames)} frames ({duration_s:.1f}s at {fps:.1f} fps) | fall rate {args.rate:.1f} Hz | "
+          f"{len(intervals)} labeled fall(s)\n")
+
+    if args.detectors:
+        runs = [
+            replay(f"{name} (level {FALL_PYRAMID_LEVEL}, roi {'on' if FALL_ROI_ENABLED else 'off'}, "
+                   f"budget {FALL_COST_BUDGET_MS_PER_S:.0f} ms/s)",
+                   name, FallDetector(person_detector=name), frames, fps, args.rate)
+            for name in args.detectors
+        ]
+    else:
+        runs = [
+            replay("legacy (full frame, full resolution, HOG, no budget)", "legacy",
+                   FallDetector(pyramid_level=0, hog_scale=1.05, roi_enabled=False, budget_ms_per_s=0,
+                                person_detector="hog"),
+                   frames, fps, args.rate),
+            replay(f"cost-bounded ({FALL_PERSON_DETECTOR}, level {FALL_PYRAMID_LEVEL}, scale {FALL_HOG_SCALE}, "
+                   f"roi {'on' if FALL_ROI_ENABLED else 'off'} margin {FALL_ROI_MARGIN}, "
+                   f"full scan every {FALL_FULL_SCAN_INTERVAL_S}s, budget {FALL_COST_BUDGET_MS_PER_S:.0f} ms/s)",
+                   "cost-bounded", FallDetector(), frames, fps, args.rate),
+        ]
+    for run in runs:
+        run.detector.close()
+
+    print("=== Cost ===")
+    for run in runs:
+        print_run(run, duration_s)
+    if not args.detectors:
+        legacy, bounded = runs
+        legacy_cost = sum(legacy.costs_ms)
+        if legacy_cost > 0:
+            print(f"  → {legacy_cost / max(sum(bounded.costs_ms), 1e-6):.1f}x less search time")
+
+        recall, extra = person_agreement(legacy, bounded)
+        print("\n=== Person boxes vs legacy ===")
+        print(f"  Recall {recall:.3f} (IoU>={MATCH_IOU}) | extra detections on {extra:.1%} of runs")
+
+    print("\n=== Person found ===")
+    for run in runs:
+        overall, during = coverage(run, intervals)
+        during_text = f" | {during:.1%} during labeled falls" if during is not None else ""
+        print(f"  {run.label:>12}: {overall:.1%} of runs{during_text}")
+
+    print("\n=== Fall events ===")
+    events = {run.label: fall_events(run) for run in runs}
+    for run in runs:
+        spans = ", ".join(f"{s:.1f}-{e:.1f}s" for s, e in events[run.label]) or "none"
+        print(f"  {run.label:>12}: {spans}")
+
+    if intervals:
+        print(f"\n  Against labels (tolerance {args.tolerance:.1f}s):")
+        for run in runs:
+            hits, misses, false_alarms, delay = score_events(events[run.label], intervals, args.tolerance)
+            delay_text = f"{delay:.2f}s" if delay is not None else "-"
+            print(f"  {run.label:>12}: detected {hits}/{len(intervals)} | missed {misses} | "
+                  f"false alarms {false_alarms} | mean delay {delay_text}")
+    elif not args.detectors:
+        hits, misses, false_alarms, _ = score_events(events["cost-bounded"], events["legacy"], args.tolerance)
+        print(f"\n  No labels: cost-bounded reproduces {hits}/{len(events['legacy'])} legacy events, "
+              f"{false_alarms} new ones (pass --falls to score against ground truth)")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ import logging
 from typing import Optional
 
 from vision import CameraController, CameraMode, VisionResult
+from vision.latency import STAGE_GLASS_TO_MOTOR
+from vision.safety_events import EVENT_TARGET_LOST
 from motors.motor_controller import MotorController
 
 # Setup logging
@@ -64,6 +66,7 @@ class RobotController:
         self.tracking_enabled = False
         self.last_detection_time = 0
         self.emergency_stop = False
+        self.target_lost = False  # Lost while following (alert already sent)
 
         print("✅ RobotController initialized")
         print(f"📷 Camera mode: {self.camera.mode.value.upper()}")
@@ -71,6 +74,21 @@ class RobotController:
         print(f"🎮 Motors: {'ENABLED' if self.motors else 'DISABLED'}")
         print()
 
+    def _apply_motor_speeds(self, left_speed: float, right_speed: float, result: VisionResult):
+        """Send a motor command tagged with the frame it was computed from"""
+        self.motors.set_motors(
+            left_speed,
+            right_speed,
+            frame_seq=result.frame_seq,
+            capture_ts=result.capture_ts
+        )
+        self.camera.latency.record_since(STAGE_GLASS_TO_MOTOR, result.capture_ts)
+
+    def _stop_motors(self, result: VisionResult):
+        """Stop the motors, tagged with the frame that caused the stop"""
+        self.motors.stop(frame_seq=result.frame_seq, capture_ts=result.capture_ts)
+        self.camera.latency.record_since(STAGE_GLASS_TO_MOTOR, result.capture_ts)
+
     def calculate_motor_speeds(self, result: VisionResult) -> tuple[float, float]:
         """
         Calculate left and right motor speeds based on vision result
@@ -111,10 +129,10 @@ class RobotController:
 
                 if result.tracking_offset < 0: # left
                     print(f"turning left: {left_speed}", flush=True)
-                    self.motors.set_motors(left_speed, right_speed)
+                    self._apply_motor_speeds(left_speed, right_speed, result)
                     time.sleep(0.5)
                 else:  # right
-                    self.motors.set_motors(left_speed-5, right_speed)
+                    self._apply_motor_speeds(left_speed-5, right_speed, result)
                     time.sleep(0.5)
             
                 if should_log:
@@ -127,7 +145,7 @@ class RobotController:
 
                 return (left_speed*3, right_speed*3)
             else:
-                self.motors.stop()
+                self._stop_motors(result)
 
         # CALIBRATED - Use distance-based control
         distance_error = result.distance - self.target_distance
@@ -191,6 +209,8 @@ class RobotController:
         Args:
             result: Current vision detection result
         """
+        self._check_target_lost(result)
+
         # Skip if motors not available
         if self.motors is None:
             return
@@ -210,9 +230,28 @@ class RobotController:
 
             if time_since_detection > self.max_tracking_age:
                 # Lost target - stop motors
-                self.motors.stop()
+                self._stop_motors(result)
                 time.sleep(0.5)  # Delay to ensure motors stop
 
+    def _check_target_lost(self, result: VisionResult):
+        """Alert the app once when the followed person has been gone for max_tracking_age"""
+        if result.found:
+            self.last_detection_time = time.time()
+        if result.mode != CameraMode.FOLLOW or not self.tracking_enabled or result.found:
+            self.target_lost = False
+            return
+        if not self.last_detection_time:
+            return  # Never acquired, nothing was lost
+
+        time_since_detection = time.time() - self.last_detection_time
+        if time_since_detection > self.max_tracking_age and not self.target_lost:
+            self.target_lost = True
+            self.camera.events.publish(
+                EVENT_TARGET_LOST,
+                f"Lost sight of the person for {time_since_detection:.1f}s",
+                data={"seconds_since_detection": round(time_since_detection, 1)},
+            )
+
     def run_headless(self):
         """
         Run robot in headless mode (no display)
@@ -224,8 +263,8 @@ class RobotController:
         try:
             frame_count = 0
             while True:
-                # Process frame
-                frame, result = self.camera.process_frame()
+                # Process frame (nobody sees it, so skip drawing overlays)
+                frame, result = self.camera.process_frame(annotate=False)
 
                 if frame is None:
                     print("❌ Failed to read frame")
@@ -305,8 +344,9 @@ class RobotController:
                         print(f"\r{'  ' * 15}", end='')
                         print(f"\r⚪ {result.label} | FPS: {fps:.1f}", end='')
 
-                # Annotate frame with tracking status
-                annotated = frame.copy()
+                # Annotate frame with tracking status (the returned frame is
+                # already a private buffer, so draw on it directly)
+                annotated = frame
                 h, w = frame.shape[:2]
 
                 # Tracking status (top right)
@@ -4,6 +4,8 @@ Controls differential drive robot base via L298N motor driver
 """
 
 import sys
+import time
+from typing import Optional
 
 # Try to import GPIO, fallback to mock for testing on laptop
 try:
@@ -65,6 +67,10 @@ class MotorController:
         self.enabled = GPIO_AVAILABLE
         print("🔧 DEBUG: Initializing MotorController...", flush=True)
 
+        # Traceability: which camera frame produced the last command
+        self.last_frame_seq: Optional[int] = None
+        self.last_command_latency_ms: Optional[float] = None
+
         if not self.enabled:
             print("✓ MotorController initialized (MOCK MODE - no GPIO)")
             return
@@ -93,27 +99,39 @@ class MotorController:
             print("✓ Motor Controller running in MOCK MODE")
             self.enabled = False
 
-    def set_motors(self, left_speed: float, right_speed: float):
+    def set_motors(
+        self,
+        left_speed: float,
+        right_speed: float,
+        frame_seq: Optional[int] = None,
+        capture_ts: Optional[float] = None,
+    ):
         """
         Set motor speeds with direction
 
         Args:
             left_speed: Speed from -100 (full reverse) to 100 (full forward)
             right_speed: Speed from -100 (full reverse) to 100 (full forward)
+            frame_seq: Sequence number of the camera frame behind this command
+            capture_ts: time.monotonic() capture time of that frame
         """
         # Clamp speeds
         left_speed = max(-100, min(100, left_speed))
         right_speed = max(-100, min(100, right_speed))
 
+        self.last_frame_seq = frame_seq
+        self.last_command_latency_ms = (time.monotonic() - capture_ts) * 1000 if capture_ts else None
+        frame_text = f" [frame {frame_seq}]" if frame_seq is not None else ""
+
         if not self.enabled:
             # Mock mode - just print
             if abs(left_speed) > 5 or abs(right_speed) > 5:
-                print(f"🤖 Motors: L={left_speed:+.0f}% R={right_speed:+.0f}%")
+                print(f"🤖 Motors: L={left_speed:+.0f}% R={right_speed:+.0f}%{frame_text}")
             return
 
         # Debug: Print motor commands in GPIO mode too
         if abs(left_speed) > 5 or abs(right_speed) > 5:
-            print(f"🎮 GPIO Motors: L={left_speed:+.0f}% R={right_speed:+.0f}%", flush=True)
+            print(f"🎮 GPIO Motors: L={left_speed:+.0f}% R={right_speed:+.0f}%{frame_text}", flush=True)
 
         # Left motor
         if left_speed >= 0:
@@ -152,9 +170,9 @@ class MotorController:
         """Turn right in place"""
         self.set_motors(speed, -speed)
 
-    def stop(self):
+    def stop(self, frame_seq: Optional[int] = None, capture_ts: Optional[float] = None):
         """Stop all motors"""
-        self.set_motors(0, 0)
+        self.set_motors(0, 0, frame_seq=frame_seq, capture_ts=capture_ts)
 
     def cleanup(self):
         """Cleanup GPIO resources"""
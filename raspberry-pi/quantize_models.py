@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+ONNX INT8 quantization - build quantized variants of the ONNX_MODELS entries
+
+Calibrates on recorded frames (video file or image directory), quantizes each
+FP32 model, then compares the INT8 variant against the FP32 model on held-out
+frames: latency, detection agreement and - when YOLO-format labels are given
+for an image directory - mAP50 at the runtime confidence threshold. The
+Ultralytics validation results kept in metrics/ are printed alongside as the
+FP32 reference.
+
+Usage:
+    python quantize_models.py --source recordings/scan_aisle.mp4
+    python quantize_models.py --source recordings/scan_frames --labels recordings/scan_labels --write
+    python quantize_models.py --source recordings/scan_aisle.mp4 --models grocery_onnx --method dynamic
+"""
+
+import argparse
+import csv
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+from vision.config import (
+    ONNX_MODELS, ONNX_QUANTIZED_MODELS, ONNX_QUANTIZED_SUFFIX, ONNX_CONFIDENCE_THRESHOLD, SCAN_MODELS
+)
+from vision.config_writer import CONFIG_PATH, format_assignment, write_block
+from vision.frame_source import open_frame_source, ImageDirectorySource, PACING_FAST
+from vision.object_detector import ObjectDetector
+
+BASE_DIR = Path(__file__).resolve().parent
+MATCH_IOU = 0.5
+
+
+def parse_args():
+    fp32_models = [name for name in SCAN_MODELS if "quantized_from" not in ONNX_MODELS[name]]
+    parser = argparse.ArgumentParser(description="Quantize ONNX detection models to INT8")
+    parser.add_argument("--source", required=True, help="Recorded frames (video file or image directory)")
+    parser.add_argument("--models", nargs="+", default=fp32_models, choices=fp32_models,
+                        help="ONNX_MODELS keys to quantize (default: all with a model file)")
+    parser.add_argument("--method", choices=["static", "dynamic"], default="static",
+                        help="static: calibrated QDQ activations + weights; dynamic: weights only")
+    parser.add_argument("--per-channel", action="store_true", help="Per-channel weight scales (static)")
+    parser.add_argument("--frames", type=int, default=300, help="Max frames to read")
+    parser.add_argument("--calib-frames", type=int, default=100, help="Frames used for calibration")
+    parser.add_argument("--labels", default=None,
+                        help="Directory of YOLO .txt labels named like the --source images (enables mAP50)")
+    parser.add_argument("--write", action="store_true", help="Register the INT8 variants in vision/config.py")
+    return parser.parse_args()
+
+
+def load_frames(source: str, max_frames: int):
+    """
+    Returns:
+        (frames, names) - names are image stems for an image directory, else None
+    """
+    src = open_frame_source(source, pacing=PACING_FAST)
+    names = [p.stem for p in src.frames] if isinstance(src, ImageDirectorySource) else None
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = src.read()
+        if not ret:
+            break
+        frames.append(frame)
+    src.release()
+    return frames, (names[:len(frames)] if names else None)
+
+
+def split_frames(frames, calib_count: int):
+    """Interleaved split so calibration and evaluation cover the whole clip"""
+    step = max(len(frames) // max(calib_count, 1), 2)
+    calib = [i for i in range(0, len(frames), step)][:calib_count]
+    calib_set = set(calib)
+    held_out = [i for i in range(len(frames)) if i not in calib_set]
+    return calib, held_out
+
+
+def detect_head_exclusions(model_path: Path):
+    """
+    Decode nodes of an Ultralytics Detect head (last /model.N/ block, minus
+    its cv* conv branches). Their output concatenates box pixels (0..640)
+    with class scores (0..1); quantizing that to one 8-bit range wipes out
+    the scores, so it stays in FP32.
+    """
+    import onnx
+
+    model = onnx.load(str(model_path), load_external_data=False)
+    blocks = [int(m.group(1)) for n in model.graph.node for m in [re.match(r"/model\.(\d+)/", n.name)] if m]
+    if not blocks:
+        return []
+    prefix = f"/model.{max(blocks)}/"
+    return [
+        n.name for n in model.graph.node
+        if n.name.startswith(prefix) and not re.match(re.escape(prefix) + r"cv\d", n.name)
+    ]
+
+
+def quantize(model_path: Path, output_path: Path, method: str, detector: ObjectDetector, frames,
+             per_channel: bool = False) -> None:
+    from onnxruntime.quantization import (
+        CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType,
+        quantize_dynamic, quantize_static,
+    )
+
+    exclude = detect_head_exclusions(model_path)
+    if method == "dynamic":
+        quantize_dynamic(str(model_path), str(output_path), weight_type=QuantType.QUInt8,
+                         nodes_to_exclude=exclude)
+        return
+
+    class FrameReader(CalibrationDataReader):
+        """Feeds recorded frames through the detector's own preprocessing"""
+
+        def __init__(self):
+            self._frames = iter(frames)
+
+        def get_next(self):
+            frame = next(self._frames, None)
+            if frame is None:
+                return None
+            tensor, _, _ = detector._preprocess_onnx(frame)
+            return {detector.ort_input_name: tensor.copy()}
+
+    # Shape inference + graph cleanup first gives better calibration coverage
+    prepared = output_path.with_suffix(".prep.onnx")
+    try:
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+        quant_pre_process(str(model_path), str(prepared), skip_symbolic_shape=True)
+        source = prepared
+    except Exception as e:
+        print(f"  ⚠ Pre-processing skipped: {e}")
+        source = model_path
+
+    try:
+        quantize_static(
+            str(source), str(output_path), FrameReader(),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=per_channel,
+            calibrate_method=CalibrationMethod.MinMax,
+            nodes_to_exclude=exclude,
+        )
+    finally:
+        prepared.unlink(missing_ok=True)
+
+
+def run_detector(detector: ObjectDetector, frames):
+    """
+    Returns:
+        (list of (N, 6) detection rows per frame, mean ms per frame)
+    """
+    detector.detect_onnx_array(frames[0])  # Warm-up
+    rows = []
+    t_start = time.perf_counter()
+    for frame in frames:
+        rows.append(detector.detect_onnx_array(frame))
+    return rows, (time.perf_counter() - t_start) * 1000 / len(frames)
+
+
+def box_iou(box, boxes):
+    """IoU of one (x, y, w, h) box against an (N, 4) array"""
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[0] + box[2], boxes[:, 0] + boxes[:, 2])
+    y2 = np.minimum(box[1] + box[3], boxes[:, 1] + boxes[:, 3])
+    inter = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+    union = box[2] * box[3] + boxes[:, 2] * boxes[:, 3] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+def match(detections, targets):
+    """
+    Greedy same-class IoU >= MATCH_IOU matching, highest confidence first
+
+    Returns:
+        Boolean array: which detections matched a target
+    """
+    matched = np.zeros(len(detections), dtype=bool)
+    free = np.ones(len(targets), dtype=bool)
+    for i in np.argsort(-detections[:, 4], kind="stable"):
+        candidates = free & (targets[:, 5] == detections[i, 5])
+        if not candidates.any():
+            continue
+        iou = np.where(candidates, box_iou(detections[i, :4], targets[:, :4]), 0.0)
+        best = int(iou.argmax())
+        if iou[best] >= MATCH_IOU:
+            matched[i] = True
+            free[best] = False
+    return matched
+
+
+def agreement(reference_rows, rows):
+    """INT8 detections scored against the FP32 detections as ground truth"""
+    hits = ref_total = total = 0
+    for ref, det in zip(reference_rows, rows):
+        hits += int(match(det, ref).sum())
+        ref_total += len(ref)
+        total += len(det)
+    precision = hits / total if total else 1.0
+    recall = hits / ref_total if ref_total else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def load_labels(label_dir: Path, names, frames):
+    """YOLO txt labels (class cx cy w h, normalized) as (N, 6) pixel rows per frame"""
+    labels = []
+    for name, frame in zip(names, frames):
+        h, w = frame.shape[:2]
+        path = label_dir / f"{name}.txt"
+        values = np.loadtxt(path, ndmin=2) if path.exists() and path.stat().st_size else np.zeros((0, 5))
+        rows = np.zeros((len(values), 6), dtype=np.float32)
+        rows[:, 0] = (values[:, 1] - values[:, 3] / 2) * w
+        rows[:, 1] = (values[:, 2] - values[:, 4] / 2) * h
+        rows[:, 2] = values[:, 3] * w
+        rows[:, 3] = values[:, 4] * h
+        rows[:, 5] = values[:, 0]
+        labels.append(rows)
+    return labels
+
+
+def map50(rows, labels):
+    """Mean over classes of all-point interpolated AP at IoU 0.5"""
+    aps = []
+    for cls in np.unique(np.concatenate([l[:, 5] for l in labels])):
+        scores, tps = [], []
+        positives = 0
+        for det, gt in zip(rows, labels):
+            det = det[det[:, 5] == cls]
+            gt = gt[gt[:, 5] == cls]
+            positives += len(gt)
+            scores.append(det[:, 4])
+            tps.append(match(det, gt))
+        scores = np.concatenate(scores)
+        tps = np.concatenate(tps)[np.argsort(-scores, kind="stable")]
+        if positives == 0:
+            continue
+        tp = np.cumsum(tps)
+        recall = np.concatenate([[0.0], tp / positives])
+        precision = np.concatenate([[1.0], tp / np.arange(1, len(tp) + 1)])
+        precision = np.maximum.accumulate(precision[::-1])[::-1]
+        aps.append(float(np.sum(np.diff(recall) * precision[1:])))
+    return float(np.mean(aps)) if aps else 0.0
+
+
+def reference_metrics(model_cfg):
+    """Best-fitness epoch (as Ultralytics picks best.pt) from the model's metrics/results.csv"""
+    metrics_dir = model_cfg.get("metrics")
+    if not metrics_dir:
+        return None
+    path = BASE_DIR / metrics_dir / "results.csv"
+    if not path.exists():
+        return None
+
+    with open(path, newline="") as f:
+        rows = [{k.strip(): float(v) for k, v in row.items()} for row in csv.DictReader(f)]
+    best = max(rows, key=lambda r: 0.1 * r["metrics/mAP50(B)"] + 0.9 * r["metrics/mAP50-95(B)"])
+    return {
+        "epoch": int(best["epoch"]),
+        "precision": best["metrics/precision(B)"],
+        "recall": best["metrics/recall(B)"],
+        "mAP50": best["metrics/mAP50(B)"],
+        "mAP50-95": best["metrics/mAP50-95(B)"],
+    }
+
+
+def write_config(entries):
+    """Rewrite the generated ONNX_QUANTIZED_MODELS block in vision/config.py"""
+    write_block("quantize_models.py", format_assignment("ONNX_QUANTIZED_MODELS", entries))
+
+
+
+def main():
+    args = parse_args()
+
+    frames, names = load_frames(args.source, args.frames)
+    if len(frames) < 2:
+        print(f"❌ Need at least 2 frames from {args.source}")
+        return
+    calib_idx, eval_idx = split_frames(frames, args.calib_frames)
+    calib_frames = [frames[i] for i in calib_idx]
+    eval_frames = [frames[i] for i in eval_idx]
+    print(f"✓ Loaded {len(frames)} frames: {len(calib_frames)} calibration, {len(eval_frames)} held out\n")
+
+    labels = None
+    if args.labels:
+        if names is None:
+            print("⚠ --labels needs an image directory --source; skipping mAP50")
+        else:
+            labels = load_labels(Path(args.labels), [names[i] for i in eval_idx], eval_frames)
+
+    entries = dict(ONNX_QUANTIZED_MODELS)
+    for name in args.models:
+        cfg = ONNX_MODELS[name]
+        model_path = BASE_DIR / cfg["path"]
+        if not model_path.exists():
+            print(f"⚠ {name}: {model_path} not found, skipping")
+            continue
+
+        print(f"=== {name} ({cfg['path']}) ===")
+        fp32 = ObjectDetector(use_yolo=True, use_worker=False, model_choice=name, quantized=False)
+        if fp32.ort_session is None:
+            print(f"⚠ {name}: could not load FP32 model, skipping\n")
+            continue
+
+        output_path = model_path.with_name(model_path.stem + ONNX_QUANTIZED_SUFFIX + ".onnx")
+        t_start = time.time()
+        quantize(model_path, output_path, args.method, fp32, calib_frames, args.per_channel)
+        size_mb = (model_path.stat().st_size / 1e6, output_path.stat().st_size / 1e6)
+        print(f"✓ {args.method} INT8 written to {output_path.name} in {time.time() - t_start:.1f}s "
+              f"({size_mb[0]:.1f} -> {size_mb[1]:.1f} MB)")
+
+        int8 = ObjectDetector(use_yolo=False, use_worker=False, model_choice=name, quantized=False)
+        int8.onnx_input_size = fp32.onnx_input_size
+        int8._onnx_class_names = fp32._onnx_class_names
+        int8._load_onnx(str(output_path))
+
+        fp32_rows, fp32_ms = run_detector(fp32, eval_frames)
+        int8_rows, int8_ms = run_detector(int8, eval_frames)
+        precision, recall, f1 = agreement(fp32_rows, int8_rows)
+
+        print(f"  Latency:   FP32 {fp32_ms:.1f} ms -> INT8 {int8_ms:.1f} ms ({fp32_ms / int8_ms:.2f}x)")
+        print(f"  Agreement: INT8 vs FP32 precision {precision:.3f}  recall {recall:.3f}  F1 {f1:.3f} "
+              f"(IoU>={MATCH_IOU}, same class)")
+
+        reference = reference_metrics(cfg)
+        if reference:
+            print(f"  Reference: {cfg['metrics']} epoch {reference['epoch']}: "
+                  f"P {reference['precision']:.3f}  R {reference['recall']:.3f}  "
+                  f"mAP50 {reference['mAP50']:.3f}  mAP50-95 {reference['mAP50-95']:.3f}")
+
+        map50_delta = None
+        if labels is not None:
+            fp32_map, int8_map = map50(fp32_rows, labels), map50(int8_rows, labels)
+            map50_delta = round(int8_map - fp32_map, 4)
+            print(f"  mAP50 @ conf {ONNX_CONFIDENCE_THRESHOLD}: FP32 {fp32_map:.3f}  INT8 {int8_map:.3f}  "
+                  f"delta {map50_delta:+.3f}")
+            if reference:
+                print(f"  Estimated INT8 mAP50 on the validation set: "
+                      f"{reference['mAP50'] + map50_delta:.3f} (reference {reference['mAP50']:.3f})")
+        else:
+            print("  mAP50:     pass --labels with an image directory to measure the accuracy delta")
+        print()
+
+        entries[name] = {
+            "path": str(output_path.relative_to(BASE_DIR)),
+            "method": args.method,
+            "latency_ms": [round(fp32_ms, 1), round(int8_ms, 1)],
+            "agreement_f1": round(f1, 3),
+            "map50_delta": map50_delta,
+        }
+        fp32.close()
+        int8.close()
+
+    if args.write:
+        write_config(entries)
+        print(f"✓ Registered {len(entries)} quantized model(s) in {CONFIG_PATH}")
+    else:
+        print("Run with --write to register the INT8 variants in vision/config.py")
+
+
+if __name__ == "__main__":
+    main()
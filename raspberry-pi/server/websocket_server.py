@@ -8,9 +8,12 @@ import json
 import websockets
 import logging
 import numpy as np
-from typing import Set, Any
+from typing import Optional, Set, Any
 from datetime import datetime
 
+from vision.safety_events import EVENT_EMERGENCY_STOP
+from vision.config import SAFETY_ACK_RESEND_S
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -46,6 +49,10 @@ class RobotWebSocketServer:
         self.stream_video = False
         self.video_quality = 30  # JPEG quality 0-100 (reduced from 50 for Pi performance)
 
+        # Safety events are pushed as soon as they are published (see start)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._safety_queue: Optional[asyncio.PriorityQueue] = None
+
     async def handler(self, websocket):
         """Handle client connections and messages"""
         client_id = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
@@ -58,11 +65,15 @@ class RobotWebSocketServer:
             # Send initial status
             await self.send_status(websocket)
 
+            # Alerts this client missed while disconnected
+            for event in self.robot.camera.events.pending():
+                await self.send_safety_event(event, [websocket])
+
             # Handle incoming messages
             async for message in websocket:
                 try:
                     data = json.loads(message)
-                    await self.handle_command(data, websocket)
+                    await self.handle_command(data, websocket, client_id)
                 except json.JSONDecodeError:
                     logger.error(f"Invalid JSON from {client_id}: {message}")
                 except Exception as e:
@@ -73,9 +84,17 @@ class RobotWebSocketServer:
         finally:
             self.clients.discard(websocket)
 
-    async def handle_command(self, data: dict, websocket):
+    async def handle_command(self, data: dict, websocket, client_id: str = ""):
         """Process commands from Android app"""
         command = data.get("command")
+        if command == "ack_event":
+            # Safety event acknowledgement (not logged: one per alert per client)
+            try:
+                self.robot.camera.events.ack(int(data.get("seq", -1)), client_id)
+            except (TypeError, ValueError):
+                logger.warning(f"Invalid ack from {client_id}: {data}")
+            return
+
         logger.info(f"Received command: {command}")
 
         if command == "calibrate":
@@ -84,7 +103,8 @@ class RobotWebSocketServer:
             success = False
 
             for attempt in range(10):
-                frame, result = self.robot.camera.process_frame()
+                # Newest result without blocking the event loop (plain pixels to calibrate on)
+                frame, result = self.robot.camera.process_frame(wait_for_new=False, annotate=False)
 
                 if frame is not None and result.found:
                     logger.info(f"Attempt {attempt+1}: ArUco detected, calibrating...")
@@ -131,6 +151,10 @@ class RobotWebSocketServer:
             if self.robot.motors:
                 self.robot.motors.stop()
             logger.warning("🚨 EMERGENCY STOP activated")
+            # Tell every connected app, not just the one that pressed it
+            self.robot.camera.events.publish(
+                EVENT_EMERGENCY_STOP, f"Emergency stop from {client_id or 'app'}", force=True
+            )
 
         elif command == "set_mode":
             # Switch between FOLLOW and SCAN modes
@@ -140,6 +164,56 @@ class RobotWebSocketServer:
             self.robot.camera.set_mode(new_mode)
             logger.info(f"Mode changed to: {new_mode.value}")
 
+        elif command == "set_model":
+            # Switch the SCAN detection model; it loads in the background
+            name = data.get("model", "")
+            try:
+                name, ready = self.robot.camera.set_model(name)
+                logger.info(f"Model {'changed to' if ready else 'loading'}: {name}")
+            except ValueError as e:
+                logger.warning(f"set_model rejected: {e}")
+            await self.send_models(websocket)
+
+        elif command == "preload_model":
+            # Warm a model ahead of a switch (default: the active one)
+            try:
+                self.robot.camera.models.preload(data.get("model") or None)
+            except ValueError as e:
+                logger.warning(f"preload_model rejected: {e}")
+            await self.send_models(websocket)
+
+        elif command == "get_models":
+            await self.send_models(websocket)
+
+        elif command == "get_events":
+            # Recent safety events with delivery latencies
+            events = self.robot.camera.events
+            response = {
+                "type": "safety_events",
+                "events": [
+                    {**e.to_message(), "acked": bool(e.acked), "latency_ms": e.latencies_ms()}
+                    for e in events.recent()
+                ],
+                "stats": events.stats(),
+                "timestamp": datetime.now().isoformat()
+            }
+            await websocket.send(json.dumps(to_json_serializable(response)))
+
+        elif command == "get_incidents":
+            # Saved incident clips, newest first
+            incidents = self.robot.camera.incidents
+            response = {
+                "type": "incidents",
+                "enabled": incidents is not None,
+                "incidents": await asyncio.to_thread(incidents.list_incidents) if incidents else [],
+                "buffer": incidents.stats() if incidents else {},
+                "timestamp": datetime.now().isoformat()
+            }
+            await websocket.send(json.dumps(to_json_serializable(response)))
+
+        elif command == "get_incident":
+            await self.send_incident(websocket, str(data.get("id", "")), int(data.get("stride", 1)))
+
         elif command == "get_status":
             # Send current status
             await self.send_status(websocket)
@@ -157,11 +231,58 @@ class RobotWebSocketServer:
         else:
             logger.warning(f"Unknown command: {command}")
 
+    async def send_models(self, websocket):
+        """Send the model registry state (active, loading, loaded models) to a client"""
+        response = {
+            "type": "models",
+            **self.robot.camera.models.stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+        await websocket.send(json.dumps(to_json_serializable(response)))
+
+    async def send_incident(self, websocket, incident_id: str, stride: int = 1):
+        """
+        Send a saved incident: an "incident" message with its metadata, then
+        one "incident_frame" message per (stride-th) frame, JPEG as base64
+        """
+        import base64
+
+        incidents = self.robot.camera.incidents
+        loaded = await asyncio.to_thread(incidents.load_incident, incident_id) if incidents else None
+        if loaded is None:
+            await websocket.send(json.dumps({
+                "type": "incident",
+                "id": incident_id,
+                "found": False,
+                "timestamp": datetime.now().isoformat()
+            }))
+            return
+
+        meta, jpegs = loaded
+        indices = list(range(0, len(jpegs), max(stride, 1)))
+        await websocket.send(json.dumps({
+            "type": "incident",
+            "found": True,
+            **{k: v for k, v in meta.items() if k != "frames"},
+            "sent_frames": len(indices),
+            "timestamp": datetime.now().isoformat()
+        }))
+        for n, i in enumerate(indices):
+            await websocket.send(json.dumps({
+                "type": "incident_frame",
+                "id": incident_id,
+                "index": n,
+                "count": len(indices),
+                "seq": meta["frames"][i]["seq"],
+                "offset_s": meta["frames"][i]["offset_s"],
+                "frame": base64.b64encode(jpegs[i]).decode("utf-8")
+            }))
+
     async def send_status(self, websocket):
         """Send current robot status to a client"""
         try:
-            # Get latest vision result
-            frame, result = self.robot.camera.process_frame()
+            # Get latest vision result (shared, non-consuming read)
+            frame, result = self.robot.camera.process_frame(wait_for_new=False, annotate=False)
 
             # Get normalized x, y coordinates from the result
             x_offset, y_offset = 0.0, 0.0
@@ -178,12 +299,15 @@ class RobotWebSocketServer:
                 "target_locked": bool(result.found),
                 "distance": float(result.distance) if result.found else 0.0,
                 "mode": str(self.robot.camera.mode.value),
+                "model": str(self.robot.camera.models.active),
                 "calibrated": self.robot.camera.aruco_tracker.focal_length_px is not None,
                 "detected_object": str(result.label) if result.found and result.mode.value == "scan" else "",
                 "confidence": float(result.confidence) if result.found else 0.0,
                 "x_offset": float(x_offset),
                 "y_offset": float(y_offset),
                 "tracking_offset": float(result.tracking_offset),
+                "fall_detected": bool(result.fall_detected),
+                "fall_reason": str(result.fall_reason),
                 "battery": 100,  # TODO: Implement battery monitoring
                 "obstacle_detected": False,  # TODO: Implement ultrasonic sensor
                 "timestamp": datetime.now().isoformat()
@@ -204,7 +328,16 @@ class RobotWebSocketServer:
             if self.clients:
                 # Create status message
                 try:
-                    frame, result = self.robot.camera.process_frame()
+                    # Only draw overlays when the frame is streamed to the app
+                    frame, result = self.robot.camera.process_frame(
+                        wait_for_new=False, annotate=self.stream_video
+                    )
+                    # Encode now: the frame is the event loop thread's reusable
+                    # buffer, and any handler calling process_frame while the
+                    # sends below are awaited would overwrite it
+                    video_message = None
+                    if self.stream_video and frame is not None:
+                        video_message = self.encode_video_frame(frame)
 
                     # Get normalized x, y coordinates from the result
                     x_offset, y_offset = 0.0, 0.0
@@ -221,12 +354,15 @@ class RobotWebSocketServer:
                         "target_locked": bool(result.found),
                         "distance": float(result.distance) if result.found else 0.0,
                         "mode": str(self.robot.camera.mode.value),
+                        "model": str(self.robot.camera.models.active),
                         "calibrated": self.robot.camera.aruco_tracker.focal_length_px is not None,
                         "detected_object": str(result.label) if result.found and result.mode.value == "scan" else "",
                         "confidence": float(result.confidence) if result.found else 0.0,
                         "x_offset": float(x_offset),
                         "y_offset": float(y_offset),
                         "tracking_offset": float(result.tracking_offset),
+                        "fall_detected": bool(result.fall_detected),
+                        "fall_reason": str(result.fall_reason),
                         "battery": 100,
                         "obstacle_detected": False,
                         "timestamp": datetime.now().isoformat()
@@ -266,8 +402,8 @@ class RobotWebSocketServer:
                     self.clients -= disconnected
 
                     # Send video frame if streaming enabled
-                    if self.stream_video and frame is not None:
-                        await self.broadcast_video_frame(frame)
+                    if video_message is not None:
+                        await self.broadcast_video_frame(video_message)
 
                 except Exception as e:
                     logger.error(f"Error in broadcast loop: {e}")
@@ -276,25 +412,67 @@ class RobotWebSocketServer:
 
             await asyncio.sleep(0.1)  # 10Hz update rate
 
-    async def broadcast_video_frame(self, frame):
-        """Broadcast video frame to all clients"""
+    def _on_safety_event(self, event):
+        """SafetyEventBus callback (any thread): queue the event on the server's loop"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._safety_queue.put_nowait, (event.priority, event.seq, event))
+
+    async def send_safety_event(self, event, clients=None):
+        """Send one safety event to the given clients (default: all) concurrently"""
+        clients = list(self.clients if clients is None else clients)
+        if not clients:
+            return  # Stays pending; sent to the next client that connects
+
+        message = json.dumps(to_json_serializable(event.to_message()))
+        results = await asyncio.gather(*(client.send(message) for client in clients), return_exceptions=True)
+        for client, outcome in zip(clients, results):
+            if isinstance(outcome, websockets.exceptions.ConnectionClosed):
+                self.clients.discard(client)
+            elif isinstance(outcome, Exception):
+                logger.error(f"Error sending safety event #{event.seq}: {outcome}")
+        self.robot.camera.events.mark_sent(event)
+
+    async def push_safety_events(self):
+        """Send safety events as they arrive (most urgent first) and re-send unacknowledged ones"""
+        events = self.robot.camera.events
+        while self.running:
+            batch = []
+            try:
+                _, _, event = await asyncio.wait_for(self._safety_queue.get(), timeout=SAFETY_ACK_RESEND_S)
+                batch.append(event)
+                while not self._safety_queue.empty():
+                    batch.append(self._safety_queue.get_nowait()[2])
+            except asyncio.TimeoutError:
+                pass
+
+            batch.extend(e for e in events.due_for_resend() if e not in batch)
+            for event in batch:
+                try:
+                    await self.send_safety_event(event)
+                except Exception as e:
+                    logger.error(f"Error pushing safety event #{event.seq}: {e}")
+
+    def encode_video_frame(self, frame) -> str:
+        """JPEG-encode a frame into a "video_frame" message"""
         import cv2
         import base64
 
-        try:
-            # Encode frame as JPEG
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.video_quality])
-            frame_bytes = base64.b64encode(buffer).decode('utf-8')
+        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.video_quality])
+        frame_bytes = base64.b64encode(buffer).decode('utf-8')
 
-            message = {
-                "type": "video_frame",
-                "frame": frame_bytes,
-                "timestamp": datetime.now().isoformat()
-            }
+        message = {
+            "type": "video_frame",
+            "frame": frame_bytes,
+            "timestamp": datetime.now().isoformat()
+        }
+        return json.dumps(message)
 
+    async def broadcast_video_frame(self, message_str: str):
+        """Broadcast an encoded video frame message to all clients"""
+        try:
             # Broadcast to all clients
             disconnected = set()
-            message_str = json.dumps(message)
 
             for client in self.clients:
                 try:
@@ -311,13 +489,22 @@ class RobotWebSocketServer:
     async def start(self, host="0.0.0.0", port=8765):
         """Start WebSocket server"""
         self.running = True
+        self._loop = asyncio.get_running_loop()
+        self._safety_queue = asyncio.PriorityQueue()
+        unsubscribe = self.robot.camera.events.subscribe(self._on_safety_event)
 
         # Start server
         async with websockets.serve(self.handler, host, port):
             logger.info(f"WebSocket server started on {host}:{port}")
 
-            # Start status broadcast loop
-            await self.broadcast_status()
+            # Safety events bypass the status loop
+            safety_task = asyncio.create_task(self.push_safety_events())
+            try:
+                # Start status broadcast loop
+                await self.broadcast_status()
+            finally:
+                unsubscribe()
+                safety_task.cancel()
 
     def stop(self):
         """Stop the server"""
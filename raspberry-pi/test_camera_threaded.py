@@ -1,27 +1,58 @@
 #!/usr/bin/env python3
 """
 Test script for threaded camera controller
+Pass --source with a recorded clip or image directory to run without a camera
 """
+import argparse
 import traceback
 import time
-from vision import CameraController
-
-try:
-    print("Initializing camera controller...")
-    cam = CameraController(camera_id=0, use_yolo=True, threaded=True)
-
-    print("Testing frame processing for 5 seconds...")
-    for i in range(50):  # 50 frames, ~5 seconds
-        frame, result = cam.process_frame()
-        if frame is not None:
-            print(f"Frame {i}: {result.mode.value} - Found: {result.found}, Label: {result.label}")
-        else:
-            print(f"Frame {i}: No frame")
-        time.sleep(0.1)
-
-    print("\nTest completed successfully!")
-    cam.release()
-
-except Exception as e:
-    print(f"\nError: {e}")
-    traceback.print_exc()
+from vision import CameraController, CameraMode, open_frame_source, PACING_REALTIME, PACING_FAST
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Threaded camera controller test")
+    parser.add_argument("--source", default="0", help="Camera index, video file or image directory (default: 0)")
+    parser.add_argument("--pacing", choices=[PACING_REALTIME, PACING_FAST], default=PACING_REALTIME,
+                        help="Replay recorded footage at recorded speed or as fast as possible")
+    parser.add_argument("--mode", choices=["scan", "follow"], default="scan", help="Vision mode to test")
+    parser.add_argument("--frames", type=int, default=50, help="Number of results to read (default: 50)")
+    parser.add_argument("--interval", type=float, default=0.1, help="Delay between reads in seconds (default: 0.1)")
+    args = parser.parse_args()
+
+    try:
+        print("Initializing camera controller...")
+        source = open_frame_source(args.source, pacing=args.pacing)
+        cam = CameraController(camera_id=args.source, use_yolo=True, threaded=True, source=source)
+        cam.set_mode(CameraMode(args.mode))
+
+        print(f"Testing frame processing for {args.frames} frames...")
+        t_start = time.time()
+        for i in range(args.frames):
+            frame, result = cam.process_frame()
+            if frame is not None:
+                print(f"Frame {i}: {result.mode.value} - Found: {result.found}, Label: {result.label}")
+            else:
+                print(f"Frame {i}: No frame")
+                if cam.source.exhausted:
+                    break
+            time.sleep(args.interval)
+        elapsed = time.time() - t_start
+
+        print(
+            f"\nSource frames: {cam.source.frames_read} | "
+            f"Processed: {cam._frame_count} | "
+            f"Elapsed: {elapsed:.2f}s | "
+            f"Throughput: {cam._frame_count / elapsed:.1f} FPS"
+        )
+        print(f"Latency: {cam.latency.format_summary()}")
+        print("\nTest completed successfully!")
+        cam.release()
+
+    except Exception as e:
+        print(f"\nError: {e}")
+        traceback.print_exc()
+
+
+# Guard needed: the optional ONNX worker process uses the spawn start method
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ import threading
 import shutil
 import subprocess
 from pathlib import Path
-from vision import CameraController, CameraMode
+from vision import CameraController, CameraMode, open_frame_source, PACING_REALTIME, PACING_FAST
 
 
 class Alarm:
@@ -63,7 +63,32 @@ class Alarm:
         return None
 
 
+def parse_args():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Grocery Buddy vision system test")
+    parser.add_argument(
+        "--source",
+        default="0",
+        help="Camera index, recorded video file or image directory (default: 0)"
+    )
+    parser.add_argument(
+        "--pacing",
+        choices=[PACING_REALTIME, PACING_FAST],
+        default=PACING_REALTIME,
+        help="Replay recorded footage at recorded speed or as fast as possible"
+    )
+    parser.add_argument(
+        "--loop",
+        action="store_true",
+        help="Restart recorded footage when it ends"
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+
     print("=" * 70)
     print("GROCERY BUDDY - Unified Vision System Test")
     print("=" * 70)
@@ -87,10 +112,11 @@ def main():
     try:
         # Initialize camera controller
         # Will try to use YOLO, fallback to color detection if not available
-        camera = CameraController(camera_id=0, use_yolo=True)
+        source = open_frame_source(args.source, pacing=args.pacing, loop=args.loop)
+        camera = CameraController(camera_id=args.source, use_yolo=True, source=source)
 
         print("\n✅ Camera initialized successfully!")
-        print(f"📷 Resolution: {camera.cap.get(cv2.CAP_PROP_FRAME_WIDTH)}x{camera.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)}")
+        print(f"📷 Resolution: {camera.source.get(cv2.CAP_PROP_FRAME_WIDTH)}x{camera.source.get(cv2.CAP_PROP_FRAME_HEIGHT)}")
         print(f"🎯 Current mode: {camera.mode.value.upper()}")
         print("\nPress any key in the video window to start...\n")
 
@@ -125,10 +151,13 @@ def main():
                         if distance is None:
                             dist_text = "--"
                     coord_text = ""
-                    if result.mode == CameraMode.FOLLOW:
-                        locked_center = camera.aruco_tracker.get_locked_center(frame, normalized=True)
-                        if locked_center is not None:
-                            coord_text = f" | X: {locked_center[0]:+.2f} Y: {locked_center[1]:+.2f}"
+                    if result.mode == CameraMode.FOLLOW and result.center is not None \
+                            and camera.aruco_tracker.focal_length_px is not None:
+                        # Normalize the detected center instead of re-detecting on the annotated frame
+                        h, w = frame.shape[:2]
+                        x_norm = (result.center[0] - w / 2) / (w / 2)
+                        y_norm = (result.center[1] - h / 2) / (h / 2)
+                        coord_text = f" | X: {x_norm:+.2f} Y: {y_norm:+.2f}"
                     fall_text = " | FALL!" if result.fall_detected else ""
                     print(
                         f"\r✓ {result.label} | "
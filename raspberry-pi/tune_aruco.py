@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+ArUco detector tuning - benchmark parameter sets on recorded FOLLOW footage
+
+Replays a clip (video file or image directory) through the named profiles in
+vision/config.py plus a grid of candidate DetectorParameters, measures
+detection rate against per-frame detection cost, prints the Pareto front and
+optionally writes the chosen profile into vision/config.py.
+
+Usage:
+    python tune_aruco.py --source recordings/follow_aisle.mp4
+    python tune_aruco.py --source recordings/follow_aisle.mp4 --write
+"""
+
+import argparse
+import itertools
+import time
+
+import cv2
+
+from vision.aruco_tracker import ArucoTracker
+from vision.config import ARUCO_DETECTOR_PROFILES
+from vision.config_writer import CONFIG_PATH, format_assignment, write_block
+from vision.frame_source import open_frame_source, PACING_FAST
+
+# Candidate grid explored in addition to the named profiles
+WINDOW_SWEEPS = [(3, 23), (3, 13), (5, 15), (5, 5), (7, 7), (9, 9)]
+MIN_PERIMETER_RATES = [0.02, 0.03, 0.05]
+CORNER_REFINEMENT = [0, 1]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark ArUco detector parameters on recorded footage")
+    parser.add_argument("--source", required=True, help="Recorded FOLLOW clip (video file or image directory)")
+    parser.add_argument("--frames", type=int, default=300, help="Max frames to use")
+    parser.add_argument("--width", type=int, default=None, help="Resize frames to this width first")
+    parser.add_argument("--marker-id", type=int, default=None, help="Only count this marker ID as a hit")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="Accept detection rate this far below the best when picking the cheapest")
+    parser.add_argument("--repeats", type=int, default=2, help="Timing passes per candidate (min is used)")
+    parser.add_argument("--write", action="store_true", help="Write the chosen profile into vision/config.py")
+    return parser.parse_args()
+
+
+def load_frames(source: str, max_frames: int, width=None):
+    """Decode the clip once into grayscale frames so decode cost is not measured"""
+    src = open_frame_source(source, pacing=PACING_FAST)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = src.read()
+        if not ret:
+            break
+        if width and frame.shape[1] != width:
+            height = int(round(frame.shape[0] * width / frame.shape[1]))
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    src.release()
+    return frames
+
+
+def candidates():
+    """Named profiles first, then the grid"""
+    for name, settings in ARUCO_DETECTOR_PROFILES.items():
+        yield name, dict(settings)
+
+    for (win_min, win_max), rate, refine in itertools.product(WINDOW_SWEEPS, MIN_PERIMETER_RATES, CORNER_REFINEMENT):
+        settings = {
+            "adaptiveThreshWinSizeMin": win_min,
+            "adaptiveThreshWinSizeMax": win_max,
+            "adaptiveThreshWinSizeStep": 10,
+            "minMarkerPerimeterRate": rate,
+            "cornerRefinementMethod": refine,
+        }
+        yield f"w{win_min}-{win_max}_p{rate:.2f}_r{refine}", settings
+
+
+def evaluate(settings, frames, marker_id=None, repeats=2):
+    """
+    Returns:
+        (detection_rate, mean_ms_per_frame)
+    """
+    tracker = ArucoTracker(profile=settings)
+    hits = 0
+    best_ms = float("inf")
+    for _ in range(max(repeats, 1)):
+        hits = 0
+        t_start = time.perf_counter()
+        for gray in frames:
+            corners, ids = tracker._detect_markers(gray)
+            if ids is not None and len(corners) > 0:
+                if marker_id is None or marker_id in ids.reshape(-1):
+                    hits += 1
+        best_ms = min(best_ms, (time.perf_counter() - t_start) * 1000 / len(frames))
+    return hits / len(frames), best_ms
+
+
+def pareto_front(results):
+    """Candidates not beaten on both detection rate and cost"""
+    front = []
+    for r in results:
+        dominated = any(
+            o["rate"] >= r["rate"] and o["ms"] <= r["ms"] and (o["rate"] > r["rate"] or o["ms"] < r["ms"])
+            for o in results
+        )
+        if not dominated:
+            front.append(r)
+    return sorted(front, key=lambda r: r["ms"])
+
+
+def choose(front, tolerance):
+    """Cheapest front member within tolerance of the best detection rate"""
+    best_rate = max(r["rate"] for r in front)
+    return min((r for r in front if r["rate"] >= best_rate - tolerance), key=lambda r: r["ms"])
+
+
+def write_profile(chosen):
+    """Rewrite the generated block in vision/config.py"""
+    named = chosen["name"] in ARUCO_DETECTOR_PROFILES and chosen["name"] != "tuned"
+    comment = f"{chosen['name']}: {chosen['rate']*100:.1f}% detected, {chosen['ms']:.2f}ms/frame"
+    body = (
+        format_assignment("ARUCO_TUNED_PROFILE", chosen["settings"], comment)
+        + format_assignment("ARUCO_DETECTOR_PROFILE", chosen["name"] if named else "tuned")
+    )
+    write_block("tune_aruco.py", body)
+
+
+
+def main():
+    args = parse_args()
+
+    frames = load_frames(args.source, args.frames, args.width)
+    if not frames:
+        print(f"❌ No frames read from {args.source}")
+        return
+    h, w = frames[0].shape[:2]
+    print(f"✓ Loaded {len(frames)} frames ({w}x{h}) from {args.source}\n")
+
+    results = []
+    for name, settings in candidates():
+        rate, ms = evaluate(settings, frames, args.marker_id, args.repeats)
+        results.append({"name": name, "settings": settings, "rate": rate, "ms": ms})
+        print(f"  {name:<24} detect {rate*100:5.1f}%  {ms:6.2f} ms/frame")
+
+    front = pareto_front(results)
+    chosen = choose(front, args.tolerance)
+
+    print("\nPareto front (detection rate vs cost):")
+    for r in front:
+        marker = "  <-- chosen" if r is chosen else ""
+        print(f"  {r['name']:<24} detect {r['rate']*100:5.1f}%  {r['ms']:6.2f} ms/frame{marker}")
+
+    if args.write:
+        write_profile(chosen)
+        print(f"\n✓ Wrote profile '{chosen['name']}' to {CONFIG_PATH}")
+    else:
+        print("\nRun with --write to save the chosen profile to vision/config.py")
+
+
+if __name__ == "__main__":
+    main()
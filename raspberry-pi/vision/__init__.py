@@ -6,7 +6,19 @@ Unified person tracking and object detection
 from .camera_controller import CameraController, CameraMode, VisionResult
 from .aruco_tracker import ArucoTracker, ArucoDetection
 from .object_detector import ObjectDetector, ObjectDetection
+from .object_tracker import ObjectTracker, ObjectTrack
+from .model_registry import ModelRegistry
 from .fall_detector import FallDetector, FallDetection
+from .person_detectors import (
+    PersonDetector, HogPersonDetector, Mog2PersonDetector, OnnxPersonDetector, create_person_detector
+)
+from .frame_source import (
+    FrameSource, LiveCameraSource, VideoFileSource, ImageDirectorySource,
+    ArrayFrameSource, open_frame_source, PACING_REALTIME, PACING_FAST
+)
+from .frame_context import FrameContext
+from .safety_events import SafetyEventBus, SafetyEvent
+from .incident_recorder import IncidentRecorder
 from . import config
 
 __all__ = [
@@ -17,8 +29,28 @@ __all__ = [
     "ArucoDetection",
     "ObjectDetector",
     "ObjectDetection",
+    "ObjectTracker",
+    "ObjectTrack",
+    "ModelRegistry",
     "FallDetector",
     "FallDetection",
+    "PersonDetector",
+    "HogPersonDetector",
+    "Mog2PersonDetector",
+    "OnnxPersonDetector",
+    "create_person_detector",
+    "FrameSource",
+    "LiveCameraSource",
+    "VideoFileSource",
+    "ImageDirectorySource",
+    "ArrayFrameSource",
+    "open_frame_source",
+    "PACING_REALTIME",
+    "PACING_FAST",
+    "FrameContext",
+    "SafetyEventBus",
+    "SafetyEvent",
+    "IncidentRecorder",
     "config"
 ]
 
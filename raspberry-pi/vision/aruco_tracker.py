@@ -2,13 +2,27 @@
 ArUco marker tracker for FOLLOW mode calibration and distance estimation.
 """
 
+import threading
+import time
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple, Union
 
 import cv2
 import numpy as np
 
-from .config import ARUCO_CALIBRATION_DISTANCE_CM, ARUCO_MARKER_LENGTH_CM
+from .frame_context import FrameContext
+from .marker_filter import MarkerState, MarkerStateFilter
+from .config import (
+    ARUCO_CALIBRATION_DISTANCE_CM, ARUCO_MARKER_LENGTH_CM,
+    ARUCO_DETECTOR_PROFILES, ARUCO_DETECTOR_PROFILE,
+    ARUCO_ROI_ENABLED, ARUCO_ROI_PADDING, ARUCO_ROI_MIN_PADDING_PX,
+    ARUCO_ROI_MAX_MISSES, ARUCO_FULL_SEARCH_INTERVAL,
+    ARUCO_FILTER_ENABLED, ARUCO_FILTER_MAX_COAST_S, ARUCO_TRACK_LIFETIME_S,
+    ARUCO_PYRAMID_ENABLED, ARUCO_DETECT_MAX_WIDTH, ARUCO_PYRAMID_MAX_LEVEL,
+)
+
+# cornerSubPix stop criteria for refining decimated detections
+_SUBPIX_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 0.03)
 
 
 @dataclass
@@ -20,6 +34,67 @@ class ArucoDetection:
     distance: Optional[float] = None  # meters
     confidence: float = 0.0
     marker_id: Optional[int] = None
+    search: str = "full"  # "roi" or "full" - which search found (or missed) the marker
+    raw_center: Optional[Tuple[int, int]] = None  # Measured center (center is filtered)
+    predicted: bool = False  # No measurement this frame; state extrapolated by the filter
+    center_std: Optional[Tuple[float, float]] = None  # 1-sigma center uncertainty (px)
+    distance_std: Optional[float] = None  # 1-sigma distance uncertainty (m)
+    velocity: Optional[Tuple[float, float]] = None  # Center velocity (px/s)
+    markers: Optional["MarkerArray"] = None  # Every marker this search saw
+
+
+@dataclass
+class MarkerArray:
+    """All markers found in one search, as parallel arrays"""
+    ids: np.ndarray      # (N,) int32
+    corners: np.ndarray  # (N, 4, 2) float32, full-frame pixel coordinates
+    centers: np.ndarray  # (N, 2) float32
+    widths: np.ndarray   # (N,) float32, average of top and bottom edge (px)
+
+    @classmethod
+    def empty(cls) -> "MarkerArray":
+        return cls(
+            np.zeros(0, dtype=np.int32),
+            np.zeros((0, 4, 2), dtype=np.float32),
+            np.zeros((0, 2), dtype=np.float32),
+            np.zeros(0, dtype=np.float32),
+        )
+
+    @classmethod
+    def from_detection(cls, corners, ids, offset: Tuple[int, int] = (0, 0)) -> "MarkerArray":
+        """Build from detectMarkers output, shifting corners by offset (ROI origin)"""
+        if ids is None or len(corners) == 0:
+            return cls.empty()
+        c = np.asarray(corners, dtype=np.float32).reshape(-1, 4, 2)
+        if offset != (0, 0):
+            c = c + np.asarray(offset, dtype=np.float32)
+        top = np.linalg.norm(c[:, 0] - c[:, 1], axis=1)
+        bottom = np.linalg.norm(c[:, 2] - c[:, 3], axis=1)
+        return cls(
+            np.asarray(ids, dtype=np.int32).reshape(-1),
+            c,
+            c.mean(axis=1),
+            ((top + bottom) / 2.0).astype(np.float32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def index_of(self, marker_id: int) -> Optional[int]:
+        """Row of marker_id, or None if not present"""
+        matches = np.flatnonzero(self.ids == marker_id)
+        return int(matches[0]) if len(matches) else None
+
+
+@dataclass
+class MarkerTrack:
+    """Lifetime bookkeeping for one marker ID"""
+    marker_id: int
+    first_seen: float
+    last_seen: float
+    hits: int
+    center: Tuple[float, float]
+    width_px: float
 
 
 class ArucoTracker:
@@ -30,10 +105,45 @@ class ArucoTracker:
         marker_length_cm: float = ARUCO_MARKER_LENGTH_CM,
         calibration_distance_cm: float = ARUCO_CALIBRATION_DISTANCE_CM,
         aruco_dict_id: int = cv2.aruco.DICT_5X5_50,
+        profile: Union[str, Dict[str, float], None] = None,
     ):
+        """
+        Args:
+            marker_length_cm: Printed marker side length
+            calibration_distance_cm: Distance used by calibrate()
+            aruco_dict_id: ArUco dictionary
+            profile: Name in ARUCO_DETECTOR_PROFILES or a dict of
+                     DetectorParameters attributes (default: ARUCO_DETECTOR_PROFILE)
+        """
         self.marker_length_cm = float(marker_length_cm)
         self.calibration_distance_cm = float(calibration_distance_cm)
-        self.focal_length_px: Optional[float] = None
+        self.focal_length_px: Optional[float] = None  # Most recent calibration
+        self.calibrations: Dict[int, float] = {}  # marker ID -> focal length (px)
+        self.target_id: Optional[int] = None  # Marker ID locked at calibration
+        self.tracks: Dict[int, MarkerTrack] = {}  # Every marker ID seen recently
+        self.track_lifetime_s = ARUCO_TRACK_LIFETIME_S
+
+        # ROI tracking state (last two marker corner sets give a velocity)
+        self.roi_enabled = ARUCO_ROI_ENABLED
+        self._last_corners: Optional[np.ndarray] = None
+        self._prev_corners: Optional[np.ndarray] = None
+        self._last_marker_id: Optional[int] = None
+        self._roi_misses = 0
+        self._since_full = 0
+        self._state_lock = threading.Lock()
+        self.stats = {"roi_searches": 0, "roi_hits": 0, "full_searches": 0, "full_hits": 0}
+
+        # Smooths the measured state and predicts through short misses
+        self.filter_enabled = ARUCO_FILTER_ENABLED
+        self.max_coast_s = ARUCO_FILTER_MAX_COAST_S
+        self._filter = MarkerStateFilter()
+        self._last_bbox: Optional[Tuple[int, int, int, int]] = None
+        self._last_width = 0.0
+
+        # Detect on a decimated image, refine corners at full resolution
+        self.pyramid_enabled = ARUCO_PYRAMID_ENABLED
+        self.detect_max_width = ARUCO_DETECT_MAX_WIDTH
+        self.last_pyramid_level = 0
 
         try:
             self.aruco_dict = cv2.aruco.getPredefinedDictionary(aruco_dict_id)
@@ -43,20 +153,53 @@ class ArucoTracker:
             except AttributeError:
                 self.aruco_dict = getattr(cv2.aruco, "Dictionary", None)
 
+        self.profile_name = None
+        self.aruco_params = None
+        self._detector = None
+        self.set_profile(profile if profile is not None else ARUCO_DETECTOR_PROFILE)
+
+    @staticmethod
+    def make_parameters(settings: Dict[str, float]):
+        """DetectorParameters with the given attributes set (None if unsupported)."""
         try:
-            self.aruco_params = cv2.aruco.DetectorParameters_create()
+            params = cv2.aruco.DetectorParameters_create()
         except AttributeError:
             try:
-                self.aruco_params = cv2.aruco.DetectorParameters()
+                params = cv2.aruco.DetectorParameters()
             except Exception:
-                self.aruco_params = None
+                return None
+
+        for name, value in settings.items():
+            if not hasattr(params, name):
+                print(f"⚠ Unknown ArUco detector parameter: {name}")
+                continue
+            setattr(params, name, type(getattr(params, name))(value))
+        return params
+
+    def set_profile(self, profile: Union[str, Dict[str, float]]) -> None:
+        """Switch detector parameters to a named profile or an explicit dict."""
+        if isinstance(profile, str):
+            if profile not in ARUCO_DETECTOR_PROFILES:
+                print(f"⚠ Unknown ArUco profile '{profile}', using OpenCV defaults")
+                settings = {}
+            else:
+                settings = ARUCO_DETECTOR_PROFILES[profile]
+            self.profile_name = profile
+        else:
+            settings = profile
+            self.profile_name = "custom"
+
+        self.aruco_params = self.make_parameters(settings)
+        # Built once and reused for every frame (construction is not free)
+        self._detector = None
+        if hasattr(cv2.aruco, "ArucoDetector") and self.aruco_params is not None:
+            self._detector = cv2.aruco.ArucoDetector(self.aruco_dict, self.aruco_params)
 
     def _detect_markers(self, gray: np.ndarray):
         """Detect ArUco markers with compatibility across OpenCV versions."""
         try:
-            if hasattr(cv2.aruco, "ArucoDetector") and self.aruco_params is not None:
-                detector = cv2.aruco.ArucoDetector(self.aruco_dict, self.aruco_params)
-                res = detector.detectMarkers(gray)
+            if self._detector is not None:
+                res = self._detector.detectMarkers(gray)
                 if isinstance(res, tuple) and len(res) >= 2:
                     corners, ids = res[0], res[1]
                 else:
@@ -74,34 +217,87 @@ class ArucoTracker:
 
         return corners, ids
 
-    def calibrate(self, frame: np.ndarray, known_distance_cm: Optional[float] = None) -> bool:
+    def _pyramid_level(self, width: int) -> int:
+        """Smallest pyrDown level that brings width under detect_max_width."""
+        if not self.pyramid_enabled:
+            return 0
+        level = 0
+        while (width >> level) > self.detect_max_width and level < ARUCO_PYRAMID_MAX_LEVEL:
+            level += 1
+        return level
+
+    def _refine_corners(self, gray: np.ndarray, corners: np.ndarray, level: int) -> np.ndarray:
+        """Sub-pixel refine (N, 4, 2) full-resolution corners found at a pyramid level."""
+        win = (1 << level) + 2  # Cover the decimation error
+        pts = np.ascontiguousarray(corners.reshape(-1, 1, 2), dtype=np.float32)
+        cv2.cornerSubPix(gray, pts, (win, win), (-1, -1), _SUBPIX_CRITERIA)
+        return pts.reshape(-1, 4, 2)
+
+    def _detect_multires(self, ctx: FrameContext, window: Optional[Tuple[int, int, int, int]] = None) -> MarkerArray:
+        """
+        Detect markers in the full frame or a (x0, y0, x1, y1) window of it.
+        Large images are searched at a pyramid level and refined at full resolution.
+        """
+        x0, y0 = (window[0], window[1]) if window is not None else (0, 0)
+        width = (window[2] - window[0]) if window is not None else ctx.shape[1]
+        level = self._pyramid_level(width)
+        self.last_pyramid_level = level
+
+        if window is None:
+            search = ctx.pyramid(level)
+        else:
+            search = ctx.gray[window[1]:window[3], window[0]:window[2]]
+            for _ in range(level):
+                search = cv2.pyrDown(search)
+
+        corners, ids = self._detect_markers(search)
+        if level == 0:
+            return MarkerArray.from_detection(corners, ids, offset=(x0, y0))
+        if ids is None or len(corners) == 0:
+            return MarkerArray.empty()
+
+        full = np.asarray(corners, dtype=np.float32).reshape(-1, 4, 2) * (1 << level)
+        full += np.array([x0, y0], dtype=np.float32)
+        return MarkerArray.from_detection(self._refine_corners(ctx.gray, full, level), ids)
+
+    def _markers(self, ctx: FrameContext) -> MarkerArray:
+        """All markers in the full frame, detected once per context."""
+        return ctx.memo("aruco_markers", lambda: self._detect_multires(ctx))
+
+    def detect_all(self, frame: Union[FrameContext, np.ndarray]) -> MarkerArray:
+        """Every marker in the frame as a compact array (full-frame search)."""
+        return self._markers(FrameContext.wrap(frame))
+
+    def calibrate(self, frame: Union[FrameContext, np.ndarray], known_distance_cm: Optional[float] = None) -> bool:
         """
         Calibrate focal length using an ArUco marker visible in the frame.
+        The calibrated marker's ID becomes the followed target, and the
+        calibration is stored for that ID.
         Returns True if calibration succeeds.
         """
         if known_distance_cm is None:
             known_distance_cm = self.calibration_distance_cm
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        corners, ids = self._detect_markers(gray)
-        if ids is None or len(corners) == 0:
+        markers = self._markers(FrameContext.wrap(frame))
+        if len(markers) == 0:
             print(f"⚠ Calibration failed: No ArUco marker detected")
             return False
 
-        c = corners[0].reshape((4, 2))
-        top_w = np.linalg.norm(c[0] - c[1])
-        bot_w = np.linalg.norm(c[2] - c[3])
-        px_w = (top_w + bot_w) / 2.0
+        # The marker held up to the camera is the largest one in view
+        index = int(np.argmax(markers.widths))
+        px_w = float(markers.widths[index])
 
         if px_w <= 0:
             print(f"⚠ Calibration failed: Invalid pixel width")
             return False
 
+        marker_id = int(markers.ids[index])
         self.focal_length_px = (px_w * float(known_distance_cm)) / self.marker_length_cm
+        self.calibrations[marker_id] = self.focal_length_px
+        self.lock_target(marker_id)
 
-        marker_id = int(ids[0][0]) if ids is not None else None
         print(f"✓ Calibration successful!")
-        print(f"  Marker ID: {marker_id}")
+        print(f"  Marker ID: {marker_id} (locked)")
         print(f"  Pixel width: {px_w:.1f}px")
         print(f"  Calibration distance: {known_distance_cm}cm")
         print(f"  Marker size: {self.marker_length_cm}cm")
@@ -109,17 +305,26 @@ class ArucoTracker:
 
         return True
 
-    def estimate_distance_m(self, pixel_width_px: float) -> Optional[float]:
-        """Estimate distance (meters) given marker width in pixels."""
-        if not self.focal_length_px or pixel_width_px <= 0:
+    def lock_target(self, marker_id: Optional[int]) -> None:
+        """Follow only marker_id from now on (None follows whichever marker is seen)."""
+        with self._state_lock:
+            if marker_id != self._last_marker_id:
+                self._reset_track_state()
+            self.target_id = marker_id
+
+    def estimate_distance_m(self, pixel_width_px: float, marker_id: Optional[int] = None) -> Optional[float]:
+        """Estimate distance (meters) given marker width in pixels, using that marker's calibration if any."""
+        focal_length_px = self.calibrations.get(marker_id, self.focal_length_px)
+        if not focal_length_px or pixel_width_px <= 0:
             return None
-        distance_cm = (self.marker_length_cm * self.focal_length_px) / float(pixel_width_px)
+        distance_cm = (self.marker_length_cm * focal_length_px) / float(pixel_width_px)
         return distance_cm / 100.0
 
-    def get_locked_center(self, frame: np.ndarray, normalized: bool = False) -> Optional[Tuple[float, float]]:
+    def get_locked_center(self, frame: Union[FrameContext, np.ndarray], normalized: bool = False) -> Optional[Tuple[float, float]]:
         """
         Return the marker center coordinates when calibrated ("locked").
         If normalized=True, returns (-1..1) offsets from frame center.
+        Pass the frame's FrameContext to reuse the detection already made for it.
         """
         # Fast path: if not calibrated, return None immediately
         if self.focal_length_px is None:
@@ -142,20 +347,255 @@ class ArucoTracker:
         y_norm = (cy - h / 2) / (h / 2)
         return float(x_norm), float(y_norm)
 
-    def detect(self, frame: np.ndarray) -> ArucoDetection:
-        """Detect the first ArUco marker in frame."""
-        # Convert to grayscale only once
-        if len(frame.shape) == 3:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = frame
-            
-        corners, ids = self._detect_markers(gray)
-        if ids is None or len(corners) == 0:
-            return ArucoDetection(found=False)
+    def detect(self, frame: Union[FrameContext, np.ndarray]) -> ArucoDetection:
+        """Detect the followed ArUco marker in frame (memoized per FrameContext)."""
+        ctx = FrameContext.wrap(frame)
+        return ctx.memo("aruco", lambda: self._detect(ctx))
+
+    def _predicted_corners(self, timestamp: float) -> Optional[np.ndarray]:
+        """Last marker corners moved to the predicted position (filter, else last displacement)."""
+        if self._last_corners is None:
+            return None
+        if self.filter_enabled and self._filter.initialized:
+            state = self._filter.predict(timestamp)
+            last_center = self._last_corners.mean(axis=0)
+            last_size = max(self._marker_width(self._last_corners), 1.0)
+            scale = state.size_px / last_size
+            return (self._last_corners - last_center) * scale + np.array(state.center, dtype=np.float32)
+        if self._prev_corners is None:
+            return self._last_corners
+        return self._last_corners + (self._last_corners - self._prev_corners)
+
+    def _roi_window(self, corners: np.ndarray, shape) -> Optional[Tuple[int, int, int, int]]:
+        """Padded (x0, y0, x1, y1) search window around corners, clipped to the frame."""
+        h, w = shape[:2]
+        x_min, y_min = corners.min(axis=0)
+        x_max, y_max = corners.max(axis=0)
+        pad = max(ARUCO_ROI_PADDING * max(x_max - x_min, y_max - y_min), ARUCO_ROI_MIN_PADDING_PX)
+
+        x0 = max(int(x_min - pad), 0)
+        y0 = max(int(y_min - pad), 0)
+        x1 = min(int(x_max + pad) + 1, w)
+        y1 = min(int(y_max + pad) + 1, h)
+        if x1 - x0 < 8 or y1 - y0 < 8:
+            return None
+        return x0, y0, x1, y1
+
+    def _search_roi(self, ctx: FrameContext, timestamp: float) -> Optional[MarkerArray]:
+        """ArUco search in the window around the predicted marker (full-frame coordinates)."""
+        predicted = self._predicted_corners(timestamp)
+        window = self._roi_window(predicted, ctx.shape) if predicted is not None else None
+        if window is None:
+            return None
+
+        self.stats["roi_searches"] += 1
+        return self._detect_multires(ctx, window)
+
+    def _use_roi(self) -> bool:
+        return (
+            self.roi_enabled
+            and self._last_corners is not None
+            and self._roi_misses < ARUCO_ROI_MAX_MISSES
+            and self._since_full < ARUCO_FULL_SEARCH_INTERVAL
+        )
+
+    def _reset_track_state(self) -> None:
+        # Caller holds self._state_lock
+        self._last_corners = None
+        self._prev_corners = None
+        self._last_marker_id = None
+        self._roi_misses = 0
+        self._since_full = 0
+        self._filter.reset()
+        self._last_bbox = None
+
+    def reset_tracking(self) -> None:
+        """Forget the tracked marker (keeps the target lock); the next detect() searches the full frame."""
+        with self._state_lock:
+            self._reset_track_state()
+            self.tracks.clear()
+
+    def _update_tracks(self, markers: MarkerArray, timestamp: float) -> None:
+        """Refresh per-ID tracks from a search and expire ones not seen within their lifetime."""
+        for marker_id, center, width in zip(markers.ids.tolist(), markers.centers.tolist(), markers.widths.tolist()):
+            track = self.tracks.get(marker_id)
+            if track is None:
+                self.tracks[marker_id] = MarkerTrack(marker_id, timestamp, timestamp, 1, tuple(center), width)
+            else:
+                track.last_seen = timestamp
+                track.hits += 1
+                track.center = tuple(center)
+                track.width_px = width
+
+        expired = [mid for mid, t in self.tracks.items() if timestamp - t.last_seen > self.track_lifetime_s]
+        for marker_id in expired:
+            del self.tracks[marker_id]
+
+    def get_tracks(self) -> Dict[int, MarkerTrack]:
+        """Snapshot of live per-ID tracks."""
+        with self._state_lock:
+            return {mid: MarkerTrack(**vars(t)) for mid, t in self.tracks.items()}
 
-        # Process first marker (most reliable)
-        c = corners[0].reshape((4, 2))
+    def get_stats(self) -> dict:
+        """ROI vs full-frame search counts and hit rates."""
+        stats = dict(self.stats)
+        stats["roi_hit_rate"] = stats["roi_hits"] / stats["roi_searches"] if stats["roi_searches"] else 0.0
+        stats["full_hit_rate"] = stats["full_hits"] / stats["full_searches"] if stats["full_searches"] else 0.0
+        searches = stats["roi_searches"] + stats["full_searches"]
+        stats["roi_fraction"] = stats["roi_searches"] / searches if searches else 0.0
+        stats["target_id"] = self.target_id
+        stats["tracked_ids"] = sorted(self.tracks)
+        return stats
+
+    def format_stats(self) -> str:
+        """One-line search summary for logging."""
+        stats = self.get_stats()
+        return (
+            f"roi {stats['roi_hits']}/{stats['roi_searches']} ({stats['roi_hit_rate']*100:.0f}%) | "
+            f"full {stats['full_hits']}/{stats['full_searches']} ({stats['full_hit_rate']*100:.0f}%) | "
+            f"target {stats['target_id']} | ids {stats['tracked_ids']}"
+        )
+
+    @staticmethod
+    def _marker_width(c: np.ndarray) -> float:
+        """Marker width in pixels (average of top and bottom edges)."""
+        return float((np.linalg.norm(c[0] - c[1]) + np.linalg.norm(c[2] - c[3])) / 2.0)
+
+    def _select(self, markers: MarkerArray) -> Optional[int]:
+        """
+        Row of the marker to follow: the locked target only, else the marker
+        already being followed, else the first one.
+        """
+        if len(markers) == 0:
+            return None
+        if self.target_id is not None:
+            return markers.index_of(self.target_id)
+        if self._last_marker_id is not None:
+            index = markers.index_of(self._last_marker_id)
+            if index is not None:
+                return index
+        return 0
+
+    def _detect(self, ctx: FrameContext) -> ArucoDetection:
+        timestamp = ctx.timestamp if ctx.timestamp > 0 else time.monotonic()
+        with self._state_lock:
+            search = "full"
+            index = None
+            markers = MarkerArray.empty()
+            if self._use_roi():
+                search = "roi"
+                markers = self._search_roi(ctx, timestamp) or MarkerArray.empty()
+                index = self._select(markers)
+                if index is not None:
+                    self.stats["roi_hits"] += 1
+                else:
+                    self._roi_misses += 1
+                    if self._roi_misses >= ARUCO_ROI_MAX_MISSES:
+                        search = "full"
+
+            if search == "full":
+                self.stats["full_searches"] += 1
+                self._since_full = 0
+                markers = self._markers(ctx)
+                index = self._select(markers)
+                if index is not None:
+                    self.stats["full_hits"] += 1
+            else:
+                self._since_full += 1
+
+            if len(markers):
+                self._update_tracks(markers, timestamp)
+
+            if index is None:
+                if search == "full":
+                    # Lost it: next frame starts over with a full search
+                    self._last_corners = None
+                    self._prev_corners = None
+                detection = self._coast(timestamp, search)
+                detection.markers = markers
+                return detection
+
+            c = markers.corners[index]
+            marker_id = int(markers.ids[index])
+            if marker_id != self._last_marker_id:
+                self._prev_corners = None
+                self._filter.reset()
+            else:
+                self._prev_corners = self._last_corners
+            self._last_corners = c
+            self._last_marker_id = marker_id
+            self._roi_misses = 0
+
+            state = None
+            if self.filter_enabled:
+                center = markers.centers[index]
+                state = self._filter.update(timestamp, (center[0], center[1]), float(markers.widths[index]))
+
+            detection = self._build_detection(c, marker_id, search, state)
+            detection.markers = markers
+            self._last_bbox = detection.bbox
+            self._last_width = float(markers.widths[index])
+            return detection
+
+    def _coast(self, timestamp: float, search: str) -> ArucoDetection:
+        """Predicted detection while the marker is briefly lost (caller holds the lock)."""
+        if not self.filter_enabled or not self._filter.initialized:
+            return ArucoDetection(found=False, search=search)
+
+        state = self._filter.predict(timestamp)
+        if state.age_s > self.max_coast_s:
+            self._filter.reset()
+            self._last_bbox = None
+            return ArucoDetection(found=False, search=search)
+
+        return self._state_detection(state, search)
+
+    def predict(self, timestamp: Optional[float] = None) -> ArucoDetection:
+        """
+        Filtered marker state extrapolated to timestamp without running detection.
+        Lets callers produce steering updates at the control rate between detections.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        with self._state_lock:
+            return self._coast(timestamp, search="none")
+
+    def _state_detection(self, state: MarkerState, search: str) -> ArucoDetection:
+        """Detection built purely from a predicted filter state."""
+        cx, cy = state.center
+        bbox = None
+        if self._last_bbox is not None:
+            # Last measured box, scaled with the size estimate and moved to the prediction
+            _, _, bw, bh = self._last_bbox
+            scale = state.size_px / max(self._last_width, 1.0)
+            bw, bh = int(bw * scale), int(bh * scale)
+            bbox = (int(cx - bw / 2), int(cy - bh / 2), bw, bh)
+
+        distance_m, distance_std = self._filtered_distance(state)
+        return ArucoDetection(
+            found=True,
+            center=(int(cx), int(cy)),
+            bbox=bbox,
+            distance=distance_m,
+            confidence=max(0.0, 1.0 - state.age_s / self.max_coast_s) if self.max_coast_s > 0 else 0.0,
+            marker_id=self._last_marker_id,
+            search=search,
+            predicted=True,
+            center_std=state.center_std,
+            distance_std=distance_std,
+            velocity=state.velocity,
+        )
+
+    def _filtered_distance(self, state: MarkerState) -> Tuple[Optional[float], Optional[float]]:
+        """Distance from the filtered size, with first-order propagated uncertainty."""
+        distance_m = self.estimate_distance_m(state.size_px, self._last_marker_id)
+        if distance_m is None:
+            return None, None
+        return distance_m, distance_m * state.size_std / state.size_px
+
+    def _build_detection(self, c: np.ndarray, marker_id: Optional[int], search: str,
+                         state: Optional[MarkerState] = None) -> ArucoDetection:
+        """Detection fields from one marker's 4x2 corners (and the filtered state, if any)."""
         center = c.mean(axis=0)
         center_pt = (int(center[0]), int(center[1]))
 
@@ -165,20 +605,30 @@ class ArucoTracker:
         y_max = int(np.max(c[:, 1]))
         bbox = (x_min, y_min, x_max - x_min, y_max - y_min)
 
-        # Calculate marker width in pixels (average of top and bottom edges)
-        top_w = np.linalg.norm(c[0] - c[1])
-        bot_w = np.linalg.norm(c[2] - c[3])
-        px_w = (top_w + bot_w) / 2.0
-
-        # Estimate distance (returns None if not calibrated)
-        distance_m = self.estimate_distance_m(px_w)
-        marker_id = int(ids[0][0]) if ids is not None else None
+        if state is None:
+            # Estimate distance (returns None if not calibrated)
+            return ArucoDetection(
+                found=True,
+                center=center_pt,
+                bbox=bbox,
+                distance=self.estimate_distance_m(self._marker_width(c), marker_id),
+                confidence=1.0,
+                marker_id=marker_id,
+                search=search,
+                raw_center=center_pt,
+            )
 
+        distance_m, distance_std = self._filtered_distance(state)
         return ArucoDetection(
             found=True,
-            center=center_pt,
+            center=(int(state.center[0]), int(state.center[1])),
             bbox=bbox,
             distance=distance_m,
             confidence=1.0,
             marker_id=marker_id,
+            search=search,
+            raw_center=center_pt,
+            center_std=state.center_std,
+            distance_std=distance_std,
+            velocity=state.velocity,
         )
@@ -0,0 +1,179 @@
+"""
+Batch Inference - Collect SCAN frames into batched ONNX session calls
+Frames are queued with submit(); a background thread runs them through
+ObjectDetector.detect_records_batch once max_batch frames are waiting or
+max_wait_ms has passed since the oldest, and keeps the per-frame records.
+Sweeping a shelf trades per-frame latency for frames/s this way.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from .object_detector import ObjectDetector
+from .config import SCAN_BATCH_MAX_WAIT_MS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchResult:
+    """Detections for one frame of a completed batch"""
+    frame_seq: int
+    timestamp: float      # Capture time of the frame
+    records: np.ndarray   # DETECTION_DTYPE rows, best first
+    batch_id: int
+    batch_size: int       # Frames in the session call that produced this
+    batch_ms: float       # Duration of that call (pre/post-processing included)
+    latency_ms: float     # submit() -> result available
+
+
+@dataclass
+class _Pending:
+    frame: np.ndarray
+    frame_seq: int
+    timestamp: float
+    submitted: float
+
+
+class BatchedInference:
+    """Accumulates frames and runs them max_batch at a time on a worker thread"""
+
+    def __init__(self, detector: ObjectDetector, max_batch: Optional[int] = None,
+                 max_wait_ms: float = SCAN_BATCH_MAX_WAIT_MS, history: int = 32):
+        """
+        Args:
+            detector: Loaded ObjectDetector (in-process ONNX session)
+            max_batch: Frames per session call (default: detector.max_batch)
+            max_wait_ms: Longest the oldest queued frame waits for a full batch
+            history: Completed per-frame results kept for drain()
+        """
+        self.detector = detector
+        self.max_batch = max(1, max_batch or detector.max_batch)
+        self.max_wait_ms = max_wait_ms
+
+        self._queue: deque = deque()
+        self._max_queued = 2 * self.max_batch  # Older frames are dropped beyond this
+        self._results: deque = deque(maxlen=history)
+        self._latest: Optional[BatchResult] = None
+        self._cond = threading.Condition()
+        self._running = True
+
+        # Stats
+        self._batches = 0
+        self._frames = 0
+        self._dropped = 0
+        self._batch_ms_total = 0.0
+        self._latency_ms_total = 0.0
+
+        self._thread = threading.Thread(target=self._run, daemon=True, name="onnx-batch")
+        self._thread.start()
+
+    def submit(self, frame: np.ndarray, frame_seq: int = -1, timestamp: float = 0.0) -> None:
+        """Queue a copy of frame (the caller's buffer may be reused right away)"""
+        pending = _Pending(frame.copy(), frame_seq, timestamp, time.time())
+        with self._cond:
+            self._queue.append(pending)
+            while len(self._queue) > self._max_queued:
+                self._queue.popleft()
+                self._dropped += 1
+            self._cond.notify()
+
+    def latest(self) -> Optional[BatchResult]:
+        """Result for the newest frame processed so far"""
+        return self._latest
+
+    def drain(self) -> List[BatchResult]:
+        """Every per-frame result completed since the last drain, oldest first"""
+        with self._cond:
+            results = list(self._results)
+            self._results.clear()
+        return results
+
+    def _next_batch(self) -> Optional[List[_Pending]]:
+        """Wait for a full batch or for the oldest frame's deadline; None when closed"""
+        with self._cond:
+            while self._running and not self._queue:
+                self._cond.wait()
+            while self._running and len(self._queue) < self.max_batch:
+                remaining = self._queue[0].submitted + self.max_wait_ms / 1000 - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if not self._running:
+                return None
+            return [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+
+            t_start = time.time()
+            try:
+                records = self.detector.detect_records_batch([p.frame for p in batch])
+            except Exception as e:
+                logger.error(f"Batched inference failed: {e}")
+                continue
+            done = time.time()
+            batch_ms = (done - t_start) * 1000
+
+            results = [
+                BatchResult(
+                    frame_seq=p.frame_seq,
+                    timestamp=p.timestamp,
+                    records=r,
+                    batch_id=self._batches,
+                    batch_size=len(batch),
+                    batch_ms=batch_ms,
+                    latency_ms=(done - p.submitted) * 1000,
+                )
+                for p, r in zip(batch, records)
+            ]
+            with self._cond:
+                self._results.extend(results)
+                self._latest = results[-1]
+                self._batches += 1
+                self._frames += len(batch)
+                self._batch_ms_total += batch_ms
+                self._latency_ms_total += sum(r.latency_ms for r in results)
+
+    def stats(self) -> dict:
+        """Batch counts, mean batch size/time, frame latency and throughput"""
+        with self._cond:
+            batches, frames = self._batches, self._frames
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait_ms,
+                "batches": batches,
+                "frames": frames,
+                "dropped": self._dropped,
+                "mean_batch_size": frames / batches if batches else 0.0,
+                "mean_batch_ms": self._batch_ms_total / batches if batches else 0.0,
+                "mean_latency_ms": self._latency_ms_total / frames if frames else 0.0,
+                "inference_fps": frames * 1000 / self._batch_ms_total if self._batch_ms_total else 0.0,
+            }
+
+    def format_stats(self) -> str:
+        """One-line summary for the periodic log"""
+        s = self.stats()
+        return (
+            f"batch {s['mean_batch_size']:.1f}/{s['max_batch']} in {s['mean_batch_ms']:.0f}ms | "
+            f"latency {s['mean_latency_ms']:.0f}ms | {s['inference_fps']:.1f} frames/s of inference | "
+            f"{s['dropped']} dropped"
+        )
+
+    def close(self) -> None:
+        """Stop the worker thread (queued frames are discarded)"""
+        with self._cond:
+            self._running = False
+            self._queue.clear()
+            self._cond.notify_all()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
@@ -9,14 +9,34 @@ import logging
 import time
 import threading
 from enum import Enum
-from typing import Optional, Tuple, Union
+from typing import Iterator, Optional, Tuple, Union
 from dataclasses import dataclass
 from queue import Queue
 
 from .aruco_tracker import ArucoTracker, ArucoDetection
 from .fall_detector import FallDetector
-from .object_detector import ObjectDetector, ObjectDetection
-from .config import CAMERA_WIDTH, CAMERA_HEIGHT, CAMERA_FPS, FALL_DETECTION_ENABLED, FALL_DEBUG_DRAW
+from .object_detector import ObjectDetection
+from .model_registry import ModelRegistry
+from .batch_inference import BatchedInference
+from .object_tracker import ObjectTracker
+from .frame_pool import FramePool, FrameRef
+from .frame_context import FrameContext, FrameContextCache
+from .frame_annotator import FrameAnnotator
+from .frame_source import FrameSource, open_frame_source, PACING_FAST
+from .result_broadcaster import ResultBroadcaster, PublishedResult
+from .scheduler import FrameScheduler, ScheduleDecision, ACTION_DROP
+from .stage_executor import StageExecutor
+from .safety_events import SafetyEventBus, EVENT_FALL
+from .incident_recorder import IncidentRecorder
+from .latency import (
+    LatencyTracker, STAGE_CAPTURE, STAGE_QUEUE, STAGE_PROCESS, STAGE_ANNOTATE, STAGE_VISION_E2E
+)
+from .config import (
+    CAMERA_WIDTH, CAMERA_HEIGHT, FALL_DETECTION_ENABLED, FALL_DEBUG_DRAW,
+    FRAME_POOL_SIZE, PARALLEL_STAGES_ENABLED, PARALLEL_STAGE_WORKERS, STAGE_TIMEOUTS_MS,
+    SCAN_TRACKING_ENABLED, TRACK_MAX_OBJECTS, SCAN_BATCHING_ENABLED,
+    INCIDENT_RECORDING_ENABLED, INCIDENT_TRIGGER_EVENTS
+)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -44,6 +64,10 @@ class VisionResult:
     fall_detected: bool = False
     fall_reason: str = ""
     fall_bbox: Optional[Tuple[int, int, int, int]] = None
+    fall_stale: bool = False  # Fall fields come from an earlier frame (deferred or timed out)
+    track_id: int = -1        # SCAN mode ObjectTracker ID of the reported item
+    frame_seq: int = -1       # Sequence number of the frame this result came from
+    capture_ts: float = 0.0   # time.monotonic() when that frame was captured
 
 
 class CameraController:
@@ -52,48 +76,90 @@ class CameraController:
     Manages camera, person tracking, and object detection
     """
 
-    def __init__(self, camera_id: int = 0, use_yolo: bool = True, threaded: bool = True):
+    def __init__(
+        self,
+        camera_id: Union[int, str] = 0,
+        use_yolo: bool = True,
+        threaded: bool = True,
+        source: Optional[FrameSource] = None,
+    ):
         """
         Initialize camera controller
 
         Args:
-            camera_id: Camera device ID (0 for laptop webcam, 0 for Pi)
+            camera_id: Camera device ID (0 for laptop webcam, 0 for Pi), or a
+                       recorded video file / image directory path
             use_yolo: Use YOLO for object detection (fallback to color if unavailable)
             threaded: Use threaded camera capture for better performance
+            source: Explicit FrameSource (overrides camera_id)
         """
         self.camera_id = camera_id
         self.mode = CameraMode.SCAN  # Default mode
         self.threaded = threaded
 
-        # Initialize camera
-        self.cap = cv2.VideoCapture(camera_id)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_WIDTH)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_HEIGHT)
-        self.cap.set(cv2.CAP_PROP_FPS, CAMERA_FPS)
+        # Initialize frame source (live camera unless a recording is given)
+        self.source = source if source is not None else open_frame_source(camera_id)
 
-        # Enable camera optimizations for Raspberry Pi
-        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer to minimize lag
-
-        if not self.cap.isOpened():
-            raise RuntimeError(f"Failed to open camera {camera_id}")
+        if not self.source.is_opened():
+            raise RuntimeError(f"Failed to open frame source {camera_id}")
 
         # Initialize vision modules
         self.aruco_tracker = ArucoTracker()
-        self.object_detector = ObjectDetector(use_yolo=use_yolo)
+        # Object detection models load lazily / in the background (see set_model)
+        self.models = ModelRegistry(use_yolo=use_yolo)
+        if self.mode == CameraMode.SCAN:
+            self.models.preload()
         self.fall_detector = FallDetector()
         self.fall_detection_enabled = FALL_DETECTION_ENABLED
+        # SCAN mode: detector runs only when the tracker needs it
+        self.object_tracker = ObjectTracker() if SCAN_TRACKING_ENABLED else None
+        self._scan_model = None  # Model the current tracks came from
+        # SCAN sweeps: batched detection for models with batch_size > 1
+        self.scan_batching = SCAN_BATCHING_ENABLED
+        self._batcher: Optional[BatchedInference] = None
+        self._batch_seen = -1  # Last batch_id fed to the scheduler
         
 
-        # Performance optimization - frame skipping
+        # Performance optimization - adaptive frame scheduling
         self._frame_count = 0
-        self._skip_frames_scan = 2  # Process every 3rd frame in SCAN mode (reduce CPU load)
-        self._skip_frames_follow = 0  # No skipping in FOLLOW mode (ArUco is fast)
+        self.scheduler = FrameScheduler()
         self._last_result = None  # Cache last result for skipped frames
+        self._last_fall_detection = None  # Reused when fall detection is deferred
+
+        # FOLLOW mode: fall detection runs concurrently with ArUco
+        self._stages = StageExecutor(PARALLEL_STAGE_WORKERS) if PARALLEL_STAGES_ENABLED else None
+
+        # Preallocated capture buffers (filled in place by source.read)
+        self._frame_pool = FramePool(
+            capacity=FRAME_POOL_SIZE,
+            shape=(CAMERA_HEIGHT, CAMERA_WIDTH, 3)
+        )
+        # Derived images / detector results shared by everyone using a frame
+        self._contexts = FrameContextCache(capacity=FRAME_POOL_SIZE)
+        # Reusable output buffers + cached static overlays for process_frame
+        self._annotator = FrameAnnotator()
+
+        # Performance monitoring (rolling per-stage latency histograms)
+        self.latency = LatencyTracker()
+        self._latency_log_interval = 150  # frames between percentile summaries
+
+        # Safety alerts pushed to the app as they happen (see vision.safety_events)
+        self.events = SafetyEventBus(self.latency)
+        self._fall_alert_active = False  # Last fall result was positive
+
+        # Last seconds of frames as JPEGs, saved as a clip when an incident happens
+        self.incidents: Optional[IncidentRecorder] = None
+        if INCIDENT_RECORDING_ENABLED:
+            self.incidents = IncidentRecorder()
+            self.events.subscribe(self._on_safety_event)
+
+        # Latest processed result, readable by any number of consumers
+        self._results = ResultBroadcaster()
+        self._reader_state = threading.local()  # per-thread last seen version
 
         # Threading setup
         if self.threaded:
             self._frame_queue = Queue(maxsize=2)  # Small queue to avoid lag
-            self._result_queue = Queue(maxsize=2)
             self._stop_event = threading.Event()
 
             # Start capture thread
@@ -106,20 +172,41 @@ class CameraController:
 
             logger.info("✓ Threaded camera capture enabled")
 
-        # Performance monitoring
-        self._timing_stats = {
-            "capture_ms": [],
-            "process_ms": [],
-            "annotate_ms": []
-        }
-
         print(f"✓ CameraController initialized (Camera ID: {camera_id}, Mode: {self.mode.value}, Threaded: {threaded})")
 
     def set_mode(self, mode: CameraMode):
         """Switch between FOLLOW and SCAN modes"""
         self.mode = mode
+        self._last_fall_detection = None
+        self._fall_alert_active = False
+        self.fall_detector.reset()
+        self.aruco_tracker.reset_tracking()
+        if self.object_tracker is not None:
+            self.object_tracker.reset()
+        self._close_batcher()
+        if mode == CameraMode.SCAN:
+            # Warm the detector (it may have been evicted during FOLLOW)
+            self.models.preload()
         print(f"✓ Mode changed to: {mode.value.upper()}")
 
+    def set_model(self, name: str) -> Tuple[str, bool]:
+        """
+        Switch the SCAN object detection model without restarting
+
+        The new model loads in the background; the current one keeps
+        detecting until it is ready.
+
+        Args:
+            name: Key into ONNX_MODELS
+
+        Returns:
+            (resolved model name, True if it is already active)
+
+        Raises:
+            ValueError: Unknown model name
+        """
+        return self.models.switch(name)
+
     def calibrate_person_marker(self, frame: Optional[np.ndarray] = None) -> bool:
         """
         Calibrate person tracker to marker in center of frame
@@ -131,29 +218,93 @@ class CameraController:
             True if calibration successful
         """
         if frame is None:
-            ret, frame = self.cap.read()
+            ret, frame = self.source.read()
             if not ret:
                 return False
 
         return self.aruco_tracker.calibrate(frame)
 
+    def _capture_frame_ref(self) -> Optional[FrameRef]:
+        """
+        Read the next camera frame into a pooled buffer
+
+        Returns:
+            FrameRef owning the filled slot, or None if the read failed or
+            every slot is still held by consumers
+        """
+        buffer = self._frame_pool.acquire()
+        if buffer is None:
+            # Consumers are behind. A live camera discards this frame without
+            # decoding it; a lossless recording keeps it for when a slot frees
+            if not self._lossless_source():
+                self.source.grab()
+            return None
+
+        ret, frame = self.source.read(image=buffer)
+        if not ret:
+            return None
+
+        if frame is not buffer:
+            # Camera delivered a different size than configured, so OpenCV
+            # allocated a new array. Resize the pool once and carry on.
+            logger.info(f"Reallocating frame pool for shape {frame.shape}")
+            self._frame_pool.configure(frame.shape)
+            buffer = self._frame_pool.acquire()
+            np.copyto(buffer, frame)
+
+        frame_ref = self._frame_pool.publish()
+        if self.incidents is not None:
+            self.incidents.add_frame(frame_ref)
+        return frame_ref
+
+    def _on_safety_event(self, event) -> None:
+        """Safety event subscriber: open an incident clip for serious events"""
+        if event.kind in INCIDENT_TRIGGER_EVENTS:
+            self.incidents.trigger(event.kind, event.seq, event.trigger_ts)
+
+    @staticmethod
+    def _drop_oldest(queue: Queue) -> None:
+        """Drop the oldest queued item and release its frame reference"""
+        from queue import Empty
+        try:
+            item = queue.get_nowait()
+        except Empty:
+            return
+        item[0].release()
+
     def _capture_loop(self):
         """Background thread for continuous camera capture"""
         logger.info("Camera capture thread started")
+        from queue import Full
+
+        lossless = self._lossless_source()
+
         while not self._stop_event.is_set():
             t_start = time.time()
-            ret, frame = self.cap.read()
+            frame_ref = self._capture_frame_ref()
             capture_time = (time.time() - t_start) * 1000
 
-            if ret:
+            if frame_ref is not None and lossless:
+                while not self._stop_event.is_set():
+                    try:
+                        self._frame_queue.put((frame_ref, capture_time), timeout=0.1)
+                        break
+                    except Full:
+                        continue
+                else:
+                    frame_ref.release()
+            elif frame_ref is not None:
                 # Drop old frames if queue is full (keep only latest)
                 if self._frame_queue.full():
-                    try:
-                        self._frame_queue.get_nowait()
-                    except:
-                        pass
-
-                self._frame_queue.put((frame, capture_time))
+                    self._drop_oldest(self._frame_queue)
+
+                self._frame_queue.put((frame_ref, capture_time))
+            elif self.source.exhausted:
+                logger.info("Frame source exhausted, stopping capture")
+                break
+            elif self._frame_pool.free_slots == 0:
+                # All buffers in use downstream, give consumers a moment
+                time.sleep(0.005)
             else:
                 logger.warning("Failed to capture frame")
                 time.sleep(0.01)
@@ -165,39 +316,40 @@ class CameraController:
         logger.info("Frame processing thread started")
         from queue import Empty
         while not self._stop_event.is_set():
+            frame_ref = None
             try:
-                frame, capture_time = self._frame_queue.get(timeout=0.5)
+                frame_ref, capture_time = self._frame_queue.get(timeout=0.5)
+                self.latency.record(STAGE_CAPTURE, capture_time)
+                self.latency.record_since(STAGE_QUEUE, frame_ref.timestamp)
 
                 # Process frame
                 t_start = time.time()
 
-                # Determine if we should process this frame (optimization)
-                skip_interval = self._skip_frames_follow if self.mode == CameraMode.FOLLOW else self._skip_frames_scan
-                should_process = (self._frame_count % (skip_interval + 1)) == 0
+                # Decide whether this frame is worth processing (optimization)
+                decision = self._schedule(frame_ref, backlog=self._frame_queue.qsize())
 
                 self._frame_count += 1
 
-                # Process based on mode (only if not skipping or no cached result)
-                if should_process or self._last_result is None:
-                    if self.mode == CameraMode.FOLLOW:
-                        result = self._process_follow_mode(frame)
-                    else:  # SCAN mode
-                        result = self._process_scan_mode(frame)
+                if decision.action == ACTION_DROP:
+                    # Stale and superseded - release it without publishing
+                    continue
+
+                # Process based on mode (only if scheduled)
+                if decision.should_process:
+                    result = self._run_detectors(frame_ref, decision)
+                    self._stamp_result(result, frame_ref)
                     self._last_result = result
+                    process_time = (time.time() - t_start) * 1000
+                    self.latency.record(STAGE_PROCESS, process_time)
                 else:
-                    # Use cached result
-                    result = self._last_result
-
-                process_time = (time.time() - t_start) * 1000
-
-                # Drop old results if queue is full
-                if self._result_queue.full():
-                    try:
-                        self._result_queue.get_nowait()
-                    except:
-                        pass
+                    # Predict FOLLOW state / track SCAN items forward, else reuse
+                    # the cached result (which keeps the seq/timestamp of its source frame)
+                    result = self._predict_result(frame_ref) or self._last_result
+                    process_time = (time.time() - t_start) * 1000
 
-                self._result_queue.put((frame, result, capture_time, process_time))
+                # Ownership of the frame reference moves to the broadcaster
+                self._results.publish(frame_ref, result, capture_time, process_time)
+                frame_ref = None
 
                 # Log timing every 30 frames
                 if self._frame_count % 30 == 0:
@@ -212,6 +364,9 @@ class CameraController:
                     import traceback
                     traceback.print_exc()
                 time.sleep(0.01)
+            finally:
+                if frame_ref is not None:
+                    frame_ref.release()
 
         logger.info("Frame processing thread stopped")
 
@@ -221,7 +376,7 @@ class CameraController:
         Returns None if no marker is detected or calibration is missing.
         """
         if frame is None:
-            ret, frame = self.cap.read()
+            ret, frame = self.source.read()
             if not ret:
                 return None
 
@@ -231,23 +386,79 @@ class CameraController:
 
         return detection.distance
 
-    def process_frame(self) -> Tuple[Optional[np.ndarray], VisionResult]:
+    def get_latest_result(self) -> Optional[PublishedResult]:
+        """
+        Newest processed frame without blocking (None before the first one)
+
+        The caller owns the returned frame reference; use it as a context
+        manager or call release().
+        """
+        return self._results.latest()
+
+    def wait_for_result(self, newer_than: int, timeout: Optional[float] = None) -> Optional[PublishedResult]:
+        """Block until a result with version > newer_than is available"""
+        return self._results.wait_newer(newer_than, timeout)
+
+    def subscribe_results(self, timeout: Optional[float] = None) -> Iterator[PublishedResult]:
+        """Stream of newest results (a slow subscriber skips, never queues)"""
+        return self._results.subscribe(timeout)
+
+    def process_frame(self, wait_for_new: bool = True, timeout: float = 0.5,
+                      annotate: bool = True) -> Tuple[Optional[np.ndarray], VisionResult]:
         """
-        Capture and process one frame based on current mode
+        Get the newest processed frame based on current mode
+
+        Args:
+            wait_for_new: Wait (up to timeout) for a result newer than the one
+                          the calling thread last received. Pass False to get
+                          the newest result immediately, e.g. for status
+                          broadcasts that may see the same result twice;
+                          before the first result this returns no frame
+                          and a "Waiting for frame..." result at once.
+            timeout: Max seconds to wait in threaded mode
+            annotate: Draw overlays on the returned frame. Pass False when
+                      nobody looks at the video (headless, status only) to
+                      get the plain frame without any drawing cost.
 
         Returns:
-            (annotated_frame, vision_result)
+            (frame, vision_result). The frame lives in a buffer reused by
+            the calling thread's next process_frame call; copy it to keep it.
+            asyncio handlers share their event loop's thread, so they must be
+            done with the frame before their next await.
         """
         if self.threaded:
-            # Get result from processing thread
-            from queue import Empty
+            # Read (without consuming) the result published by the processing thread
+            last_seen = getattr(self._reader_state, "version", 0)
+            if wait_for_new:
+                published = self._results.wait_newer(last_seen, timeout)
+            else:
+                # Never blocks: before the first result this is the "waiting" result below
+                published = self._results.latest()
+
+            if published is None:
+                # No frame ready yet, return empty result
+                return None, VisionResult(
+                    mode=self.mode,
+                    found=False,
+                    label="Waiting for frame...",
+                    confidence=0.0
+                )
+
+            self._reader_state.version = published.version
             try:
-                frame, result, capture_time, process_time = self._result_queue.get(timeout=0.5)
+                result = published.result
+                capture_time = published.capture_time
+                process_time = published.process_time
 
-                # Annotate frame
+                # Annotate frame (or just hand out the plain pixels)
                 t_start = time.time()
-                annotated = self._annotate_frame(frame, result)
+                ctx = self._contexts.get(published.frame_ref)
+                if annotate:
+                    annotated = self._annotate_frame(ctx, result)
+                else:
+                    annotated = self._annotator.output(ctx.frame)
                 annotate_time = (time.time() - t_start) * 1000
+                self._record_result_latency(result, annotate_time if annotate else None)
 
                 # Log timing stats every 30 frames
                 if self._frame_count % 30 == 0:
@@ -261,14 +472,6 @@ class CameraController:
 
                 return annotated, result
 
-            except Empty:
-                # No frame ready yet, return empty result
-                return None, VisionResult(
-                    mode=self.mode,
-                    found=False,
-                    label="Waiting for frame...",
-                    confidence=0.0
-                )
             except Exception as e:
                 logger.error(f"Error getting processed frame: {e}")
                 import traceback
@@ -279,13 +482,15 @@ class CameraController:
                     label="Processing error",
                     confidence=0.0
                 )
+            finally:
+                published.release()
         else:
             # Non-threaded mode (original implementation)
             t_capture_start = time.time()
-            ret, frame = self.cap.read()
+            frame_ref = self._capture_frame_ref()
             capture_time = (time.time() - t_capture_start) * 1000
 
-            if not ret:
+            if frame_ref is None:
                 return None, VisionResult(
                     mode=self.mode,
                     found=False,
@@ -293,55 +498,156 @@ class CameraController:
                     confidence=0.0
                 )
 
-            # Determine if we should process this frame (optimization)
-            skip_interval = self._skip_frames_follow if self.mode == CameraMode.FOLLOW else self._skip_frames_scan
-            should_process = (self._frame_count % (skip_interval + 1)) == 0
-
-            self._frame_count += 1
+            try:
+                return self._process_unthreaded(frame_ref, capture_time, annotate)
+            finally:
+                frame_ref.release()
 
-            # Process based on mode
-            t_process_start = time.time()
-            if should_process or self._last_result is None:
-                if self.mode == CameraMode.FOLLOW:
-                    result = self._process_follow_mode(frame)
-                else:  # SCAN mode
-                    result = self._process_scan_mode(frame)
-                self._last_result = result
+    def _lossless_source(self) -> bool:
+        """
+        Unpaced recordings are benchmarks: the capture thread waits for the
+        processor instead of dropping frames and the scheduler neither skips
+        nor drops, so every recorded frame is processed exactly once
+        """
+        return self.source.is_finite() and self.source.pacing == PACING_FAST
+
+    def _schedule(self, frame_ref: FrameRef, backlog: int = 0) -> ScheduleDecision:
+        """Ask the scheduler what to do with this frame"""
+        has_cached = self._last_result is not None and self._last_result.mode == self.mode
+        decision = self.scheduler.decide(
+            self.mode.value,
+            frame_ref.seq,
+            frame_ref.timestamp,
+            backlog=backlog,
+            has_cached=has_cached,
+            lossless=self._lossless_source(),
+        )
+        if not decision.should_process:
+            logger.debug(f"Frame {decision.frame_seq} {decision.action}: {decision.reason}")
+        return decision
+
+    def _run_detectors(self, frame_ref: FrameRef, decision: ScheduleDecision) -> VisionResult:
+        """Run the detectors the scheduler selected for this frame"""
+        if decision.mode == CameraMode.FOLLOW.value:
+            return self._process_follow_mode(frame_ref, run_fall=decision.runs("fall"))
+        return self._process_scan_mode(self._contexts.get(frame_ref))
+
+    def get_scheduler_stats(self) -> dict:
+        """Scheduler decision counters, stage cost EWMAs and last decision"""
+        return self.scheduler.stats()
+
+    def _stamp_result(self, result: VisionResult, frame_ref: FrameRef) -> None:
+        """Tag a freshly computed result with its source frame's seq and capture time"""
+        if result.frame_seq >= 0:
+            # Already tagged with the (older) frame it came from, e.g. batched SCAN
+            return
+        result.frame_seq = frame_ref.seq
+        result.capture_ts = frame_ref.timestamp
+
+    def _record_result_latency(self, result: VisionResult, annotate_time: Optional[float]) -> None:
+        """Record consumer-side latencies and periodically log percentiles"""
+        if annotate_time is not None:
+            self.latency.record(STAGE_ANNOTATE, annotate_time)
+        self.latency.record_since(STAGE_VISION_E2E, result.capture_ts)
+
+        if self._frame_count % self._latency_log_interval == 0:
+            logger.info(f"Latency (ms, {self.latency.window_s:.0f}s window): {self.latency.format_summary()}")
+            logger.info(f"Scheduler: {self.scheduler.format_summary()}")
+            if self.mode == CameraMode.FOLLOW:
+                logger.info(f"ArUco search: {self.aruco_tracker.format_stats()}")
+                if self.fall_detection_enabled:
+                    logger.info(f"Fall search: {self.fall_detector.format_stats()}")
             else:
-                # Use cached result but update mode if changed
-                result = self._last_result
-                if result.mode != self.mode:
-                    # Mode changed, force reprocess
-                    if self.mode == CameraMode.FOLLOW:
-                        result = self._process_follow_mode(frame)
-                    else:
-                        result = self._process_scan_mode(frame)
-                    self._last_result = result
+                logger.info(f"Models: {self.models.format_stats()}")
+                if self._batcher is not None:
+                    logger.info(f"Batched detection: {self._batcher.format_stats()}")
+                if self.object_tracker is not None:
+                    logger.info(f"Object tracking: {self.object_tracker.format_stats()}")
+            if self.events.counts:
+                logger.info(f"Safety events: {self.events.format_stats()}")
+            if self.incidents is not None:
+                logger.info(f"Incident buffer: {self.incidents.format_stats()}")
+
+    def get_latency_stats(self) -> dict:
+        """Rolling p50/p95/p99 per pipeline stage (see vision.latency)"""
+        return self.latency.snapshot()
+
+    def _process_unthreaded(self, frame_ref: FrameRef, capture_time: float,
+                            annotate: bool = True) -> Tuple[np.ndarray, VisionResult]:
+        """Process (and optionally annotate) one frame synchronously (non-threaded mode)"""
+        self.latency.record(STAGE_CAPTURE, capture_time)
+
+        # Decide whether this frame is worth processing (optimization);
+        # a mode change always forces processing since the cache is for the old mode
+        decision = self._schedule(frame_ref)
+
+        self._frame_count += 1
+
+        # Process based on mode
+        t_process_start = time.time()
+        if decision.should_process:
+            result = self._run_detectors(frame_ref, decision)
+            self._stamp_result(result, frame_ref)
+            self._last_result = result
+        else:
+            # Predict FOLLOW state / track SCAN items forward, else use cached result
+            result = self._predict_result(frame_ref) or self._last_result
+
+        process_time = (time.time() - t_process_start) * 1000
+        if decision.should_process:
+            self.latency.record(STAGE_PROCESS, process_time)
+
+        # Annotate the current frame with latest result
+        t_annotate_start = time.time()
+        ctx = self._contexts.get(frame_ref)
+        if annotate:
+            annotated = self._annotate_frame(ctx, result)
+        else:
+            annotated = self._annotator.output(ctx.frame)
+        annotate_time = (time.time() - t_annotate_start) * 1000
+        self._record_result_latency(result, annotate_time if annotate else None)
+
+        # Publish for other readers (get_latest_result / subscribers)
+        self._results.publish(frame_ref.retain(), result, capture_time, process_time)
+
+        # Log timing stats every 30 frames
+        if self._frame_count % 30 == 0:
+            logger.info(
+                f"[{self.mode.value.upper()}] "
+                f"Capture: {capture_time:.1f}ms | "
+                f"Process: {process_time:.1f}ms | "
+                f"Annotate: {annotate_time:.1f}ms | "
+                f"Total: {capture_time + process_time + annotate_time:.1f}ms"
+            )
 
-            process_time = (time.time() - t_process_start) * 1000
+        return annotated, result
 
-            # Annotate the current frame with latest result
-            t_annotate_start = time.time()
-            annotated = self._annotate_frame(frame, result)
-            annotate_time = (time.time() - t_annotate_start) * 1000
+    def _process_follow_mode(self, frame_ref: FrameRef, run_fall: bool = True) -> VisionResult:
+        """
+        Process frame in FOLLOW mode - ArUco marker tracking
 
-            # Log timing stats every 30 frames
-            if self._frame_count % 30 == 0:
-                logger.info(
-                    f"[{self.mode.value.upper()}] "
-                    f"Capture: {capture_time:.1f}ms | "
-                    f"Process: {process_time:.1f}ms | "
-                    f"Annotate: {annotate_time:.1f}ms | "
-                    f"Total: {capture_time + process_time + annotate_time:.1f}ms"
-                )
+        Args:
+            frame_ref: Frame to process
+            run_fall: Run fall detection on this frame; otherwise reuse the
+                      last fall result (the scheduler runs it at a lower rate)
+        """
+        ctx = self._contexts.get(frame_ref)
+        run_fall = self.fall_detection_enabled and (run_fall or self._last_fall_detection is None)
 
-            return annotated, result
+        # Start fall detection first so it overlaps ArUco
+        if run_fall and self._stages is not None:
+            fall_ref = frame_ref.retain()  # Keep the pixels alive if the stage outlives this frame
+            self._stages.submit("fall", self._run_fall_stage, fall_ref, ctx, on_skip=fall_ref.release)
 
-    def _process_follow_mode(self, frame: np.ndarray) -> VisionResult:
-        """Process frame in FOLLOW mode - ArUco marker tracking"""
-        detection = self.aruco_tracker.detect(frame)
-        fall_detection = self.fall_detector.update(frame) if self.fall_detection_enabled else None
+        t_start = time.time()
+        detection = self.aruco_tracker.detect(ctx)
+        self.scheduler.observe("aruco", (time.time() - t_start) * 1000)
+
+        fall_detection, fall_stale = self._collect_fall(ctx, run_fall)
+        return self._follow_result(detection, fall_detection, fall_stale)
 
+    def _follow_result(self, detection: ArucoDetection, fall_detection, fall_stale: bool) -> VisionResult:
+        """Build the FOLLOW mode result from a (measured or predicted) marker detection"""
         if detection.found:
             # Calculate steering offset
             offset = 0.0
@@ -359,6 +665,8 @@ class CameraController:
                 label += " (Uncalibrated - Press 'C')"
             else:
                 label += f" (Calibrated)"
+            if detection.predicted:
+                label += " [predicted]"
 
             # Log detection details for debugging
             if self._frame_count % 30 == 0:
@@ -380,7 +688,8 @@ class CameraController:
                 raw_detection=detection,
                 fall_detected=bool(fall_detection and fall_detection.fall_detected),
                 fall_reason=fall_detection.reason if fall_detection else "",
-                fall_bbox=fall_detection.bbox if fall_detection else None
+                fall_bbox=fall_detection.bbox if fall_detection else None,
+                fall_stale=fall_stale
             )
         else:
             return VisionResult(
@@ -391,12 +700,184 @@ class CameraController:
                 raw_detection=detection,
                 fall_detected=bool(fall_detection and fall_detection.fall_detected),
                 fall_reason=fall_detection.reason if fall_detection else "",
-                fall_bbox=fall_detection.bbox if fall_detection else None
+                fall_bbox=fall_detection.bbox if fall_detection else None,
+                fall_stale=fall_stale
             )
 
-    def _process_scan_mode(self, frame: np.ndarray) -> VisionResult:
+    def _predict_result(self, frame_ref: FrameRef) -> Optional[VisionResult]:
+        """Result for a frame the scheduler skipped (None: reuse the cached one)"""
+        if self.mode == CameraMode.FOLLOW:
+            return self._predict_follow_result(frame_ref)
+        return self._track_scan_result(frame_ref)
+
+    def _track_scan_result(self, frame_ref: FrameRef) -> Optional[VisionResult]:
+        """
+        Result for a skipped SCAN frame from the object tracks moved by
+        optical flow, so boxes follow the items instead of freezing
+        """
+        last = self._last_result
+        if self.object_tracker is None or last is None or last.mode != CameraMode.SCAN:
+            return None
+        if self._batcher is not None:
+            # Batched SCAN bypasses the tracker; keep the last batched result
+            return None
+
+        ctx = self._contexts.get(frame_ref)
+        self.object_tracker.propagate(ctx.gray, frame_ref.timestamp)
+        result = self._scan_result(self.object_tracker.best())
+        self._stamp_result(result, frame_ref)
+        return result
+
+    def _predict_follow_result(self, frame_ref: FrameRef) -> Optional[VisionResult]:
+        """
+        Result for a skipped FOLLOW frame from the marker filter's prediction
+
+        Keeps steering updates flowing at the frame rate while the detector
+        runs less often. Returns None when there is nothing to predict from.
+        """
+        last = self._last_result
+        if last is None or last.mode != CameraMode.FOLLOW or not self.aruco_tracker.filter_enabled:
+            return None
+
+        detection = self.aruco_tracker.predict(frame_ref.timestamp)
+        if not detection.found:
+            return None
+
+        result = self._follow_result(detection, self._last_fall_detection, fall_stale=True)
+        self._stamp_result(result, frame_ref)
+        return result
+
+    def _run_fall_stage(self, fall_ref: FrameRef, ctx: FrameContext):
+        """Fall detection on a stage executor thread; owns fall_ref (keeps ctx's pixels alive)"""
+        try:
+            t_start = time.time()
+            fall_detection = self.fall_detector.update(ctx)
+            self.scheduler.observe("fall", (time.time() - t_start) * 1000)
+            self._check_fall_alert(fall_detection, ctx.timestamp)
+            return fall_detection
+        finally:
+            fall_ref.release()
+
+    def _collect_fall(self, ctx: FrameContext, run_fall: bool):
+        """
+        Get the fall result to attach to this frame
+
+        Returns:
+            (FallDetection or None, stale) where stale means the detection is
+            from an earlier frame (deferred by the scheduler or timed out)
+        """
+        if not self.fall_detection_enabled:
+            return None, False
+
+        if self._stages is None:
+            if run_fall:
+                t_start = time.time()
+                self._last_fall_detection = self.fall_detector.update(ctx)
+                self.scheduler.observe("fall", (time.time() - t_start) * 1000)
+                self._check_fall_alert(self._last_fall_detection, ctx.timestamp)
+            return self._last_fall_detection, not run_fall
+
+        # Wait only for a run started on this frame; otherwise pick up any
+        # run that finished in the background since the last frame
+        timeout = STAGE_TIMEOUTS_MS["fall"] / 1000 if run_fall else 0.0
+        stage = self._stages.collect("fall", timeout=timeout)
+        if stage.timed_out and run_fall:
+            logger.debug(f"Fall detection over {STAGE_TIMEOUTS_MS['fall']:.0f}ms, using previous result")
+        if stage.value is not None:
+            self._last_fall_detection = stage.value
+        return self._last_fall_detection, stage.stale
+
+    def _check_fall_alert(self, fall_detection, capture_ts: float) -> None:
+        """
+        Publish a fall event when fall detection turns positive, straight
+        from the thread that ran it (the result may not be collected yet)
+        """
+        active = bool(fall_detection and fall_detection.fall_detected)
+        if active and not self._fall_alert_active:
+            self.events.publish(
+                EVENT_FALL,
+                f"Fall detected ({fall_detection.reason or 'heuristic'})",
+                data={"reason": fall_detection.reason, "bbox": fall_detection.bbox,
+                      "aspect_ratio": round(fall_detection.aspect_ratio, 2)},
+                trigger_ts=capture_ts,
+            )
+        self._fall_alert_active = active
+
+    def _process_scan_mode(self, ctx: FrameContext) -> VisionResult:
         """Process frame in SCAN mode"""
-        detection = self.object_detector.get_best_detection(frame)
+        with self.models.acquire() as detector:
+            if detector is None:
+                # Active model still loading in the background
+                return self._scan_result(None, label=f"Loading {self.models.active}...")
+
+            if self.scan_batching and detector.max_batch > 1 and detector.backend == "onnx":
+                return self._batched_scan_result(detector, ctx)
+            if self._batcher is not None:
+                # Switched to an unbatched model (or batching was turned off)
+                self._close_batcher()
+
+            if self.object_tracker is None:
+                t_start = time.time()
+                detection = detector.get_best_detection(ctx)
+                self.scheduler.observe("objects", (time.time() - t_start) * 1000)
+                return self._scan_result(detection)
+
+            if detector.model_choice != self._scan_model:
+                # Tracks carry the previous model's labels
+                self.object_tracker.reset()
+                self._scan_model = detector.model_choice
+
+            # Run the detector only when tracks aged out, faded or lost their flow
+            redetect, reason = self.object_tracker.needs_detection(ctx.timestamp)
+            if redetect:
+                self.object_tracker.note_redetect(reason)
+                t_start = time.time()
+                detections = detector.detect(ctx, max_results=TRACK_MAX_OBJECTS)
+                self.scheduler.observe("objects", (time.time() - t_start) * 1000)
+                self.object_tracker.update(detections, ctx.gray, ctx.timestamp)
+            else:
+                self.object_tracker.propagate(ctx.gray, ctx.timestamp)
+
+        return self._scan_result(self.object_tracker.best())
+
+    def _batched_scan_result(self, detector, ctx: FrameContext) -> VisionResult:
+        """
+        SCAN sweep: queue the frame for batched detection and report the newest
+        frame whose batch has finished (up to one batch behind the camera)
+        """
+        batcher = self._batcher
+        if batcher is None or batcher.detector is not detector:
+            self._close_batcher()
+            batcher = self._batcher = BatchedInference(detector)
+            logger.info(f"Batched SCAN detection: {detector.model_choice}, batch {batcher.max_batch}")
+
+        batcher.submit(ctx.frame, ctx.seq, ctx.timestamp)
+        done = batcher.latest()
+        if done is None:
+            return self._scan_result(None, label="Waiting for first batch...")
+
+        if done.batch_id != self._batch_seen:
+            # Amortized per-frame cost keeps the scheduler's budget honest
+            self._batch_seen = done.batch_id
+            self.scheduler.observe("objects", done.batch_ms / done.batch_size)
+
+        detections = detector.to_detections(done.records[:1])
+        result = self._scan_result(detections[0] if detections else None)
+        # The result belongs to the batched frame, not the one just submitted
+        result.frame_seq = done.frame_seq
+        result.capture_ts = done.timestamp
+        return result
+
+    def _close_batcher(self) -> None:
+        batcher, self._batcher = self._batcher, None
+        self._batch_seen = -1
+        if batcher is not None:
+            batcher.close()
+
+    def _scan_result(self, detection, label: str = "No objects detected") -> VisionResult:
+        """SCAN VisionResult for an ObjectDetection or ObjectTrack (None: nothing found, label says why)"""
+        if detection is not None and not isinstance(detection, ObjectDetection):
+            detection = detection.to_detection()
 
         if detection and detection.found:
             # Calculate offset for centering on object
@@ -413,48 +894,30 @@ class CameraController:
                 bbox=detection.bbox,
                 distance=detection.distance,
                 tracking_offset=offset,
-                raw_detection=detection
+                raw_detection=detection,
+                track_id=detection.track_id
             )
         else:
             return VisionResult(
                 mode=CameraMode.SCAN,
                 found=False,
-                label="No objects detected",
+                label=label,
                 confidence=0.0
             )
 
-    def _annotate_frame(self, frame: np.ndarray, result: VisionResult) -> np.ndarray:
-        """Draw annotations on frame"""
-        annotated = frame.copy()
-        h, w = frame.shape[:2]
+    def _annotate_frame(self, ctx: FrameContext, result: VisionResult) -> np.ndarray:
+        """Draw annotations for result over the frame behind ctx (into a reusable buffer)"""
+        annotated = self._annotator.output(ctx.frame)
+        h, w = annotated.shape[:2]
 
-        # Mode indicator (top left)
-        mode_color = (255, 0, 255) if result.mode == CameraMode.FOLLOW else (0, 255, 0)
-        cv2.putText(
+        # Mode label, calibration banner and crosshair only change with state
+        calibrated = self.aruco_tracker.focal_length_px is not None
+        self._annotator.apply_layer(
             annotated,
-            f"MODE: {result.mode.value.upper()}",
-            (10, 30),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.8,
-            mode_color,
-            2
+            ("static", result.mode, calibrated),
+            lambda image: self._draw_static_layer(image, result.mode, calibrated)
         )
 
-        # Calibration status (FOLLOW mode only)
-        if result.mode == CameraMode.FOLLOW:
-            calibrated = self.aruco_tracker.focal_length_px is not None
-            calib_text = "CALIBRATED" if calibrated else "PRESS 'C' TO CALIBRATE"
-            calib_color = (0, 255, 0) if calibrated else (0, 0, 255)
-            cv2.putText(
-                annotated,
-                calib_text,
-                (10, 60),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                calib_color,
-                1
-            )
-
         # YOLO method indicator (SCAN mode only)
         if result.mode == CameraMode.SCAN and isinstance(result.raw_detection, ObjectDetection):
             method_text = f"Method: {result.raw_detection.method.upper()}"
@@ -468,10 +931,6 @@ class CameraController:
                 1
             )
 
-        # Center crosshair
-        cv2.line(annotated, (w//2-20, h//2), (w//2+20, h//2), (255, 255, 255), 1)
-        cv2.line(annotated, (w//2, h//2-20), (w//2, h//2+20), (255, 255, 255), 1)
-
         # Fall detection overlay
         if result.fall_bbox and (result.fall_detected or FALL_DEBUG_DRAW):
             fx, fy, fw, fh = result.fall_bbox
@@ -507,6 +966,8 @@ class CameraController:
 
             # Label with confidence
             label_text = f"{result.label} ({result.confidence*100:.0f}%)"
+            if result.track_id >= 0:
+                label_text = f"#{result.track_id} {label_text}"
             # Add background to text for better visibility
             (text_width, text_height), _ = cv2.getTextSize(label_text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
             cv2.rectangle(annotated, (x, y - text_height - 15), (x + text_width, y - 5), (0, 0, 0), -1)
@@ -534,20 +995,20 @@ class CameraController:
                 1
             )
 
-            # Locked marker center (FOLLOW mode only)
-            if result.mode == CameraMode.FOLLOW:
-                locked_center = self.aruco_tracker.get_locked_center(frame, normalized=True)
-                if locked_center is not None:
-                    coord_text = f"X: {locked_center[0]:+.2f} Y: {locked_center[1]:+.2f}"
-                    cv2.putText(
-                        annotated,
-                        coord_text,
-                        (x, y + bh + 45),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.5,
-                        (255, 255, 255),
-                        1
-                    )
+            # Locked marker center (FOLLOW mode only), normalized to -1..1 from
+            # the detection already in the result rather than a fresh ArUco search
+            if result.mode == CameraMode.FOLLOW and calibrated and result.center:
+                cx, cy = result.center
+                coord_text = f"X: {(cx - w / 2) / (w / 2):+.2f} Y: {(cy - h / 2) / (h / 2):+.2f}"
+                cv2.putText(
+                    annotated,
+                    coord_text,
+                    (x, y + bh + 45),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.5,
+                    (255, 255, 255),
+                    1
+                )
 
             # Offset indicator (for robot steering)
             offset_x = int(w/2 + result.tracking_offset * w/2)
@@ -573,6 +1034,41 @@ class CameraController:
 
         return annotated
 
+    @staticmethod
+    def _draw_static_layer(image: np.ndarray, mode: CameraMode, calibrated: bool) -> None:
+        """Draw the overlays that depend only on mode and calibration state"""
+        h, w = image.shape[:2]
+
+        # Mode indicator (top left)
+        mode_color = (255, 0, 255) if mode == CameraMode.FOLLOW else (0, 255, 0)
+        cv2.putText(
+            image,
+            f"MODE: {mode.value.upper()}",
+            (10, 30),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.8,
+            mode_color,
+            2
+        )
+
+        # Calibration status (FOLLOW mode only)
+        if mode == CameraMode.FOLLOW:
+            calib_text = "CALIBRATED" if calibrated else "PRESS 'C' TO CALIBRATE"
+            calib_color = (0, 255, 0) if calibrated else (0, 0, 255)
+            cv2.putText(
+                image,
+                calib_text,
+                (10, 60),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.5,
+                calib_color,
+                1
+            )
+
+        # Center crosshair
+        cv2.line(image, (w//2-20, h//2), (w//2+20, h//2), (255, 255, 255), 1)
+        cv2.line(image, (w//2, h//2-20), (w//2, h//2+20), (255, 255, 255), 1)
+
     def release(self):
         """Release camera resources"""
         # Stop threads if threaded mode is enabled
@@ -586,12 +1082,28 @@ class CameraController:
             if self._processing_thread.is_alive():
                 self._processing_thread.join(timeout=2.0)
 
+            # Return any queued frame buffers to the pool
+            while not self._frame_queue.empty():
+                self._drop_oldest(self._frame_queue)
+
             logger.info("Camera threads stopped")
 
-        self.cap.release()
-        cv2.destroyAllWindows()
+        if self._stages is not None:
+            self._stages.shutdown()
+        self._results.close()
+        self._contexts.clear()
+        self._close_batcher()
+        self.models.close()
+        self.fall_detector.close()
+        if self.incidents is not None:
+            self.incidents.close()
+        self.source.release()
+        try:
+            cv2.destroyAllWindows()
+        except cv2.error:
+            pass  # Headless OpenCV build (e.g. replay benchmarks on a server)
         print("✓ Camera released")
 
     def is_opened(self) -> bool:
         """Check if camera is opened"""
-        return self.cap.isOpened()
+        return self.source.is_opened()
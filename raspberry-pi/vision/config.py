@@ -12,10 +12,95 @@ CAMERA_WIDTH = 320  # Reduced from 416 for better tracking performance
 CAMERA_HEIGHT = 240  # Reduced from 416 for better tracking performance
 CAMERA_FPS = 15     # Reduced from 30 to lower CPU usage
 
+# Adaptive frame scheduling (replaces fixed frame skipping)
+# target_latency_ms: max frame age when its result is ready
+# target_rate_hz: desired processed-result rate per mode
+SCHEDULER_BUDGETS = {
+    "follow": {"target_latency_ms": 150.0, "target_rate_hz": 15.0},
+    "scan": {"target_latency_ms": 400.0, "target_rate_hz": 5.0},
+}
+SCHEDULER_DETECTOR_RATES_HZ = {"fall": 5.0}  # Max rate for optional detectors
+SCHEDULER_EWMA_ALPHA = 0.2  # Weight of the newest stage cost sample
+
+# Parallel FOLLOW stages: fall detection runs on a worker thread while ArUco
+# runs on the processing thread. If fall detection is not done within the
+# timeout (after ArUco finishes), steering goes ahead with the previous fall
+# result flagged as stale.
+PARALLEL_STAGES_ENABLED = True
+PARALLEL_STAGE_WORKERS = 2
+STAGE_TIMEOUTS_MS = {"fall": 20.0}
+
+# Capture buffer pool: frame queue (2) + one frame each in capture, processing
+# and the latest-result slot, plus two concurrent readers annotating, plus
+# one frame held by an in-flight parallel fall detection stage, plus up to two
+# waiting for / in the incident recorder's JPEG encoder.
+# Steady-state capture reuses these slots.
+FRAME_POOL_SIZE = 10
+
 # ArUco Tracking
 ARUCO_MARKER_LENGTH_CM = 5.0
 ARUCO_CALIBRATION_DISTANCE_CM = 1.0
 
+# ArUco detector parameter profiles (cv2.aruco.DetectorParameters attributes).
+# The OpenCV defaults sweep three adaptive-threshold windows (3..23 px), which
+# is most of the detection cost at 320x240. cornerRefinementMethod: 0 = none,
+# 1 = subpixel. Benchmark on recorded footage with tune_aruco.py.
+ARUCO_DETECTOR_PROFILES = {
+    "fast": {
+        "adaptiveThreshWinSizeMin": 7,
+        "adaptiveThreshWinSizeMax": 7,
+        "adaptiveThreshWinSizeStep": 10,
+        "minMarkerPerimeterRate": 0.05,
+        "perspectiveRemovePixelPerCell": 4,
+        "cornerRefinementMethod": 0,
+    },
+    "balanced": {
+        "adaptiveThreshWinSizeMin": 5,
+        "adaptiveThreshWinSizeMax": 15,
+        "adaptiveThreshWinSizeStep": 10,
+        "minMarkerPerimeterRate": 0.03,
+        "cornerRefinementMethod": 0,
+    },
+    "robust": {
+        "adaptiveThreshWinSizeMin": 3,
+        "adaptiveThreshWinSizeMax": 23,
+        "adaptiveThreshWinSizeStep": 10,
+        "minMarkerPerimeterRate": 0.02,
+        "cornerRefinementMethod": 1,
+    },
+}
+
+# --- tune_aruco.py: begin (rewritten by `python tune_aruco.py --write`) ---
+ARUCO_TUNED_PROFILE = None  # Pareto-best parameters from the last tuning run
+ARUCO_DETECTOR_PROFILE = "balanced"
+# --- tune_aruco.py: end ---
+if ARUCO_TUNED_PROFILE is not None:
+    ARUCO_DETECTOR_PROFILES["tuned"] = ARUCO_TUNED_PROFILE
+
+# ArUco ROI tracking: search a padded window around the predicted marker first
+ARUCO_ROI_ENABLED = True
+ARUCO_ROI_PADDING = 0.75          # Window padding as a fraction of marker size
+ARUCO_ROI_MIN_PADDING_PX = 24     # ArUco needs a quiet zone around the marker
+ARUCO_ROI_MAX_MISSES = 1          # Consecutive ROI misses before a full-frame search
+ARUCO_FULL_SEARCH_INTERVAL = 30   # Force a full-frame search every N detections
+
+# ArUco state filter: constant-velocity Kalman over marker center and size.
+# Steering uses the filtered state; when the marker is briefly lost the
+# tracker keeps reporting the predicted position for ARUCO_FILTER_MAX_COAST_S.
+ARUCO_FILTER_ENABLED = True
+ARUCO_FILTER_ACCEL_STD = (400.0, 400.0, 150.0)  # Process noise (px/s^2) for x, y, size
+ARUCO_FILTER_MEAS_STD = (2.0, 2.0, 1.5)         # Measurement noise (px) for x, y, size
+ARUCO_FILTER_MAX_COAST_S = 0.5
+ARUCO_TRACK_LIFETIME_S = 2.5  # Forget a marker ID not seen for this long (> full-search period)
+
+# Multi-resolution ArUco: detect on a pyrDown level no wider than
+# ARUCO_DETECT_MAX_WIDTH, then refine corners with cornerSubPix on the
+# full-resolution frame. Lets the camera run at 640x480 or higher for range
+# down the aisle without paying full-resolution detection cost.
+ARUCO_PYRAMID_ENABLED = True
+ARUCO_DETECT_MAX_WIDTH = 320
+ARUCO_PYRAMID_MAX_LEVEL = 2
+
 # Person Tracking - Color-based detection
 PERSON_MARKER_COLORS = {
     "pink_magenta": {
@@ -67,8 +152,13 @@ GROCERY_ITEM_COLORS = {
     }
 }
 
+# Where color ranges overlap, a pixel belongs to the first listed item
+# (apple_red and tomato share a range, so red is reported as apple)
+GROCERY_COLOR_PRIORITY = ["banana", "orange", "apple_red", "apple_green", "tomato", "lemon", "broccoli"]
+
 # Object detection model selection
 # Options: "fruits_onnx", "sku110_onnx", "grocery_onnx", "yolov8n_pt"
+# (or a registered "<model>_int8" variant, see ONNX_QUANTIZED_MODELS)
 OBJECT_DETECTION_MODEL = "grocery_onnx"
 
 # YOLO Configuration (Ultralytics .pt)
@@ -79,6 +169,7 @@ YOLO_IOU_THRESHOLD = 0.45
 # ONNX Configuration (Ultralytics export)
 ONNX_CONFIDENCE_THRESHOLD = 0.4
 ONNX_IOU_THRESHOLD = 0.45
+
 ONNX_MODELS = {
     "fruits_onnx": {
         "path": "models/best.onnx",
@@ -89,13 +180,96 @@ ONNX_MODELS = {
         "path": "models/sku110_fine_tuned.onnx",
         "input_size": 640,
         "class_names": ["object"],
+        "metrics": "../metrics/sku_finetuned",  # Ultralytics validation results
     },
     "grocery_onnx": {
         "path": "models/best_grocery.onnx",
         "input_size": 416,
         "class_names": ["milk", "apple", "banana", "carrot", "orange"],
+        "metrics": "../metrics/grocery",
     },
+    "person_onnx": {  # COCO export; class_names keeps only class 0 (fall detection)
+        "path": "models/yolov8n.onnx",
+        "input_size": 320,
+        "class_names": ["person"],
+        "scan": False,  # Not offered for SCAN (see SCAN_MODELS)
+    },
+}
+
+# INT8 variants produced by quantize_models.py. Each entry is registered in
+# ONNX_MODELS as "<model>_int8" (same classes and input size as the FP32
+# model). Set ONNX_PREFER_QUANTIZED to run the INT8 variant of the selected
+# model whenever one exists.
+# --- quantize_models.py: begin (rewritten by `python quantize_models.py --write`) ---
+ONNX_QUANTIZED_MODELS = {}
+# --- quantize_models.py: end ---
+ONNX_QUANTIZED_SUFFIX = "_int8"
+ONNX_PREFER_QUANTIZED = False
+for _name, _entry in ONNX_QUANTIZED_MODELS.items():
+    if _name in ONNX_MODELS:
+        ONNX_MODELS[_name + ONNX_QUANTIZED_SUFFIX] = {**ONNX_MODELS[_name], **_entry, "quantized_from": _name}
+
+# Batched SCAN inference (vision/batch_inference.py): when sweeping a shelf,
+# frames/s matters more than the latency of any one frame. Frames are queued
+# until the model's batch_size are waiting or SCAN_BATCH_MAX_WAIT_MS has passed
+# since the first, then run as one session call. benchmark_batching.py measures
+# the throughput/latency trade-off, re-exports models with a dynamic batch
+# dimension and records the chosen batch_size per model here.
+# --- benchmark_batching.py: begin (rewritten by `python benchmark_batching.py --write`) ---
+ONNX_BATCH_MODELS = {}
+# --- benchmark_batching.py: end ---
+for _name, _entry in ONNX_BATCH_MODELS.items():
+    if _name in ONNX_MODELS:
+        ONNX_MODELS[_name] = {**ONNX_MODELS[_name], **_entry}
+
+# Grocery models SCAN can switch to (and the tuning scripts work on); entries
+# with "scan": False serve other stages, e.g. fall detection's person model
+SCAN_MODELS = [_name for _name, _entry in ONNX_MODELS.items() if _entry.get("scan", True)]
+
+SCAN_BATCHING_ENABLED = False  # Batch SCAN detection (the object tracker is bypassed)
+SCAN_BATCH_MAX_WAIT_MS = 250.0
+
+# onnxruntime session tuning (applies in-process and in the inference worker)
+ONNX_SESSION_OPTIONS = {
+    "graph_optimization_level": "all",  # "disable", "basic", "extended" or "all"
+    "intra_op_num_threads": 4,          # Threads inside one op (Pi 4B has 4 cores; 0 = ORT default)
+    "inter_op_num_threads": 1,          # Threads across ops (only used in "parallel" mode)
+    "execution_mode": "sequential",     # "sequential" or "parallel"
 }
+# Bind the persistent input tensor and output buffers with IOBinding so
+# session runs do not allocate or copy per frame
+ONNX_IO_BINDING = True
+
+# Out-of-process ONNX inference: frames go to a worker process through shared
+# memory so pre/post-processing does not compete with the server for the GIL
+ONNX_INFERENCE_WORKER = False
+ONNX_WORKER_SLOTS = 2                 # Shared-memory frame slots
+ONNX_WORKER_MAX_DETECTIONS = 300      # Rows in the shared result buffer
+ONNX_WORKER_STARTUP_TIMEOUT_S = 30.0  # Model load can be slow on a Pi
+ONNX_WORKER_TIMEOUT_S = 2.0           # Per-frame inference timeout
+ONNX_WORKER_MAX_RESTARTS = 3          # Crashes before falling back to in-process
+
+# Model registry (vision/model_registry.py): detectors load on first use or in
+# the background when switched/preloaded, and are closed again once idle so a
+# long FOLLOW stretch does not keep ONNX sessions resident
+MODEL_IDLE_EVICT_S = 120.0   # Close a model unused for this long (0 = never)
+MODEL_EVICT_CHECK_S = 5.0    # How often the registry thread looks for idle models
+MODEL_MAX_LOADED = 2         # Resident models; least recently used idle one goes first
+MODEL_WARMUP = True          # Run one dummy frame after loading (first run allocates)
+
+# SCAN mode tracking: the detector runs at most at the SCAN scheduler rate and
+# only when the tracker asks for it; every other frame moves the tracks with
+# optical flow, so boxes stay smooth and keep their IDs.
+SCAN_TRACKING_ENABLED = True
+TRACK_MAX_OBJECTS = 20               # Detections handed to the tracker per run
+TRACK_IOU_THRESHOLD = 0.3            # Min IoU to match a detection to a track (same label)
+TRACK_MAX_MISSES = 2                 # Detector runs a track may go unmatched before removal
+TRACK_REDETECT_INTERVAL_S = 1.0      # Longest a track may coast on optical flow
+TRACK_MIN_CONFIDENCE = 0.3           # Re-detect when the reported track decays below this
+TRACK_CONFIDENCE_HALF_LIFE_S = 2.0   # Confidence half-life while coasting
+TRACK_SWITCH_MARGIN = 0.1            # Confidence lead needed to switch the reported track
+TRACK_FLOW_POINTS = 12               # Corner features per track
+TRACK_FLOW_MIN_POINTS = 4            # Fewer surviving points = flow lost, re-detect
 
 # Grocery categories from YOLO COCO dataset
 GROCERY_CLASSES = {
@@ -124,6 +298,59 @@ FALL_CONSECUTIVE_FRAMES = 1.5
 FALL_DEBUG_DRAW = False
 FALL_DEBUG_LOG = False
 FALL_DEBUG_LOG_INTERVAL_S = 0.5
+# Fall detection cost control. Cadence comes from the scheduler
+# (SCHEDULER_DETECTOR_RATES_HZ["fall"]); each run searches a downscaled image,
+# only around the last person box, with a full-frame scan every
+# FALL_FULL_SCAN_INTERVAL_S or when the person is lost. Runs that would exceed
+# FALL_COST_BUDGET_MS_PER_S repeat the previous result instead.
+# Check sensitivity on recordings with evaluate_falls.py after changing these.
+FALL_PYRAMID_LEVEL = 1              # Search the frame downscaled by 2**level (0 = full resolution)
+FALL_HOG_SCALE = 1.05               # detectMultiScale pyramid step
+FALL_ROI_ENABLED = True
+FALL_ROI_MARGIN = 0.5               # ROI = last person box grown by this fraction per side
+FALL_FULL_SCAN_INTERVAL_S = 1.0     # Longest run of ROI-only searches
+FALL_COST_BUDGET_MS_PER_S = 80.0    # Person search time per second (0 = unlimited)
+# Person search backend (vision/person_detectors.py):
+#   "hog"  - OpenCV's default people detector; misses people lying down
+#   "mog2" - Largest blob from MOG2 background subtraction; finds people in any
+#            pose but only while the cart is stationary (reset on mode change)
+#   "onnx" - ONNX_MODELS[FALL_ONNX_MODEL] through ObjectDetector (falls back to
+#            HOG if the model file is missing)
+# Compare ms/frame and recall on recorded falls with
+# `python evaluate_falls.py --detectors hog mog2 onnx`.
+FALL_PERSON_DETECTOR = "hog"
+FALL_MOG2_HISTORY = 150             # Fall detection runs (30 s at 5 Hz)
+FALL_MOG2_VAR_THRESHOLD = 25.0
+FALL_MOG2_MIN_AREA_FRACTION = 0.01  # Smallest person blob, fraction of the image
+FALL_MOG2_WARMUP_FRAMES = 10        # Runs learned before blobs are reported
+FALL_ONNX_MODEL = "person_onnx"
+
+# Safety alerts (vision/safety_events.py): falls, emergency stops, lost targets
+# and obstacles are pushed to every app client as soon as they happen, as
+# "safety_event" messages, lowest priority number first. Events needing an ack
+# are re-sent until a client sends {"command": "ack_event", "seq": N}.
+SAFETY_EVENT_PRIORITY = {"emergency_stop": 0, "fall": 1, "obstacle": 2, "target_lost": 3}
+SAFETY_EVENT_REQUIRE_ACK = ("emergency_stop", "fall", "obstacle")
+SAFETY_EVENT_MIN_INTERVAL_S = 2.0   # Repeats of one event kind within this are dropped
+SAFETY_ACK_RESEND_S = 1.0           # Re-send unacknowledged events this often
+SAFETY_ACK_MAX_RESENDS = 10
+SAFETY_EVENT_HISTORY = 50           # Recent events kept for new clients and acks
+
+# Incident clips (vision/incident_recorder.py): the last INCIDENT_PRE_S seconds
+# of camera frames are kept in memory as JPEGs, encoded on a background thread
+# and capped at INCIDENT_BUFFER_MAX_MB. A safety event in
+# INCIDENT_TRIGGER_EVENTS saves them, plus INCIDENT_POST_S seconds after it,
+# as an MJPEG clip with a JSON sidecar in INCIDENT_DIR. The app lists them with
+# {"command": "get_incidents"} and fetches one with {"command": "get_incident"}.
+INCIDENT_RECORDING_ENABLED = True
+INCIDENT_TRIGGER_EVENTS = ("fall", "emergency_stop", "obstacle")
+INCIDENT_PRE_S = 10.0
+INCIDENT_POST_S = 5.0
+INCIDENT_FPS = 5.0                  # Frames kept per second (camera runs at CAMERA_FPS)
+INCIDENT_JPEG_QUALITY = 70
+INCIDENT_BUFFER_MAX_MB = 8.0        # Ring buffer cap; the oldest frames go first
+INCIDENT_DIR = "incidents"          # Relative to raspberry-pi/
+INCIDENT_MAX_STORED = 50            # Oldest clips are deleted beyond this
 
 # Distance Estimation (based on area)
 DISTANCE_CALIBRATION = {
@@ -143,3 +370,17 @@ def estimate_distance(area: float) -> float:
         return 2.0
     else:
         return 3.0
+
+
+def estimate_distances(areas: np.ndarray) -> np.ndarray:
+    """Vectorized estimate_distance for an array of areas"""
+    areas = np.asarray(areas)
+    return np.select(
+        [
+            areas >= DISTANCE_CALIBRATION["very_close"][0],
+            areas >= DISTANCE_CALIBRATION["close"][0],
+            areas >= DISTANCE_CALIBRATION["medium"][0],
+        ],
+        [0.5, 1.0, 2.0],
+        default=3.0,
+    )
@@ -0,0 +1,57 @@
+"""
+Config Writer - Rewrites the generated blocks in vision/config.py
+Tuning scripts (tune_aruco.py, quantize_models.py, benchmark_batching.py)
+record their results between "# --- <script>: begin/end ---" markers. Values
+are written with repr(), so any string (quotes, apostrophes, backslashes)
+reads back unchanged when config.py is imported.
+"""
+
+import re
+from pathlib import Path
+from typing import Any, Union
+
+CONFIG_PATH = Path(__file__).resolve().parent / "config.py"
+
+
+def format_value(value: Any, indent: int = 0) -> str:
+    """Python source for value: dicts one entry per line, everything else repr()"""
+    if isinstance(value, dict) and value:
+        pad = " " * (indent + 4)
+        items = "".join(f"{pad}{key!r}: {format_value(item, indent + 4)},\n" for key, item in value.items())
+        return "{\n" + items + " " * indent + "}"
+    return repr(value)
+
+
+def format_assignment(name: str, value: Any, comment: str = "") -> str:
+    """
+    "name = value" line(s) for config.py
+
+    Args:
+        name: Variable name
+        value: Value (nested dicts, lists, str, numbers, None)
+        comment: Trailing comment on the first line (single line)
+    """
+    source = format_value(value)
+    if comment:
+        first, newline, rest = source.partition("\n")
+        source = f"{first}  # {comment}{newline}{rest}"
+    return f"{name} = {source}\n"
+
+
+def write_block(script: str, body: str, path: Union[str, Path] = CONFIG_PATH) -> None:
+    """
+    Replace the generated block of script in config.py with body
+
+    Args:
+        script: Script file name in the markers, e.g. "tune_aruco.py"
+        body: New block contents (usually format_assignment() lines)
+        path: Config file to rewrite
+    """
+    path = Path(path)
+    marker = re.escape(script)
+    block_re = re.compile(rf"(# --- {marker}: begin.*?\n)(.*?)(# --- {marker}: end ---)", re.DOTALL)
+    text = path.read_text()
+    match = block_re.search(text)
+    if match is None:
+        raise RuntimeError(f"{script} block not found in {path}")
+    path.write_text(text[:match.start(2)] + body + text[match.end(2):])
@@ -1,21 +1,45 @@
 """
 Fall Detector - Heuristic fall detection using person bounding boxes.
+The person search (HOG, MOG2 blobs or an ONNX model, see person_detectors)
+is cost-bounded: it runs on a downscaled image, only around the last person
+box when the backend allows it (with periodic full-frame scans), and within
+a per-second time budget.
 """
 
-from dataclasses import dataclass
-from typing import Optional, Tuple
+from collections import Counter, deque
+from dataclasses import dataclass, replace
+from typing import Deque, Optional, Tuple, Union
 import time
 
-import cv2
+import numpy as np
 
+from .frame_context import FrameContext
+from .person_detectors import PersonDetector, create_person_detector
 from .config import (
     FALL_ASPECT_RATIO_THRESHOLD,
     FALL_VERTICAL_SPEED_THRESHOLD_PX,
     FALL_CONSECUTIVE_FRAMES,
     FALL_DEBUG_LOG,
     FALL_DEBUG_LOG_INTERVAL_S,
+    FALL_PYRAMID_LEVEL,
+    FALL_HOG_SCALE,
+    FALL_ROI_ENABLED,
+    FALL_ROI_MARGIN,
+    FALL_FULL_SCAN_INTERVAL_S,
+    FALL_COST_BUDGET_MS_PER_S,
+    FALL_PERSON_DETECTOR,
 )
 
+# Smallest ROI: HOG people detector window plus detectMultiScale padding on each side
+_HOG_MIN_SIZE = (64 + 16, 128 + 16)  # (w, h)
+# An ROI covering more of the image than this is searched as a full scan
+_ROI_MAX_FRACTION = 0.7
+
+# FallDetection.search values
+SEARCH_FULL = "full"
+SEARCH_ROI = "roi"
+SEARCH_BUDGET = "budget"  # Over budget: previous result repeated, nothing searched
+
 
 @dataclass
 class FallDetection:
@@ -26,42 +50,158 @@ class FallDetection:
     aspect_ratio: float = 0.0
     vertical_speed_px_s: float = 0.0
     reason: str = ""
+    search: str = ""       # SEARCH_FULL, SEARCH_ROI or SEARCH_BUDGET
+    cost_ms: float = 0.0   # Person search time spent on this result
 
 
 class FallDetector:
     """Detects falls using a lightweight person detector + heuristics."""
 
-    def __init__(self):
-        self.hog = cv2.HOGDescriptor()
-        self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+    def __init__(
+        self,
+        pyramid_level: int = FALL_PYRAMID_LEVEL,
+        hog_scale: float = FALL_HOG_SCALE,
+        roi_enabled: bool = FALL_ROI_ENABLED,
+        roi_margin: float = FALL_ROI_MARGIN,
+        full_scan_interval_s: float = FALL_FULL_SCAN_INTERVAL_S,
+        budget_ms_per_s: float = FALL_COST_BUDGET_MS_PER_S,
+        person_detector: Union[str, PersonDetector] = FALL_PERSON_DETECTOR,
+    ):
+        """
+        Args:
+            pyramid_level: Search the frame downscaled by 2**level (0 = full
+                           resolution; the backend may ignore it)
+            hog_scale: detectMultiScale pyramid step (HOG backend)
+            roi_enabled: Search around the last person box between full scans
+                         (backends with supports_roi only)
+            roi_margin: ROI growth per side, as a fraction of the box size
+            full_scan_interval_s: Longest run of ROI-only searches
+            budget_ms_per_s: Search time allowed per second (0 = unlimited)
+            person_detector: PERSON_DETECTORS name or a PersonDetector instance
+        """
+        if isinstance(person_detector, str):
+            person_detector = create_person_detector(person_detector, hog_scale)
+        self.person_detector = person_detector
+        self.pyramid_level = max(0, pyramid_level)
+        self.hog_scale = hog_scale
+        self.roi_enabled = roi_enabled
+        self.roi_margin = roi_margin
+        self.full_scan_interval_s = full_scan_interval_s
+        self.budget_ms_per_s = budget_ms_per_s
+
         self._prev_center_y: Optional[float] = None
         self._prev_time: Optional[float] = None
         self._fall_frames = 0
         self._last_log_time: float = 0.0
 
-    def _detect_person(self, frame) -> Optional[Tuple[int, int, int, int]]:
-        boxes, _ = self.hog.detectMultiScale(
-            frame,
-            winStride=(8, 8),
-            padding=(8, 8),
-            scale=1.05,
-        )
-        if boxes is None or len(boxes) == 0:
+        self._last_bbox: Optional[Tuple[int, int, int, int]] = None  # Full-resolution person box
+        self._last_full_scan: Optional[float] = None
+        self._last_detection: Optional[FallDetection] = None
+        self._costs: Deque[Tuple[float, float]] = deque()  # (timestamp, ms) within the last second
+
+        self.counts: Counter = Counter()        # Searches by type, ROI misses, budget skips
+        self.cost_totals: Counter = Counter()   # Search ms by search type
+
+    def reset(self) -> None:
+        """Forget the person box, motion history and budget window"""
+        self._prev_center_y = None
+        self._prev_time = None
+        self._fall_frames = 0
+        self._last_bbox = None
+        self._last_full_scan = None
+        self._last_detection = None
+        self._costs.clear()
+        self.person_detector.reset()
+
+    def close(self) -> None:
+        """Release the person detector's model"""
+        self.person_detector.close()
+
+    def _roi(self, shape: Tuple[int, ...], scale: int) -> Optional[Tuple[int, int, int, int]]:
+        """Search window around the last person box in image coordinates (None: use a full scan)"""
+        img_h, img_w = shape[:2]
+        x, y, w, h = (v / scale for v in self._last_bbox)
+        grow_w, grow_h = w * self.roi_margin, h * self.roi_margin
+        cx, cy = x + w / 2, y + h / 2
+        half_w = max(w / 2 + grow_w, _HOG_MIN_SIZE[0] / 2)
+        half_h = max(h / 2 + grow_h, _HOG_MIN_SIZE[1] / 2)
+
+        x0, y0 = max(int(cx - half_w), 0), max(int(cy - half_h), 0)
+        x1, y1 = min(int(cx + half_w), img_w), min(int(cy + half_h), img_h)
+        if x1 - x0 < _HOG_MIN_SIZE[0] or y1 - y0 < _HOG_MIN_SIZE[1]:
+            return None
+        if (x1 - x0) * (y1 - y0) > _ROI_MAX_FRACTION * img_w * img_h:
             return None
+        return x0, y0, x1 - x0, y1 - y0
 
-        # Pick the largest detected person
-        x, y, w, h = max(boxes, key=lambda b: b[2] * b[3])
-        return int(x), int(y), int(w), int(h)
+    def _detect_person(self, ctx: FrameContext, now: float) -> Tuple[Optional[Tuple[int, int, int, int]], str]:
+        """
+        Returns:
+            (full-resolution person box or None, search type used)
+        """
+        detector = self.person_detector
+        image, scale = detector.image_for(ctx, self.pyramid_level)
 
-    def update(self, frame) -> FallDetection:
-        bbox = self._detect_person(frame)
-        now = time.time()
+        roi = None
+        full_due = self._last_full_scan is None or now - self._last_full_scan >= self.full_scan_interval_s
+        if self.roi_enabled and detector.supports_roi and self._last_bbox is not None and not full_due:
+            roi = self._roi(image.shape, scale)
 
+        if roi is not None:
+            rx, ry, rw, rh = roi
+            box = detector.detect(image[ry:ry + rh, rx:rx + rw])
+            if box is not None:
+                self.counts[SEARCH_ROI] += 1
+                x, y, w, h = box
+                return ((x + rx) * scale, (y + ry) * scale, w * scale, h * scale), SEARCH_ROI
+            # Person left the window (or fell out of HOG's reach): look everywhere
+            self.counts["roi_miss"] += 1
+
+        self.counts[SEARCH_FULL] += 1
+        self._last_full_scan = now
+        box = detector.detect(image)
+        if box is None:
+            return None, SEARCH_FULL
+        return tuple(v * scale for v in box), SEARCH_FULL
+
+    def _spent_ms(self, now: float) -> float:
+        """Search time spent in the second before now"""
+        while self._costs and (now - self._costs[0][0] >= 1.0 or now < self._costs[0][0]):
+            self._costs.popleft()
+        return sum(ms for _, ms in self._costs)
+
+    def update(self, frame: Union[FrameContext, np.ndarray]) -> FallDetection:
+        """Run fall detection on a frame (once per FrameContext)."""
+        ctx = FrameContext.wrap(frame)
+        return ctx.memo("fall", lambda: self._update(ctx))
+
+    def _update(self, ctx: FrameContext) -> FallDetection:
+        # Capture time keeps vertical speed right when frames are replayed
+        now = ctx.timestamp if ctx.timestamp > 0 else time.monotonic()
+
+        if self.budget_ms_per_s > 0 and self._spent_ms(now) >= self.budget_ms_per_s:
+            self.counts[SEARCH_BUDGET] += 1
+            if self._last_detection is None:
+                return FallDetection(found=False, reason="no_person", search=SEARCH_BUDGET)
+            return replace(self._last_detection, search=SEARCH_BUDGET, cost_ms=0.0)
+
+        t_start = time.perf_counter()
+        bbox, search = self._detect_person(ctx, now)
+        cost_ms = (time.perf_counter() - t_start) * 1000
+        self._costs.append((now, cost_ms))
+        self.cost_totals[search] += cost_ms
+
+        self._last_detection = self._evaluate(bbox, now, search, cost_ms)
+        return self._last_detection
+
+    def _evaluate(self, bbox, now: float, search: str, cost_ms: float) -> FallDetection:
+        """Apply the fall heuristics to the person box found at time now"""
+        self._last_bbox = bbox
         if bbox is None:
             self._fall_frames = 0
             self._prev_center_y = None
             self._prev_time = None
-            return FallDetection(found=False, reason="no_person")
+            return FallDetection(found=False, reason="no_person", search=search, cost_ms=cost_ms)
 
         x, y, w, h = bbox
         aspect_ratio = w / h if h > 0 else 0.0
@@ -99,7 +239,8 @@ class FallDetector:
                     f"ar={aspect_ratio:.2f} "
                     f"vy={vertical_speed:.1f} "
                     f"frames={self._fall_frames} "
-                    f"fall={fall_detected}"
+                    f"fall={fall_detected} "
+                    f"search={search} {cost_ms:.1f}ms"
                 )
 
         return FallDetection(
@@ -109,4 +250,29 @@ class FallDetector:
             aspect_ratio=aspect_ratio,
             vertical_speed_px_s=vertical_speed,
             reason=reason,
+            search=search,
+            cost_ms=cost_ms,
+        )
+
+    def stats(self) -> dict:
+        """Searches by type, ROI misses, budget skips and mean search cost per type"""
+        return {
+            "detector": self.person_detector.name,
+            "counts": dict(self.counts),
+            "mean_cost_ms": {
+                search: self.cost_totals[search] / self.counts[search]
+                for search in (SEARCH_FULL, SEARCH_ROI) if self.counts[search]
+            },
+            "budget_ms_per_s": self.budget_ms_per_s,
+        }
+
+    def format_stats(self) -> str:
+        """One-line summary for the periodic log"""
+        s = self.stats()
+        counts, costs = s["counts"], s["mean_cost_ms"]
+        return (
+            f"{s['detector']}: full {counts.get(SEARCH_FULL, 0)} ({costs.get(SEARCH_FULL, 0.0):.1f}ms) | "
+            f"roi {counts.get(SEARCH_ROI, 0)} ({costs.get(SEARCH_ROI, 0.0):.1f}ms), "
+            f"{counts.get('roi_miss', 0)} misses | "
+            f"{counts.get(SEARCH_BUDGET, 0)} over budget ({self.budget_ms_per_s:.0f}ms/s)"
         )
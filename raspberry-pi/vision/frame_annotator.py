@@ -0,0 +1,84 @@
+"""
+Frame Annotator - Reusable output buffers and cached static overlays
+Annotated frames are drawn into a per-thread buffer that is reused from call
+to call instead of allocating a copy of every frame. Overlays that only change
+with the mode or calibration state (mode label, crosshair, calibration banner)
+are rendered once per state and stamped onto each frame with a single indexed
+write of the pixels they cover instead of being redrawn.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable
+
+import numpy as np
+
+
+@dataclass
+class OverlayLayer:
+    """Pre-rendered static overlay: the pixels it draws and their colors"""
+    index: np.ndarray   # (N,) flat pixel indices (row * width + col)
+    colors: np.ndarray  # (N, 3) drawn colors
+
+    @classmethod
+    def render(cls, shape: tuple, draw: Callable[[np.ndarray], None]) -> "OverlayLayer":
+        """
+        Run draw on two blank canvases and keep what it drew
+
+        Args:
+            shape: (h, w, 3) frame shape the layer is for
+            draw: Draws the layer onto the image it is given (cv2 calls)
+        """
+        # Untouched pixels differ between a black and a white canvas; drawn
+        # pixels have the same color on both, whatever color was used
+        black = np.zeros(shape, dtype=np.uint8)
+        white = np.full(shape, 255, dtype=np.uint8)
+        draw(black)
+        draw(white)
+        index = np.flatnonzero(np.all(black == white, axis=2))
+        return cls(index=index, colors=black.reshape(-1, shape[2])[index])
+
+    def apply(self, image: np.ndarray) -> None:
+        """Stamp the layer onto image (C-contiguous) in place"""
+        image.reshape(-1, image.shape[2])[self.index] = self.colors
+
+
+class FrameAnnotator:
+    """
+    Output buffers and overlay layer cache for CameraController annotation
+
+    Each thread gets its own output buffer, so a returned image stays valid
+    until the same thread asks for its next frame; copy it to keep it longer.
+    """
+
+    def __init__(self):
+        self._layers: Dict[Hashable, OverlayLayer] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def output(self, frame: np.ndarray) -> np.ndarray:
+        """Copy frame into this thread's reusable output buffer and return the buffer"""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or buffer.shape != frame.shape or buffer.dtype != frame.dtype:
+            buffer = np.empty(frame.shape, dtype=frame.dtype)  # C-contiguous for OverlayLayer
+            self._local.buffer = buffer
+        np.copyto(buffer, frame)
+        return buffer
+
+    def apply_layer(self, image: np.ndarray, key: Hashable, draw: Callable[[np.ndarray], None]) -> None:
+        """
+        Stamp the static layer identified by key onto image
+
+        Args:
+            image: Output buffer to draw on
+            key: Everything the layer's content depends on (state, not pixels);
+                 the layer is rendered with draw the first time a key is seen
+            draw: Draws the layer (only called on a cache miss)
+        """
+        key = (key, image.shape)
+        layer = self._layers.get(key)
+        if layer is None:
+            rendered = OverlayLayer.render(image.shape, draw)
+            with self._lock:
+                layer = self._layers.setdefault(key, rendered)
+        layer.apply(image)
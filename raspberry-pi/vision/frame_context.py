@@ -0,0 +1,164 @@
+"""
+Frame Context - Per-frame cache of derived images and detector results
+Gray, HSV, pyramid levels, letterboxed images and detector outputs are
+computed on first use and memoized, so no conversion or detection runs twice
+for the same frame no matter how many detectors (or readers) ask for it.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .frame_pool import FrameRef
+
+
+class FrameContext:
+    """
+    Lazily computed views of one frame
+
+    Safe to share between the processing thread and stage executor threads:
+    each key is computed by exactly one caller while others wait for it.
+    The context does not own the pixels; keep the frame (or its FrameRef)
+    alive while the context is in use.
+    """
+
+    def __init__(self, frame: np.ndarray, seq: int = -1, timestamp: float = 0.0):
+        """
+        Args:
+            frame: BGR (or already grayscale) image
+            seq: Capture sequence number of the frame (-1 if unknown)
+            timestamp: Monotonic capture time of the frame
+        """
+        self.frame = frame
+        self.seq = seq
+        self.timestamp = timestamp
+        self._cache: Dict[Hashable, Any] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def wrap(cls, frame: Union["FrameContext", np.ndarray]) -> "FrameContext":
+        """Return frame itself if it is already a context, else a new one for it"""
+        if isinstance(frame, FrameContext):
+            return frame
+        return cls(frame)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.frame.shape
+
+    def memo(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing it once on first use"""
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self._cache:
+                self._cache[key] = compute()
+        return self._cache[key]
+
+    def has(self, key: Hashable) -> bool:
+        """Whether key has already been computed for this frame"""
+        return key in self._cache
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Cached value for key without computing it"""
+        return self._cache.get(key, default)
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Grayscale image"""
+        if self.frame.ndim == 2:
+            return self.frame
+        return self.memo("gray", lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def hsv(self) -> np.ndarray:
+        """HSV image"""
+        return self.memo("hsv", lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV))
+
+    def pyramid(self, level: int) -> np.ndarray:
+        """
+        Grayscale image downscaled by 2**level (level 0 = full resolution)
+
+        Levels are built from each other with pyrDown, so asking for level 2
+        also caches level 1.
+        """
+        if level <= 0:
+            return self.gray
+        return self.memo(("pyramid", level), lambda: cv2.pyrDown(self.pyramid(level - 1)))
+
+    def letterbox(self, new_shape: Tuple[int, int], color=(114, 114, 114)) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+        """
+        Resize with unchanged aspect ratio and pad to new_shape (h, w)
+
+        Returns:
+            (image, scale ratio, (pad_w, pad_h))
+        """
+        return self.memo(("letterbox", tuple(new_shape)), lambda: letterbox(self.frame, new_shape, color))
+
+
+def letterbox_params(shape: Tuple[int, int], new_shape: Tuple[int, int]) -> Tuple[float, Tuple[int, int], Tuple[float, float], Tuple[int, int]]:
+    """
+    Geometry of a letterbox resize from shape (h, w) to new_shape (h, w)
+
+    Returns:
+        (scale ratio, resized (w, h), (pad_w, pad_h), (top, left) offset of the resized image)
+    """
+    r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
+    new_unpad = (int(round(shape[1] * r)), int(round(shape[0] * r)))
+    dw = (new_shape[1] - new_unpad[0]) / 2
+    dh = (new_shape[0] - new_unpad[1]) / 2
+    return r, new_unpad, (dw, dh), (int(round(dh - 0.1)), int(round(dw - 0.1)))
+
+
+def letterbox(img: np.ndarray, new_shape: Tuple[int, int], color=(114, 114, 114)) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """Resize with unchanged aspect ratio and pad to new_shape (h, w)"""
+    shape = img.shape[:2]  # (h, w)
+    r, new_unpad, (dw, dh), (top, left) = letterbox_params(shape, new_shape)
+
+    if shape[::-1] != new_unpad:
+        img = cv2.resize(img, new_unpad, interpolation=cv2.INTER_LINEAR)
+
+    bottom = new_shape[0] - new_unpad[1] - top
+    right = new_shape[1] - new_unpad[0] - left
+    img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+
+    return img, r, (dw, dh)
+
+
+class FrameContextCache:
+    """
+    Small seq-keyed cache so every consumer of a pooled frame shares one context
+
+    Look contexts up only while holding a FrameRef for the frame: the ref keeps
+    the pool slot (and so the pixels the context points at) from being reused.
+    """
+
+    def __init__(self, capacity: int = 8):
+        self.capacity = capacity
+        self._contexts: "OrderedDict[int, FrameContext]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, frame_ref: FrameRef) -> FrameContext:
+        """Context for the frame behind frame_ref (created on first request)"""
+        seq = frame_ref.seq
+        with self._lock:
+            ctx = self._contexts.get(seq)
+            if ctx is None:
+                ctx = FrameContext(frame_ref.array, seq, frame_ref.timestamp)
+                self._contexts[seq] = ctx
+                while len(self._contexts) > self.capacity:
+                    self._contexts.popitem(last=False)
+            return ctx
+
+    def clear(self) -> None:
+        with self._lock:
+            self._contexts.clear()
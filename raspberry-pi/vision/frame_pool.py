@@ -0,0 +1,197 @@
+"""
+Frame Pool - Preallocated, reference-counted frame buffers for camera capture
+The capture thread fills slots in place with cap.read(image=...), consumers get
+read-only views and release them when done so the slot can be reused.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class FrameSlot:
+    """One preallocated frame buffer plus its ownership state"""
+
+    __slots__ = ("index", "buffer", "view", "refcount", "seq", "timestamp")
+
+    def __init__(self, index: int, shape: Tuple[int, ...], dtype):
+        self.index = index
+        self.buffer = np.empty(shape, dtype=dtype)
+        # Read-only view handed to consumers (created once, not per frame)
+        self.view = self.buffer.view()
+        self.view.flags.writeable = False
+        self.refcount = 0
+        self.seq = -1
+        self.timestamp = 0.0  # time.monotonic() at capture
+
+
+class FrameRef:
+    """
+    Handle to a published frame slot
+
+    Each handle owns one reference. Call release() (or use it as a context
+    manager) when done; call retain() to hand an extra reference to another
+    consumer.
+    """
+
+    __slots__ = ("_pool", "_slot")
+
+    def __init__(self, pool: "FramePool", slot: FrameSlot):
+        self._pool = pool
+        self._slot = slot
+
+    @property
+    def array(self) -> np.ndarray:
+        """Read-only view of the frame pixels"""
+        if self._slot is None:
+            raise RuntimeError("FrameRef used after release()")
+        return self._slot.view
+
+    @property
+    def seq(self) -> int:
+        """Capture sequence number of this frame"""
+        return self._slot.seq if self._slot is not None else -1
+
+    @property
+    def timestamp(self) -> float:
+        """Monotonic capture time of this frame (seconds)"""
+        return self._slot.timestamp if self._slot is not None else 0.0
+
+    def retain(self) -> "FrameRef":
+        """Take an additional reference for another consumer"""
+        if self._slot is None:
+            raise RuntimeError("FrameRef used after release()")
+        self._pool._retain(self._slot)
+        return FrameRef(self._pool, self._slot)
+
+    def release(self) -> None:
+        """Drop this reference (idempotent)"""
+        slot = self._slot
+        if slot is not None:
+            self._slot = None
+            self._pool._release(slot)
+
+    def __enter__(self) -> np.ndarray:
+        return self.array
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class FramePool:
+    """
+    Fixed ring of reusable frame buffers for a single producer
+
+    The producer calls acquire() to get a free writable buffer, fills it in
+    place, then publish() to turn it into a FrameRef. A slot goes back to the
+    free ring once every FrameRef pointing at it has been released, so steady
+    state capture allocates no pixel memory.
+    """
+
+    def __init__(self, capacity: int = 6, shape: Optional[Tuple[int, ...]] = None, dtype=np.uint8):
+        """
+        Initialize frame pool
+
+        Args:
+            capacity: Number of frame buffers to preallocate
+            shape: Frame shape (h, w, c); if None, allocate on first configure()
+            dtype: Pixel dtype
+        """
+        if capacity < 2:
+            raise ValueError("FramePool needs at least 2 slots")
+
+        self.capacity = capacity
+        self.dtype = dtype
+        self.shape: Optional[Tuple[int, ...]] = None
+        self._slots = []
+        self._free = deque()
+        self._pending: Optional[FrameSlot] = None  # acquired but not yet published
+        self._lock = threading.Lock()
+        self._seq = 0
+
+        # Stats
+        self.exhausted_count = 0
+        self.reallocations = 0
+
+        if shape is not None:
+            self.configure(shape)
+
+    def configure(self, shape: Tuple[int, ...]) -> None:
+        """
+        (Re)allocate all slots for the given frame shape
+
+        Slots still held by consumers keep their old buffers alive until they
+        are released; they are not returned to the new ring.
+        """
+        shape = tuple(shape)
+        if shape == self.shape:
+            return
+
+        with self._lock:
+            self.shape = shape
+            self._slots = [FrameSlot(i, shape, self.dtype) for i in range(self.capacity)]
+            self._free = deque(self._slots)
+            self._pending = None
+            self.reallocations += 1
+
+    def acquire(self) -> Optional[np.ndarray]:
+        """
+        Get a free writable buffer for the producer to fill
+
+        Returns:
+            Writable ndarray, or None if every slot is still held by consumers
+        """
+        if self._pending is not None:
+            # Previous acquire was never published (e.g. failed read) - reuse it
+            return self._pending.buffer
+
+        try:
+            slot = self._free.popleft()
+        except IndexError:
+            self.exhausted_count += 1
+            return None
+
+        self._pending = slot
+        return slot.buffer
+
+    def publish(self, timestamp: Optional[float] = None) -> FrameRef:
+        """
+        Publish the buffer returned by the last acquire() as a new frame
+
+        Args:
+            timestamp: Monotonic capture time (defaults to now)
+        """
+        slot = self._pending
+        if slot is None:
+            raise RuntimeError("publish() called without acquire()")
+
+        self._pending = None
+        slot.seq = self._seq
+        slot.timestamp = time.monotonic() if timestamp is None else timestamp
+        self._seq += 1
+        with self._lock:
+            slot.refcount = 1
+        return FrameRef(self, slot)
+
+    def _retain(self, slot: FrameSlot) -> None:
+        with self._lock:
+            slot.refcount += 1
+
+    def _release(self, slot: FrameSlot) -> None:
+        with self._lock:
+            slot.refcount -= 1
+            if slot.refcount > 0:
+                return
+            slot.refcount = 0
+            # Slots from a previous configure() are simply dropped
+            if slot.index < len(self._slots) and self._slots[slot.index] is slot:
+                self._free.append(slot)
+
+    @property
+    def free_slots(self) -> int:
+        """Number of slots currently available to the producer"""
+        return len(self._free)
@@ -0,0 +1,327 @@
+"""
+Frame Sources - Pluggable frame input for the vision pipeline
+Live camera, recorded video file, image directory or in-memory frames, so the
+pipeline can be benchmarked and regression-tested without camera hardware.
+"""
+
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .config import CAMERA_WIDTH, CAMERA_HEIGHT, CAMERA_FPS
+
+# Replay pacing modes
+PACING_REALTIME = "realtime"  # Honour recorded timestamps
+PACING_FAST = "fast"          # Deliver frames as fast as they are read
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FrameSource:
+    """
+    Base class for frame inputs
+
+    Mirrors the subset of cv2.VideoCapture used by CameraController
+    (read/grab/get/release) so sources are interchangeable. Subclasses
+    implement _next_frame(); pacing and looping are handled here.
+    """
+
+    def __init__(self, pacing: str = PACING_FAST, loop: bool = False):
+        if pacing not in (PACING_REALTIME, PACING_FAST):
+            raise ValueError(f"Unknown pacing mode: {pacing}")
+
+        self.pacing = pacing
+        self.loop = loop
+        self.exhausted = False
+        self.last_timestamp: Optional[float] = None  # seconds, source clock
+        self.frames_read = 0
+
+        # Real-time pacing anchor: (wall clock, source timestamp) of first frame
+        self._pace_anchor: Optional[Tuple[float, float]] = None
+
+    # -- Subclass interface -------------------------------------------------
+
+    def _next_frame(self, image: Optional[np.ndarray]) -> Tuple[bool, Optional[np.ndarray], Optional[float]]:
+        """Return (ok, frame, timestamp_s) for the next frame"""
+        raise NotImplementedError
+
+    def _rewind(self) -> bool:
+        """Restart from the first frame; return False if not supported"""
+        return False
+
+    def is_opened(self) -> bool:
+        return True
+
+    def release(self) -> None:
+        pass
+
+    # -- Public API ---------------------------------------------------------
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Read the next frame, filling image in place when its shape matches
+
+        Returns:
+            (ret, frame) like cv2.VideoCapture.read
+        """
+        if self.exhausted:
+            return False, None
+
+        ok, frame, timestamp = self._next_frame(image)
+        if not ok and self.loop and self._rewind():
+            self._pace_anchor = None
+            ok, frame, timestamp = self._next_frame(image)
+
+        if not ok:
+            self.exhausted = self.is_finite()
+            return False, None
+
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self._pace(timestamp)
+        self.last_timestamp = timestamp
+        self.frames_read += 1
+        return True, frame
+
+    def grab(self) -> bool:
+        """Advance one frame without returning it"""
+        ret, _ = self.read()
+        return ret
+
+    def is_finite(self) -> bool:
+        """True for recorded sources that can run out of frames"""
+        return True
+
+    def get(self, prop_id: int) -> float:
+        """Minimal cv2.CAP_PROP_* lookup for recorded sources"""
+        if prop_id == cv2.CAP_PROP_FPS:
+            return float(getattr(self, "fps", 0.0))
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self))
+        return 0.0
+
+    def __len__(self) -> int:
+        return 0
+
+    def _pace(self, timestamp: float) -> None:
+        """Sleep so frames are delivered at their recorded spacing"""
+        if self.pacing != PACING_REALTIME:
+            return
+
+        now = time.monotonic()
+        if self._pace_anchor is None:
+            self._pace_anchor = (now, timestamp)
+            return
+
+        wall_start, ts_start = self._pace_anchor
+        delay = (wall_start + (timestamp - ts_start)) - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class LiveCameraSource(FrameSource):
+    """Live camera via cv2.VideoCapture (original CameraController behaviour)"""
+
+    def __init__(
+        self,
+        camera_id: int = 0,
+        width: int = CAMERA_WIDTH,
+        height: int = CAMERA_HEIGHT,
+        fps: int = CAMERA_FPS,
+    ):
+        # Live frames arrive at camera rate already; never pace or loop
+        super().__init__(pacing=PACING_FAST, loop=False)
+        self.camera_id = camera_id
+        self.cap = cv2.VideoCapture(camera_id)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.cap.set(cv2.CAP_PROP_FPS, fps)
+
+        # Enable camera optimizations for Raspberry Pi
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer to minimize lag
+
+    def _next_frame(self, image):
+        if image is not None:
+            ret, frame = self.cap.read(image=image)
+        else:
+            ret, frame = self.cap.read()
+        return ret, frame, time.monotonic()
+
+    def grab(self) -> bool:
+        return self.cap.grab()
+
+    def is_finite(self) -> bool:
+        return False
+
+    def is_opened(self) -> bool:
+        return self.cap.isOpened()
+
+    def get(self, prop_id: int) -> float:
+        return self.cap.get(prop_id)
+
+    def release(self) -> None:
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    """Recorded clip (any container OpenCV can decode)"""
+
+    def __init__(self, path: Union[str, Path], pacing: str = PACING_REALTIME, loop: bool = False):
+        super().__init__(pacing=pacing, loop=loop)
+        self.path = Path(path)
+        self.cap = cv2.VideoCapture(str(self.path))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or float(CAMERA_FPS)
+        self._index = 0
+
+    def _next_frame(self, image):
+        if image is not None:
+            ret, frame = self.cap.read(image=image)
+        else:
+            ret, frame = self.cap.read()
+        if not ret:
+            return False, None, None
+
+        # Container timestamps when present, otherwise derive from FPS
+        pos_ms = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+        timestamp = pos_ms / 1000.0 if pos_ms > 0 else self._index / self.fps
+        self._index += 1
+        return True, frame, timestamp
+
+    def _rewind(self) -> bool:
+        self._index = 0
+        return self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def is_opened(self) -> bool:
+        return self.cap.isOpened()
+
+    def get(self, prop_id: int) -> float:
+        return self.cap.get(prop_id)
+
+    def __len__(self) -> int:
+        return int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def release(self) -> None:
+        self.cap.release()
+
+
+class ArrayFrameSource(FrameSource):
+    """In-memory frames (list or N x H x W x C array)"""
+
+    def __init__(
+        self,
+        frames: Union[Sequence[np.ndarray], np.ndarray],
+        timestamps: Optional[Sequence[float]] = None,
+        fps: float = CAMERA_FPS,
+        pacing: str = PACING_FAST,
+        loop: bool = False,
+    ):
+        super().__init__(pacing=pacing, loop=loop)
+        self.frames = frames
+        self.fps = float(fps)
+        if timestamps is not None and len(timestamps) != len(frames):
+            raise ValueError("timestamps must match the number of frames")
+        self.timestamps = timestamps
+        self._index = 0
+
+    def _load(self, index: int) -> Optional[np.ndarray]:
+        return self.frames[index]
+
+    def _next_frame(self, image):
+        if self._index >= len(self.frames):
+            return False, None, None
+
+        index = self._index
+        self._index += 1
+        frame = self._load(index)
+        if frame is None:
+            return False, None, None
+
+        timestamp = self.timestamps[index] if self.timestamps is not None else index / self.fps
+
+        # Fill the caller's buffer in place when possible, like VideoCapture
+        if image is not None and image.shape == frame.shape and image.dtype == frame.dtype:
+            np.copyto(image, frame)
+            return True, image, timestamp
+        return True, np.array(frame, copy=True), timestamp
+
+    def _rewind(self) -> bool:
+        self._index = 0
+        return len(self.frames) > 0
+
+    def get(self, prop_id: int) -> float:
+        if len(self.frames) and prop_id in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            h, w = self._load(0).shape[:2]
+            return float(w if prop_id == cv2.CAP_PROP_FRAME_WIDTH else h)
+        return super().get(prop_id)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+
+class ImageDirectorySource(ArrayFrameSource):
+    """
+    Directory of still images, replayed in filename order
+
+    If the directory contains timestamps.txt (one value in seconds per image,
+    same order), those are used for real-time pacing; otherwise fps is used.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        fps: float = CAMERA_FPS,
+        pacing: str = PACING_REALTIME,
+        loop: bool = False,
+    ):
+        self.directory = Path(directory)
+        paths: List[Path] = sorted(
+            p for p in self.directory.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS
+        )
+
+        timestamps = None
+        ts_file = self.directory / "timestamps.txt"
+        if ts_file.exists():
+            timestamps = [float(line) for line in ts_file.read_text().split() if line.strip()]
+
+        super().__init__(paths, timestamps=timestamps, fps=fps, pacing=pacing, loop=loop)
+
+    def _load(self, index: int) -> Optional[np.ndarray]:
+        return cv2.imread(str(self.frames[index]), cv2.IMREAD_COLOR)
+
+    def is_opened(self) -> bool:
+        return len(self.frames) > 0
+
+
+def open_frame_source(
+    source: Union[int, str, Path, np.ndarray, Sequence[np.ndarray], FrameSource] = 0,
+    pacing: str = PACING_REALTIME,
+    loop: bool = False,
+) -> FrameSource:
+    """
+    Build a FrameSource from a camera index, file/directory path or frames
+
+    Args:
+        source: Camera index (or numeric string), video file, image directory,
+                frame array/list, or an existing FrameSource
+        pacing: PACING_REALTIME or PACING_FAST for recorded sources
+        loop: Restart recorded sources when they run out
+
+    Returns:
+        FrameSource instance
+    """
+    if isinstance(source, FrameSource):
+        return source
+
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return LiveCameraSource(int(source))
+
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        if path.is_dir():
+            return ImageDirectorySource(path, pacing=pacing, loop=loop)
+        return VideoFileSource(path, pacing=pacing, loop=loop)
+
+    return ArrayFrameSource(source, pacing=pacing, loop=loop)
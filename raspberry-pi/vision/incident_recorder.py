@@ -0,0 +1,353 @@
+"""
+Incident Recorder - Pre-trigger JPEG ring buffer and incident clips
+The capture thread hands frames over by reference (no copy); a background
+encoder keeps the last few seconds as JPEGs under a memory cap. When a
+safety event triggers an incident, the buffered frames plus the frames that
+follow are written by a background writer as an MJPEG clip (readable with
+cv2.VideoCapture / open_frame_source) and a JSON sidecar.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from queue import Queue
+from typing import Deque, List, Optional, Tuple
+
+import cv2
+
+from .frame_pool import FrameRef
+from .config import (
+    INCIDENT_PRE_S,
+    INCIDENT_POST_S,
+    INCIDENT_FPS,
+    INCIDENT_JPEG_QUALITY,
+    INCIDENT_BUFFER_MAX_MB,
+    INCIDENT_DIR,
+    INCIDENT_MAX_STORED,
+)
+
+logger = logging.getLogger(__name__)
+
+_BASE_DIR = Path(__file__).resolve().parents[1]
+_ID_RE = re.compile(r"^[\w-]+$")
+_CLIP_SUFFIX = ".mjpeg"
+_META_SUFFIX = ".json"
+
+
+@dataclass
+class EncodedFrame:
+    """One buffered frame"""
+    seq: int
+    timestamp: float   # time.monotonic() at capture
+    jpeg: bytes
+
+
+@dataclass
+class Incident:
+    """Frames around one or more safety events, until it is written"""
+    incident_id: str
+    kind: str                  # Event kind that opened the incident
+    trigger_ts: float          # time.monotonic() of the first trigger
+    end_ts: float              # Post-trigger frames are collected until here
+    wall_time: str
+    events: List[dict] = field(default_factory=list)
+    frames: List[EncodedFrame] = field(default_factory=list)
+
+
+class IncidentRecorder:
+    """Memory-capped pre-trigger buffer with background encoding and writing"""
+
+    def __init__(
+        self,
+        pre_s: float = INCIDENT_PRE_S,
+        post_s: float = INCIDENT_POST_S,
+        fps: float = INCIDENT_FPS,
+        jpeg_quality: int = INCIDENT_JPEG_QUALITY,
+        max_buffer_mb: float = INCIDENT_BUFFER_MAX_MB,
+        directory: str = INCIDENT_DIR,
+        max_stored: int = INCIDENT_MAX_STORED,
+    ):
+        """
+        Args:
+            pre_s: Seconds kept before a trigger
+            post_s: Seconds recorded after the (last) trigger
+            fps: Frames buffered per second; extra camera frames are skipped
+            jpeg_quality: cv2.IMWRITE_JPEG_QUALITY for buffered frames
+            max_buffer_mb: Ring buffer cap (oldest frames are evicted first)
+            directory: Where clips go (relative to raspberry-pi/ unless absolute)
+            max_stored: Clips kept on disk; the oldest are deleted beyond this
+        """
+        self.pre_s = pre_s
+        self.post_s = post_s
+        self.interval_s = 1.0 / fps if fps > 0 else 0.0
+        self.fps = fps
+        self.max_bytes = int(max_buffer_mb * 1024 * 1024)
+        self.directory = Path(directory) if os.path.isabs(directory) else _BASE_DIR / directory
+        self.max_stored = max_stored
+        self._encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality)]
+
+        self._cond = threading.Condition()
+        self._pending: Optional[FrameRef] = None     # Latest frame waiting for the encoder
+        self._last_accepted = 0.0
+        self._buffer: Deque[EncodedFrame] = deque()
+        self._buffer_bytes = 0
+        self._active: Optional[Incident] = None
+        self._write_queue: Queue = Queue()
+        self._running = True
+
+        # Stats
+        self.encoded = 0
+        self.skipped = 0           # Encoder busy: frame replaced by a newer one
+        self.evicted_for_memory = 0
+        self.written = 0
+        self._encode_ms_total = 0.0
+
+        self._encoder = threading.Thread(target=self._encode_loop, daemon=True, name="incident-encoder")
+        self._writer = threading.Thread(target=self._write_loop, daemon=True, name="incident-writer")
+        self._encoder.start()
+        self._writer.start()
+
+    def add_frame(self, frame_ref: FrameRef) -> None:
+        """
+        Offer a captured frame (capture thread; never blocks or copies)
+
+        Frames closer than 1/fps to the last accepted one are ignored. If
+        the encoder has not picked up the previous frame yet, it is replaced.
+        """
+        if not self._running or frame_ref.timestamp - self._last_accepted < self.interval_s:
+            return
+        self._last_accepted = frame_ref.timestamp
+        ref = frame_ref.retain()
+        with self._cond:
+            dropped, self._pending = self._pending, ref
+            self._cond.notify()
+        if dropped is not None:
+            dropped.release()
+            self.skipped += 1
+
+    def trigger(self, kind: str, event_seq: int = -1, trigger_ts: float = 0.0) -> str:
+        """
+        Start an incident (or extend the one still recording)
+
+        Args:
+            kind: Safety event kind
+            event_seq: Safety event sequence number, stored in the sidecar
+            trigger_ts: time.monotonic() of the cause (0 = now)
+
+        Returns:
+            Incident ID (clip file name without extension)
+        """
+        trigger_ts = trigger_ts or time.monotonic()
+        event = {"kind": kind, "seq": event_seq, "offset_s": 0.0}
+        with self._cond:
+            incident = self._active
+            if incident is not None and trigger_ts <= incident.end_ts:
+                event["offset_s"] = round(trigger_ts - incident.trigger_ts, 3)
+                incident.events.append(event)
+                incident.end_ts = max(incident.end_ts, trigger_ts + self.post_s)
+                return incident.incident_id
+
+            now = datetime.now()
+            incident = Incident(
+                incident_id=f"{now:%Y%m%d-%H%M%S}-{now.microsecond // 1000:03d}_{kind}",
+                kind=kind,
+                trigger_ts=trigger_ts,
+                end_ts=trigger_ts + self.post_s,
+                wall_time=now.isoformat(),
+                events=[event],
+                frames=[f for f in self._buffer if f.timestamp >= trigger_ts - self.pre_s],
+            )
+            self._active = incident
+            self._cond.notify()
+        logger.info(f"Incident {incident.incident_id} started ({len(incident.frames)} frames before the trigger)")
+        return incident.incident_id
+
+    def _encode_loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or not self._running, timeout=0.5)
+                if not self._running:
+                    return
+                frame_ref, self._pending = self._pending, None
+
+            if frame_ref is not None:
+                try:
+                    t_start = time.perf_counter()
+                    ok, buf = cv2.imencode(".jpg", frame_ref.array, self._encode_params)
+                    encode_ms = (time.perf_counter() - t_start) * 1000
+                    frame = EncodedFrame(frame_ref.seq, frame_ref.timestamp, buf.tobytes()) if ok else None
+                finally:
+                    frame_ref.release()
+                if frame is not None:
+                    self._add_encoded(frame, encode_ms)
+
+            # Also completes incidents when frames stop coming (camera stopped)
+            self._finish_incident(time.monotonic() - 1.0)
+
+    def _add_encoded(self, frame: EncodedFrame, encode_ms: float) -> None:
+        with self._cond:
+            self.encoded += 1
+            self._encode_ms_total += encode_ms
+            self._buffer.append(frame)
+            self._buffer_bytes += len(frame.jpeg)
+            while self._buffer and self._buffer[0].timestamp < frame.timestamp - self.pre_s:
+                self._buffer_bytes -= len(self._buffer.popleft().jpeg)
+            while len(self._buffer) > 1 and self._buffer_bytes > self.max_bytes:
+                self._buffer_bytes -= len(self._buffer.popleft().jpeg)
+                self.evicted_for_memory += 1
+
+            incident = self._active
+            if incident is not None and frame.timestamp <= incident.end_ts:
+                incident.frames.append(frame)
+        self._finish_incident(frame.timestamp)
+
+    def _finish_incident(self, now: float) -> None:
+        """Queue the active incident for writing once its post-trigger window has passed"""
+        with self._cond:
+            incident = self._active
+            if incident is None or now <= incident.end_ts:
+                return
+            self._active = None
+        self._write_queue.put(incident)
+
+    def _write_loop(self) -> None:
+        while True:
+            incident = self._write_queue.get()
+            if incident is None:
+                return
+            try:
+                self._write(incident)
+            except Exception as e:
+                logger.error(f"Writing incident {incident.incident_id} failed: {e}")
+
+    def _write(self, incident: Incident) -> None:
+        """Clip = concatenated JPEGs (MJPEG); sidecar = metadata and per-frame byte sizes"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        clip_path = self.directory / (incident.incident_id + _CLIP_SUFFIX)
+        meta_path = self.directory / (incident.incident_id + _META_SUFFIX)
+
+        frames = incident.frames
+        tmp_clip = clip_path.with_suffix(".tmp")
+        with open(tmp_clip, "wb") as f:
+            for frame in frames:
+                f.write(frame.jpeg)
+        os.replace(tmp_clip, clip_path)
+
+        meta = {
+            "id": incident.incident_id,
+            "kind": incident.kind,
+            "time": incident.wall_time,
+            "events": incident.events,
+            "fps": self.fps,
+            "pre_s": self.pre_s,
+            "post_s": self.post_s,
+            "frame_count": len(frames),
+            "duration_s": round(frames[-1].timestamp - frames[0].timestamp, 3) if frames else 0.0,
+            "bytes": sum(len(f.jpeg) for f in frames),
+            "clip": clip_path.name,
+            "frames": [
+                {"seq": f.seq, "offset_s": round(f.timestamp - incident.trigger_ts, 3), "size": len(f.jpeg)}
+                for f in frames
+            ],
+        }
+        tmp_meta = meta_path.with_suffix(".tmp")
+        tmp_meta.write_text(json.dumps(meta))
+        os.replace(tmp_meta, meta_path)
+        self.written += 1
+        logger.info(f"✓ Incident saved: {clip_path} ({len(frames)} frames, {meta['bytes'] / 1024:.0f} KB)")
+        self._prune()
+
+    def _prune(self) -> None:
+        """Delete the oldest clips beyond max_stored"""
+        metas = sorted(self.directory.glob("*" + _META_SUFFIX))
+        for meta_path in metas[:max(len(metas) - self.max_stored, 0)]:
+            meta_path.with_suffix(_CLIP_SUFFIX).unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+
+    def list_incidents(self) -> List[dict]:
+        """Saved incidents, newest first (sidecar metadata without the frame table)"""
+        if not self.directory.exists():
+            return []
+        incidents = []
+        for meta_path in sorted(self.directory.glob("*" + _META_SUFFIX), reverse=True):
+            try:
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                continue
+            meta.pop("frames", None)
+            incidents.append(meta)
+        return incidents
+
+    def load_incident(self, incident_id: str) -> Optional[Tuple[dict, List[bytes]]]:
+        """
+        Read a saved incident
+
+        Returns:
+            (metadata, JPEG bytes per frame), or None if there is no such incident
+        """
+        if not _ID_RE.match(incident_id or ""):
+            return None
+        meta_path = self.directory / (incident_id + _META_SUFFIX)
+        clip_path = self.directory / (incident_id + _CLIP_SUFFIX)
+        if not meta_path.exists() or not clip_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        data = clip_path.read_bytes()
+        jpegs, offset = [], 0
+        for frame in meta["frames"]:
+            jpegs.append(data[offset:offset + frame["size"]])
+            offset += frame["size"]
+        return meta, jpegs
+
+    def stats(self) -> dict:
+        """Buffer fill, encode cost and incident counts"""
+        with self._cond:
+            frames = len(self._buffer)
+            span = self._buffer[-1].timestamp - self._buffer[0].timestamp if frames > 1 else 0.0
+            return {
+                "buffer_frames": frames,
+                "buffer_bytes": self._buffer_bytes,
+                "buffer_max_bytes": self.max_bytes,
+                "buffer_seconds": span,
+                "encoded": self.encoded,
+                "skipped": self.skipped,
+                "evicted_for_memory": self.evicted_for_memory,
+                "mean_encode_ms": self._encode_ms_total / self.encoded if self.encoded else 0.0,
+                "recording": self._active.incident_id if self._active is not None else None,
+                "written": self.written,
+            }
+
+    def format_stats(self) -> str:
+        """One-line summary for the periodic log"""
+        s = self.stats()
+        return (
+            f"{s['buffer_frames']} frames / {s['buffer_seconds']:.1f}s buffered "
+            f"({s['buffer_bytes'] / 1024:.0f}/{s['buffer_max_bytes'] / 1024:.0f} KB) | "
+            f"encode {s['mean_encode_ms']:.1f}ms | {s['skipped']} skipped, "
+            f"{s['evicted_for_memory']} evicted for memory | {s['written']} incidents saved"
+            + (f" | recording {s['recording']}" if s["recording"] else "")
+        )
+
+    def close(self) -> None:
+        """Stop encoding, write any incident still recording and stop the writer"""
+        with self._cond:
+            self._running = False
+            pending, self._pending = self._pending, None
+            incident, self._active = self._active, None
+            self._cond.notify_all()
+        if pending is not None:
+            pending.release()
+        if self._encoder.is_alive():
+            self._encoder.join(timeout=2.0)
+        if incident is not None:
+            self._write_queue.put(incident)
+        self._write_queue.put(None)
+        if self._writer.is_alive():
+            self._writer.join(timeout=5.0)
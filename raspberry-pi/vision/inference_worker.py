@@ -0,0 +1,280 @@
+"""
+Inference Worker - Out-of-process ONNX detection with shared-memory frames
+Frames are copied into multiprocessing.shared_memory slots, the worker runs
+ObjectDetector.detect_onnx_array and writes compact [x, y, w, h, conf, class]
+rows into a shared result buffer. Only small control tuples cross the pipe.
+"""
+
+import logging
+import multiprocessing as mp
+import signal
+import threading
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+import numpy as np
+
+from .config import (
+    CAMERA_WIDTH, CAMERA_HEIGHT,
+    ONNX_WORKER_SLOTS, ONNX_WORKER_MAX_DETECTIONS,
+    ONNX_WORKER_STARTUP_TIMEOUT_S, ONNX_WORKER_TIMEOUT_S, ONNX_WORKER_MAX_RESTARTS,
+)
+
+logger = logging.getLogger(__name__)
+
+DETECTION_COLUMNS = 6  # x, y, w, h, confidence, class_id
+
+
+def _worker_main(conn, model_choice: str, frame_shm_names: List[str], result_shm_name: str,
+                 max_detections: int) -> None:
+    """Worker process entry point"""
+    # Parent handles Ctrl+C and stops us cleanly
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from .object_detector import ObjectDetector
+
+    frame_shms = [shared_memory.SharedMemory(name=name) for name in frame_shm_names]
+    result_shm = shared_memory.SharedMemory(name=result_shm_name)
+    results = np.ndarray((max_detections, DETECTION_COLUMNS), dtype=np.float32, buffer=result_shm.buf)
+
+    try:
+        detector = ObjectDetector(use_yolo=False, use_worker=False, model_choice=model_choice, quantized=False)
+        detector._init_onnx()
+        if detector.ort_session is None:
+            conn.send(("error", f"ONNX model {model_choice} unavailable"))
+            return
+        conn.send(("ready", detector.onnx_input_size))
+
+        while True:
+            msg = conn.recv()
+            if msg[0] == "stop":
+                break
+
+            _, job_id, slot, shape = msg
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=frame_shms[slot].buf)
+            rows = detector.detect_onnx_array(frame)
+            n = min(len(rows), max_detections)
+            results[:n] = rows[:n]
+            conn.send(("result", job_id, n))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        # Drop numpy views before closing the mappings
+        results = None
+        frame = None
+        for shm in frame_shms:
+            shm.close()
+        result_shm.close()
+
+
+class InferenceWorker:
+    """
+    Parent-side handle for the ONNX worker process
+
+    infer() is synchronous from the caller's point of view (the processing
+    thread blocks on the pipe, releasing the GIL) while the heavy Python
+    work happens in the child. Crashes and hangs trigger a restart in the
+    background; infer() returns None until the new worker is ready. After
+    ONNX_WORKER_MAX_RESTARTS (or a failed respawn) the worker marks itself
+    unavailable so the detector can fall back to in-process inference.
+    """
+
+    def __init__(
+        self,
+        model_choice: str,
+        num_slots: int = ONNX_WORKER_SLOTS,
+        frame_shape=(CAMERA_HEIGHT, CAMERA_WIDTH, 3),
+        max_detections: int = ONNX_WORKER_MAX_DETECTIONS,
+    ):
+        self.model_choice = model_choice
+        self.num_slots = num_slots
+        self.max_detections = max_detections
+        self.frame_capacity = int(np.prod(frame_shape))
+        self.available = False  # False once the worker has given up for good
+        self.restarts = 0
+        self.input_size = None
+
+        self._ctx = mp.get_context("spawn")  # fork is unsafe with camera/OpenCV threads
+        self._process = None
+        self._conn = None
+        self._frame_shms: List[shared_memory.SharedMemory] = []
+        self._result_shm: Optional[shared_memory.SharedMemory] = None
+        self._results: Optional[np.ndarray] = None
+        self._next_slot = 0
+        self._job_id = 0
+        self._ready = False  # Accepting jobs (False while respawning)
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process is not None else None
+
+    def start(self) -> bool:
+        """Allocate shared memory, spawn the worker and wait for the model to load"""
+        self._allocate()
+        parent_conn, child_conn = self._ctx.Pipe()
+        self._process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                child_conn,
+                self.model_choice,
+                [shm.name for shm in self._frame_shms],
+                self._result_shm.name,
+                self.max_detections,
+            ),
+            daemon=True,
+            name=f"onnx-worker-{self.model_choice}",
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+        try:
+            if not self._conn.poll(ONNX_WORKER_STARTUP_TIMEOUT_S):
+                logger.error("ONNX worker did not report ready in time")
+                self._shutdown_process()
+                return False
+            status, payload = self._conn.recv()
+        except (EOFError, OSError) as e:
+            logger.error(f"ONNX worker died during startup: {e}")
+            self._shutdown_process()
+            return False
+
+        if status != "ready":
+            logger.error(f"ONNX worker failed to start: {payload}")
+            self._shutdown_process()
+            return False
+
+        self.input_size = payload
+        self.available = True
+        self._ready = True
+        return True
+
+    def _allocate(self) -> None:
+        self._free_shared_memory()
+        self._frame_shms = [
+            shared_memory.SharedMemory(create=True, size=self.frame_capacity)
+            for _ in range(self.num_slots)
+        ]
+        self._result_shm = shared_memory.SharedMemory(
+            create=True, size=self.max_detections * DETECTION_COLUMNS * 4
+        )
+        self._results = np.ndarray(
+            (self.max_detections, DETECTION_COLUMNS), dtype=np.float32, buffer=self._result_shm.buf
+        )
+
+    def infer(self, frame: np.ndarray, timeout: float = ONNX_WORKER_TIMEOUT_S) -> Optional[np.ndarray]:
+        """
+        Run detection on frame in the worker
+
+        Returns:
+            (N, 6) float32 rows, or None if the worker failed or is still
+            restarting (after too many failures it is marked unavailable)
+        """
+        if not self._ready:
+            return None
+
+        with self._lock:
+            if not self._ready:
+                return None
+
+            if frame.size > self.frame_capacity:
+                # Larger frames than planned for: resize the slots once
+                logger.info(f"Resizing ONNX worker frame slots for shape {frame.shape}")
+                self.frame_capacity = frame.size
+                self._restart(count=False)
+                return None
+
+            slot = self._next_slot
+            self._next_slot = (self._next_slot + 1) % self.num_slots
+            view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._frame_shms[slot].buf)
+            np.copyto(view, frame)
+
+            self._job_id += 1
+            job_id = self._job_id
+            try:
+                self._conn.send(("infer", job_id, slot, frame.shape))
+                if not self._conn.poll(timeout):
+                    raise TimeoutError(f"no result within {timeout:.1f}s")
+                status, result_job, n = self._conn.recv()
+            except (EOFError, OSError, BrokenPipeError, TimeoutError) as e:
+                logger.error(f"ONNX worker failed: {e}")
+                self._restart()
+                return None
+
+            if status != "result" or result_job != job_id:
+                logger.error(f"ONNX worker protocol error: {status} job={result_job} expected={job_id}")
+                self._restart()
+                return None
+
+            return self._results[:n].copy()
+
+    def _restart(self, count: bool = True) -> None:
+        """
+        Stop taking jobs and respawn the worker in the background
+
+        Called from infer() with the lock held, so it must not wait for the
+        old process to exit or the new model to load.
+
+        Args:
+            count: Count this restart toward ONNX_WORKER_MAX_RESTARTS
+        """
+        self._ready = False
+        if count:
+            self.restarts += 1
+            if self.restarts > ONNX_WORKER_MAX_RESTARTS:
+                # stop() (via the detector's fallback) cleans up the process
+                logger.error("ONNX worker exceeded restart limit, giving up")
+                self.available = False
+                return
+            logger.warning(f"Restarting ONNX worker (restart {self.restarts}/{ONNX_WORKER_MAX_RESTARTS})")
+        threading.Thread(
+            target=self._respawn, daemon=True, name=f"onnx-worker-{self.model_choice}-respawn"
+        ).start()
+
+    def _respawn(self) -> None:
+        """Background thread: replace the worker process (infer() skips while this runs)"""
+        with self._lock:
+            if self._stopped:
+                return
+            self._shutdown_process()
+            if not self.start():
+                logger.error("ONNX worker respawn failed, giving up")
+                self.available = False
+
+    def _shutdown_process(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.send(("stop",))
+            except (OSError, BrokenPipeError):
+                pass
+        if self._process is not None:
+            self._process.join(timeout=1.0)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(timeout=1.0)
+        if self._conn is not None:
+            self._conn.close()
+        self._process = None
+        self._conn = None
+
+    def _free_shared_memory(self) -> None:
+        self._results = None
+        for shm in self._frame_shms:
+            shm.close()
+            shm.unlink()
+        self._frame_shms = []
+        if self._result_shm is not None:
+            self._result_shm.close()
+            self._result_shm.unlink()
+            self._result_shm = None
+
+    def stop(self) -> None:
+        """Stop the worker and free shared memory"""
+        self._stopped = True  # A pending respawn will not start a new process
+        with self._lock:
+            self.available = False
+            self._ready = False
+            self._shutdown_process()
+            self._free_shared_memory()
@@ -0,0 +1,154 @@
+"""
+Latency tracking - Rolling HDR-style histograms for per-stage pipeline timing
+Values are bucketed log-linearly (constant relative precision), so p50/p95/p99
+stay cheap to record and query from any thread.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+# Pipeline stage names (all in milliseconds)
+STAGE_CAPTURE = "capture"              # source.read() duration
+STAGE_QUEUE = "queue"                  # capture done -> processing starts
+STAGE_PROCESS = "process"              # detector time
+STAGE_ANNOTATE = "annotate"            # drawing overlays
+STAGE_VISION_E2E = "vision_e2e"        # capture -> result handed to consumer
+STAGE_GLASS_TO_MOTOR = "glass_to_motor"  # capture -> motor command applied
+STAGE_ALERT_DISPATCH = "alert_dispatch"  # safety event published -> sent to every client
+STAGE_ALERT_ACK = "alert_ack"            # safety event published -> first client ack
+STAGE_ALERT_E2E = "alert_e2e"            # capture of the triggering frame -> first client ack
+
+
+class LatencyHistogram:
+    """
+    Rolling log-linear latency histogram
+
+    Sub-bucket precision is 2**precision_bits per power of two, so the
+    reported percentiles are within ~1/2**(precision_bits-1) of the true
+    value. Only the last window_s seconds are kept, in `slices` time slices.
+    """
+
+    def __init__(
+        self,
+        max_ms: float = 10_000.0,
+        precision_bits: int = 5,
+        window_s: float = 10.0,
+        slices: int = 5,
+    ):
+        self._p = precision_bits
+        self._sub = 1 << precision_bits
+        self._half = self._sub >> 1
+        self._max_us = int(max_ms * 1000)
+        self._n = self._index(self._max_us) + 1
+
+        self._slices = slices
+        self._slice_s = window_s / slices
+        self._counts = np.zeros((slices, self._n), dtype=np.int64)
+        self._slice_id = int(time.monotonic() / self._slice_s)
+        self._lock = threading.Lock()
+
+    def _index(self, value_us: int) -> int:
+        if value_us < self._sub:
+            return value_us
+        exp = value_us.bit_length() - self._p
+        sub = value_us >> exp
+        return self._sub + (exp - 1) * self._half + (sub - self._half)
+
+    def _bucket_value_us(self, index: int) -> float:
+        """Midpoint of a bucket in microseconds"""
+        if index < self._sub:
+            return float(index)
+        j = index - self._sub
+        exp = j // self._half + 1
+        sub = j % self._half + self._half
+        return float((sub << exp) + (1 << (exp - 1)))
+
+    def _advance(self, slice_id: int) -> None:
+        """Zero time slices that have rolled out of the window"""
+        if slice_id <= self._slice_id:
+            return
+        if slice_id - self._slice_id >= self._slices:
+            self._counts[:] = 0
+        else:
+            for k in range(self._slice_id + 1, slice_id + 1):
+                self._counts[k % self._slices] = 0
+        self._slice_id = slice_id
+
+    def record(self, value_ms: float) -> None:
+        """Record one latency sample in milliseconds"""
+        value_us = min(max(int(value_ms * 1000), 0), self._max_us)
+        index = self._index(value_us)
+        slice_id = int(time.monotonic() / self._slice_s)
+        with self._lock:
+            self._advance(slice_id)
+            self._counts[slice_id % self._slices, index] += 1
+
+    def snapshot(self, percentiles=(50, 95, 99)) -> Dict[str, float]:
+        """
+        Summarize the current window
+
+        Returns:
+            {"count": n, "p50": ms, "p95": ms, "p99": ms, "max": ms}
+        """
+        with self._lock:
+            self._advance(int(time.monotonic() / self._slice_s))
+            merged = self._counts.sum(axis=0)
+
+        total = int(merged.sum())
+        stats: Dict[str, float] = {"count": total}
+        if total == 0:
+            for p in percentiles:
+                stats[f"p{p}"] = 0.0
+            stats["max"] = 0.0
+            return stats
+
+        cumulative = np.cumsum(merged)
+        for p in percentiles:
+            index = int(np.searchsorted(cumulative, total * p / 100.0))
+            stats[f"p{p}"] = self._bucket_value_us(index) / 1000.0
+        stats["max"] = self._bucket_value_us(int(np.flatnonzero(merged)[-1])) / 1000.0
+        return stats
+
+
+class LatencyTracker:
+    """Named collection of LatencyHistograms (one per pipeline stage)"""
+
+    def __init__(self, window_s: float = 10.0):
+        self.window_s = window_s
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        hist = self._histograms.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.setdefault(stage, LatencyHistogram(window_s=self.window_s))
+        return hist
+
+    def record(self, stage: str, value_ms: float) -> None:
+        self.histogram(stage).record(value_ms)
+
+    def record_since(self, stage: str, start_ts: Optional[float], now: Optional[float] = None) -> None:
+        """Record time elapsed since a time.monotonic() timestamp"""
+        if not start_ts:
+            return
+        if now is None:
+            now = time.monotonic()
+        self.record(stage, (now - start_ts) * 1000)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Percentile summary for every stage seen so far"""
+        return {stage: hist.snapshot() for stage, hist in list(self._histograms.items())}
+
+    def format_summary(self) -> str:
+        """One-line p50/p95/p99 summary for logging"""
+        parts = []
+        for stage, stats in self.snapshot().items():
+            if stats["count"]:
+                parts.append(
+                    f"{stage} p50={stats['p50']:.1f} p95={stats['p95']:.1f} p99={stats['p99']:.1f}ms"
+                )
+        return " | ".join(parts)
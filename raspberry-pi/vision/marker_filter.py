@@ -0,0 +1,121 @@
+"""
+Marker State Filter - Constant-velocity Kalman filter for the followed marker
+Filters marker center (x, y) and apparent size (px) independently with a
+[position, velocity] state each. Between detections it predicts forward, so
+steering gets smooth state at the control rate and brief occlusions do not
+drop the target. Distance follows from the filtered size.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .config import ARUCO_FILTER_ACCEL_STD, ARUCO_FILTER_MEAS_STD
+
+
+@dataclass
+class MarkerState:
+    """Filtered (or predicted) marker state at one instant"""
+    center: Tuple[float, float]
+    size_px: float
+    velocity: Tuple[float, float]     # px/s
+    center_std: Tuple[float, float]   # 1-sigma position uncertainty (px)
+    size_std: float                   # 1-sigma size uncertainty (px)
+    timestamp: float                  # time.monotonic()
+    age_s: float = 0.0                # Time since the last measurement
+    predicted: bool = False           # No measurement at this timestamp
+
+
+class MarkerStateFilter:
+    """Per-axis constant-velocity Kalman filter over (x, y, size)"""
+
+    def __init__(
+        self,
+        accel_std=ARUCO_FILTER_ACCEL_STD,
+        meas_std=ARUCO_FILTER_MEAS_STD,
+        init_vel_std=(200.0, 200.0, 50.0),
+    ):
+        """
+        Args:
+            accel_std: Process noise as acceleration std per axis (px/s^2)
+            meas_std: Measurement noise std per axis (px)
+            init_vel_std: Velocity std when a track starts (px/s)
+        """
+        self.q2 = np.asarray(accel_std, dtype=np.float64) ** 2
+        self.r2 = np.asarray(meas_std, dtype=np.float64) ** 2
+        self.init_vel_var = np.asarray(init_vel_std, dtype=np.float64) ** 2
+        self.reset()
+
+    def reset(self) -> None:
+        self.pos = np.zeros(3)
+        self.vel = np.zeros(3)
+        # Symmetric 2x2 covariance per axis
+        self.p00 = np.zeros(3)
+        self.p01 = np.zeros(3)
+        self.p11 = np.zeros(3)
+        self.timestamp: Optional[float] = None       # Time of the state above
+        self.last_measurement: Optional[float] = None
+
+    @property
+    def initialized(self) -> bool:
+        return self.timestamp is not None
+
+    def _propagate(self, dt: float):
+        """State and covariance propagated by dt (does not modify the filter)"""
+        pos = self.pos + dt * self.vel
+        dt2 = dt * dt
+        p00 = self.p00 + dt * 2 * self.p01 + dt2 * self.p11 + self.q2 * dt2 * dt2 / 4
+        p01 = self.p01 + dt * self.p11 + self.q2 * dt2 * dt / 2
+        p11 = self.p11 + self.q2 * dt2
+        return pos, p00, p01, p11
+
+    def update(self, timestamp: float, center: Tuple[float, float], size_px: float) -> MarkerState:
+        """Fuse a measurement taken at timestamp"""
+        z = np.array([center[0], center[1], size_px], dtype=np.float64)
+
+        if not self.initialized:
+            self.pos = z
+            self.vel = np.zeros(3)
+            self.p00 = self.r2.copy()
+            self.p01 = np.zeros(3)
+            self.p11 = self.init_vel_var.copy()
+        else:
+            dt = max(timestamp - self.timestamp, 0.0)
+            pos, p00, p01, p11 = self._propagate(dt)
+
+            s = p00 + self.r2
+            k0 = p00 / s
+            k1 = p01 / s
+            innovation = z - pos
+
+            self.pos = pos + k0 * innovation
+            self.vel = self.vel + k1 * innovation
+            self.p00 = (1 - k0) * p00
+            self.p01 = (1 - k0) * p01
+            self.p11 = p11 - k1 * p01
+
+        self.timestamp = timestamp
+        self.last_measurement = timestamp
+        return self._state(self.pos, self.p00, timestamp, predicted=False)
+
+    def predict(self, timestamp: float) -> Optional[MarkerState]:
+        """State extrapolated to timestamp (None before the first measurement)"""
+        if not self.initialized:
+            return None
+        dt = max(timestamp - self.timestamp, 0.0)
+        pos, p00, _, _ = self._propagate(dt)
+        return self._state(pos, p00, timestamp, predicted=True)
+
+    def _state(self, pos, p00, timestamp: float, predicted: bool) -> MarkerState:
+        std = np.sqrt(p00)
+        return MarkerState(
+            center=(float(pos[0]), float(pos[1])),
+            size_px=float(max(pos[2], 1.0)),
+            velocity=(float(self.vel[0]), float(self.vel[1])),
+            center_std=(float(std[0]), float(std[1])),
+            size_std=float(std[2]),
+            timestamp=timestamp,
+            age_s=max(timestamp - self.last_measurement, 0.0),
+            predicted=predicted,
+        )
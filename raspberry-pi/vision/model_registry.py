@@ -0,0 +1,351 @@
+"""
+Model Registry - Lazily loaded, hot-swappable object detection models
+Each model gets its own ObjectDetector (in-process ONNX session or inference
+worker). Models load on first use or in the background when switched to or
+preloaded, so the processing thread never waits for a session to build, and
+are closed again after sitting idle for MODEL_IDLE_EVICT_S.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from queue import Queue, Empty
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .object_detector import ObjectDetector, resolve_model_choice
+from .config import (
+    CAMERA_WIDTH, CAMERA_HEIGHT, OBJECT_DETECTION_MODEL, ONNX_MODELS, ONNX_PREFER_QUANTIZED, SCAN_MODELS,
+    MODEL_IDLE_EVICT_S, MODEL_EVICT_CHECK_S, MODEL_MAX_LOADED, MODEL_WARMUP,
+)
+
+logger = logging.getLogger(__name__)
+
+STATE_UNLOADED = "unloaded"
+STATE_LOADING = "loading"
+STATE_READY = "ready"
+
+
+@dataclass
+class ModelEntry:
+    """Registry bookkeeping for one model"""
+    name: str
+    state: str = STATE_UNLOADED
+    detector: Optional[ObjectDetector] = None
+    users: int = 0               # Callers currently holding the detector
+    last_used: float = 0.0       # time.time() of the last release (or load)
+    load_ms: float = 0.0         # Construction + warmup time of the last load
+    loads: int = 0
+    ready: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def backend(self) -> str:
+        return self.detector.backend if self.detector is not None else ""
+
+
+class ModelRegistry:
+    """
+    Owns the object detection models and which one is active
+
+    acquire() hands the processing thread the active detector (or None while
+    it is still loading); switch() loads the new model in the background and
+    only makes it active once it is warm, so detection continues on the old
+    model until then.
+    """
+
+    def __init__(
+        self,
+        active: Optional[str] = None,
+        use_yolo: bool = True,
+        quantized: Optional[bool] = None,
+        idle_evict_s: float = MODEL_IDLE_EVICT_S,
+        max_loaded: int = MODEL_MAX_LOADED,
+        warmup: bool = MODEL_WARMUP,
+    ):
+        """
+        Args:
+            active: Initial model (default: OBJECT_DETECTION_MODEL)
+            use_yolo: Passed to ObjectDetector (False = color detection only)
+            quantized: Prefer "_int8" variants (default: ONNX_PREFER_QUANTIZED)
+            idle_evict_s: Close models unused for this long (0 = never)
+            max_loaded: Most models kept resident at once
+            warmup: Run one dummy frame through a model after loading it
+        """
+        self.use_yolo = use_yolo
+        self.quantized = ONNX_PREFER_QUANTIZED if quantized is None else quantized
+        self.idle_evict_s = idle_evict_s
+        self.max_loaded = max(1, max_loaded)
+        self.warmup = warmup
+
+        self._entries: Dict[str, ModelEntry] = {}
+        self._lock = threading.Lock()
+        self._active = self._resolve(active or OBJECT_DETECTION_MODEL)
+        self._pending: Optional[str] = None  # Becomes active once loaded
+        self._evictions = 0
+        self._switches = 0
+
+        self._requests: Queue = Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="model-registry")
+        self._thread.start()
+
+    @property
+    def active(self) -> str:
+        return self._active
+
+    @property
+    def pending(self) -> Optional[str]:
+        return self._pending
+
+    @staticmethod
+    def available_models() -> List[str]:
+        """Names accepted by switch() / preload()"""
+        names = list(SCAN_MODELS)
+        if OBJECT_DETECTION_MODEL not in names:
+            names.append(OBJECT_DETECTION_MODEL)
+        return names
+
+    def _resolve(self, name: str) -> str:
+        if name not in self.available_models():
+            raise ValueError(f"Unknown model '{name}' (available: {', '.join(self.available_models())})")
+        if name in ONNX_MODELS:
+            return resolve_model_choice(name, self.quantized)
+        return name
+
+    def _entry(self, name: str) -> ModelEntry:
+        """Entry for name; caller holds _lock"""
+        entry = self._entries.get(name)
+        if entry is None:
+            entry = self._entries[name] = ModelEntry(name)
+        return entry
+
+    def preload(self, name: Optional[str] = None) -> str:
+        """
+        Load a model in the background (no-op if loaded or loading)
+
+        Args:
+            name: Model to warm (default: the active model)
+
+        Returns:
+            Resolved model name
+        """
+        name = self._resolve(name) if name else self._active
+        with self._lock:
+            self._request_load(name)
+        return name
+
+    def _request_load(self, name: str) -> None:
+        """Queue a background load; caller holds _lock"""
+        entry = self._entry(name)
+        if entry.state == STATE_UNLOADED:
+            entry.state = STATE_LOADING
+            entry.ready.clear()
+            self._requests.put(name)
+
+    def switch(self, name: str) -> Tuple[str, bool]:
+        """
+        Make name the active model
+
+        A loaded model becomes active immediately; otherwise it is loaded in
+        the background and the current model keeps serving until it is ready.
+
+        Args:
+            name: Key into ONNX_MODELS (INT8 preference applies)
+
+        Returns:
+            (resolved name, True if already active)
+
+        Raises:
+            ValueError: Unknown model name
+        """
+        name = self._resolve(name)
+        with self._lock:
+            if name == self._active:
+                self._pending = None
+                return name, True
+
+            self._switches += 1
+            entry = self._entry(name)
+            if entry.state == STATE_READY:
+                self._pending = None
+                self._activate(name)
+                return name, True
+
+            self._pending = name
+            self._request_load(name)
+        logger.info(f"Loading model {name} in the background (serving {self._active} meanwhile)")
+        return name, False
+
+    def _activate(self, name: str) -> None:
+        """Caller holds _lock"""
+        previous, self._active = self._active, name
+        logger.info(f"✓ Active model: {name} (was {previous})")
+
+    def wait_ready(self, name: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """Block until name (default: active or pending model) is loaded"""
+        with self._lock:
+            name = name or self._pending or self._active
+            entry = self._entry(name)
+            if entry.state == STATE_UNLOADED:
+                self._request_load(name)
+        return entry.ready.wait(timeout)
+
+    @contextmanager
+    def acquire(self) -> Iterator[Optional[ObjectDetector]]:
+        """
+        Use the active detector for one frame
+
+        Yields None (and starts a background load) when the active model is
+        not loaded yet. The detector is not evicted while held.
+        """
+        with self._lock:
+            entry = self._entry(self._active)
+            if entry.state != STATE_READY:
+                self._request_load(entry.name)
+                entry = None
+            else:
+                entry.users += 1
+
+        if entry is None:
+            yield None
+            return
+
+        try:
+            yield entry.detector
+        finally:
+            with self._lock:
+                entry.users -= 1
+                entry.last_used = time.time()
+
+    def _run(self) -> None:
+        """Registry thread: background loads, idle eviction in between"""
+        while True:
+            try:
+                name = self._requests.get(timeout=MODEL_EVICT_CHECK_S)
+            except Empty:
+                self.evict_idle()
+                continue
+            if name is None:
+                break
+            self._load(name)
+
+    def _load(self, name: str) -> None:
+        t_start = time.time()
+        detector = ObjectDetector(use_yolo=self.use_yolo, model_choice=name, quantized=False)
+        if self.warmup:
+            try:
+                detector.detect(np.zeros((CAMERA_HEIGHT, CAMERA_WIDTH, 3), dtype=np.uint8))
+            except Exception as e:
+                logger.warning(f"Warmup of {name} failed: {e}")
+        load_ms = (time.time() - t_start) * 1000
+
+        with self._lock:
+            entry = self._entry(name)
+            if entry.state != STATE_LOADING:
+                # Registry closed while we were loading
+                detector.close()
+                return
+            entry.detector = detector
+            entry.state = STATE_READY
+            entry.load_ms = load_ms
+            entry.loads += 1
+            entry.last_used = time.time()
+            entry.ready.set()
+            if self._pending == name:
+                self._pending = None
+                self._activate(name)
+            evicted = self._evict_over_capacity()
+
+        logger.info(f"✓ Model {name} loaded ({load_ms:.0f} ms, {entry.backend})")
+        self._close_entries(evicted)
+
+    def _evictable(self, entry: ModelEntry) -> bool:
+        """Loaded and not in use or about to be used; caller holds _lock"""
+        return entry.state == STATE_READY and entry.users == 0 and entry.name != self._pending
+
+    def _evict_over_capacity(self) -> List[Tuple[str, ObjectDetector]]:
+        """Unload least recently used idle models beyond max_loaded; caller holds _lock"""
+        loaded = [e for e in self._entries.values() if e.state == STATE_READY]
+        candidates = sorted(
+            (e for e in loaded if self._evictable(e) and e.name != self._active),
+            key=lambda e: e.last_used,
+        )
+        excess = len(loaded) - self.max_loaded
+        return [self._unload(e) for e in candidates[:max(excess, 0)]]
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """
+        Close models (the active one included) unused for idle_evict_s
+
+        Returns:
+            Names of the evicted models
+        """
+        if self.idle_evict_s <= 0:
+            return []
+        now = time.time() if now is None else now
+        with self._lock:
+            evicted = [
+                self._unload(e) for e in list(self._entries.values())
+                if self._evictable(e) and now - e.last_used >= self.idle_evict_s
+            ]
+        self._close_entries(evicted)
+        return [name for name, _ in evicted]
+
+    def _unload(self, entry: ModelEntry) -> Tuple[str, ObjectDetector]:
+        """Detach entry's detector; caller holds _lock and closes it afterwards"""
+        detector, entry.detector = entry.detector, None
+        entry.state = STATE_UNLOADED
+        entry.ready.clear()
+        self._evictions += 1
+        return entry.name, detector
+
+    def _close_entries(self, evicted: List[Tuple[str, ObjectDetector]]) -> None:
+        for name, detector in evicted:
+            detector.close()
+            logger.info(f"Model {name} unloaded")
+
+    def stats(self) -> dict:
+        """Active/pending model and per-model state"""
+        now = time.time()
+        with self._lock:
+            return {
+                "active": self._active,
+                "pending": self._pending,
+                "switches": self._switches,
+                "evictions": self._evictions,
+                "available": self.available_models(),
+                "models": {
+                    e.name: {
+                        "state": e.state,
+                        "backend": e.backend,
+                        "users": e.users,
+                        "idle_s": round(now - e.last_used, 1) if e.state == STATE_READY else None,
+                        "load_ms": round(e.load_ms, 1),
+                        "loads": e.loads,
+                    }
+                    for e in self._entries.values()
+                },
+            }
+
+    def format_stats(self) -> str:
+        """One-line summary for the periodic log"""
+        s = self.stats()
+        loaded = [f"{name}({m['backend']})" for name, m in s["models"].items() if m["state"] == STATE_READY]
+        pending = f" | loading {s['pending']}" if s["pending"] else ""
+        return (
+            f"active {s['active']}{pending} | loaded {', '.join(loaded) or 'none'} | "
+            f"{s['switches']} switches, {s['evictions']} evictions"
+        )
+
+    def close(self) -> None:
+        """Stop the registry thread and close every loaded model"""
+        self._requests.put(None)
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        with self._lock:
+            evicted = [self._unload(e) for e in self._entries.values() if e.state == STATE_READY]
+            for entry in self._entries.values():
+                entry.state = STATE_UNLOADED
+        self._close_entries(evicted)
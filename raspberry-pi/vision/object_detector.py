@@ -2,19 +2,84 @@
 Object Detector - ONNX/YOLO-based grocery item detection with color fallback
 """
 
+import threading
 import cv2
 import numpy as np
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Optional, List, Sequence, Tuple, Union
 from dataclasses import dataclass
+from .frame_context import FrameContext, letterbox, letterbox_params
 from .config import (
     OBJECT_DETECTION_MODEL,
     YOLO_MODEL, YOLO_CONFIDENCE_THRESHOLD, YOLO_IOU_THRESHOLD,
     ONNX_CONFIDENCE_THRESHOLD, ONNX_IOU_THRESHOLD, ONNX_MODELS,
-    GROCERY_CLASSES, GROCERY_ITEM_COLORS, MIN_OBJECT_AREA,
-    estimate_distance
+    ONNX_INFERENCE_WORKER, ONNX_SESSION_OPTIONS, ONNX_IO_BINDING,
+    ONNX_PREFER_QUANTIZED, ONNX_QUANTIZED_SUFFIX,
+    GROCERY_CLASSES, GROCERY_ITEM_COLORS, GROCERY_COLOR_PRIORITY, MIN_OBJECT_AREA,
+    estimate_distance, estimate_distances
 )
 
+_INPUT_SCALE = np.float32(1.0 / 255.0)
+_BASE_DIR = Path(__file__).resolve().parents[1]
+_MORPH_KERNEL = np.ones((5, 5), np.uint8)
+# Color mask cleanup (erode once, dilate twice) grows a blob by this much
+_MORPH_PAD = 2 * (_MORPH_KERNEL.shape[0] // 2)
+
+# One row per ONNX detection, best first; see ObjectDetector.detect_records
+DETECTION_DTYPE = np.dtype([
+    ("bbox", np.int32, (4,)),    # x, y, w, h in frame pixels
+    ("center", np.int32, (2,)),
+    ("confidence", np.float32),
+    ("class_id", np.int32),
+    ("distance", np.float32),    # Meters, from estimate_distances
+])
+
+
+class ColorClassifier:
+    """
+    HSV pixel -> color class id lookup in a handful of table passes
+
+    inRange boxes are separable, so each channel gets a 256-entry table of
+    "classes whose range contains this value" bitmasks. ANDing the three
+    lookups gives every class a pixel falls in; a final table picks the
+    highest-priority one. Label 0 is background, class i is names[i - 1].
+    """
+
+    MAX_CLASSES = 8  # One bit per class in a uint8 mask
+
+    def __init__(self, colors: dict, priority: Optional[List[str]] = None):
+        """
+        Args:
+            colors: {name: {"lower": hsv, "upper": hsv}} inclusive ranges
+            priority: Names in order of precedence where ranges overlap
+                      (default: dict order); names not listed come after
+        """
+        priority = [name for name in (priority or []) if name in colors]
+        self.names = priority + [name for name in colors if name not in priority]
+        if len(self.names) > self.MAX_CLASSES:
+            raise ValueError(f"ColorClassifier supports at most {self.MAX_CLASSES} colors")
+
+        values = np.arange(256)
+        self._channel_luts = [np.zeros(256, dtype=np.uint8) for _ in range(3)]
+        for bit, name in enumerate(self.names):
+            lower, upper = colors[name]["lower"], colors[name]["upper"]
+            for channel, lut in enumerate(self._channel_luts):
+                inside = (values >= lower[channel]) & (values <= upper[channel])
+                lut[inside] |= np.uint8(1 << bit)
+
+        # Lowest set bit = highest priority class
+        masks = np.arange(256)
+        lowest = (masks & -masks).astype(np.float64)
+        self._label_lut = np.where(masks > 0, np.log2(np.maximum(lowest, 1)) + 1, 0).astype(np.uint8)
+
+    def classify(self, hsv: np.ndarray) -> np.ndarray:
+        """uint8 label image (0 = no color matched)"""
+        h, s, v = cv2.split(hsv)
+        h_lut, s_lut, v_lut = self._channel_luts
+        bits = cv2.bitwise_and(cv2.LUT(h, h_lut), cv2.LUT(s, s_lut))
+        bits = cv2.bitwise_and(bits, cv2.LUT(v, v_lut))
+        return cv2.LUT(bits, self._label_lut)
+
 
 @dataclass
 class ObjectDetection:
@@ -25,18 +90,30 @@ class ObjectDetection:
     bbox: Optional[Tuple[int, int, int, int]] = None  # (x, y, w, h)
     center: Optional[Tuple[int, int]] = None
     distance: float = 0.0
-    method: str = "none"  # "yolo" or "color"
+    method: str = "none"  # "onnx", "yolo", "color" or "track" (propagated by ObjectTracker)
+    track_id: int = -1    # ObjectTracker ID (-1 when untracked)
 
 
 class ObjectDetector:
     """Detects grocery items using ONNX/YOLO (primary) or color detection (fallback)"""
 
-    def __init__(self, use_yolo: bool = True):
+    def __init__(
+        self,
+        use_yolo: bool = True,
+        use_worker: Optional[bool] = None,
+        model_choice: Optional[str] = None,
+        quantized: Optional[bool] = None,
+    ):
         """
         Initialize object detector
 
         Args:
             use_yolo: Try to use ONNX/YOLO if available, fallback to color detection
+            use_worker: Run ONNX inference in a separate process
+                        (default: ONNX_INFERENCE_WORKER)
+            model_choice: Key into ONNX_MODELS (default: OBJECT_DETECTION_MODEL)
+            quantized: Use the INT8 variant of model_choice if one has been
+                       built (default: ONNX_PREFER_QUANTIZED)
         """
         self.onnx_available = False
         self.yolo_available = False
@@ -45,29 +122,36 @@ class ObjectDetector:
         self.ort_output_names = None
         self.onnx_input_size = (416, 416)  # (h, w) default if not specified
         self.model = None
-        self.model_choice = OBJECT_DETECTION_MODEL
+        self.model_choice = resolve_model_choice(
+            model_choice or OBJECT_DETECTION_MODEL,
+            ONNX_PREFER_QUANTIZED if quantized is None else quantized,
+        )
         self._onnx_class_names = None
+        self._worker = None
+        self._color_classifier = ColorClassifier(GROCERY_ITEM_COLORS, GROCERY_COLOR_PRIORITY)
+
+        # Persistent ONNX input/output buffers (see _init_onnx_buffers)
+        self._onnx_lock = threading.Lock()
+        self._canvas = None           # Letterboxed BGR uint8 image (h, w, 3)
+        self._canvas_layout = None    # Frame (h, w) the canvas padding was filled for
+        self._input_tensor = None     # NCHW float32 network input
+        self._output_buffers = None   # Preallocated outputs (None entries: ORT allocates)
+        self._io_binding = None
+
+        # Batched inference (see detect_onnx_batch)
+        self.max_batch = 1            # Frames per session call
+        self._fixed_batch = False     # Model was exported with a static batch > 1
+        self._batch_tensor = None     # (max_batch, 3, h, w) float32
+
+        if use_worker is None:
+            use_worker = ONNX_INFERENCE_WORKER
 
         if use_yolo:
             if self.model_choice in ONNX_MODELS:
-                onnx_cfg = ONNX_MODELS[self.model_choice]
-                self.onnx_input_size = (onnx_cfg["input_size"], onnx_cfg["input_size"])
-                class_names = onnx_cfg.get("class_names", [])
-                self._onnx_class_names = class_names if class_names else None
-                print(
-                    f"ℹ ONNX selected: {self.model_choice} | "
-                    f"path={onnx_cfg['path']} | "
-                    f"input={self.onnx_input_size[0]} | "
-                    f"classes={len(class_names)}"
-                )
-                try:
-                    self._load_onnx(onnx_cfg["path"])
-                except ImportError:
-                    print("⚠ onnxruntime not installed, skipping ONNX load")
-                    pass
-                except Exception as e:
-                    print(f"⚠ ONNX loading failed: {e}")
-                    print("  Using YOLO/color detection fallback")
+                if use_worker:
+                    self._start_worker()
+                if not self.onnx_available:
+                    self._init_onnx()
             else:
                 try:
                     from ultralytics import YOLO
@@ -97,9 +181,74 @@ class ObjectDetector:
         if not self.onnx_available and not self.yolo_available:
             print("✓ ObjectDetector initialized (color-based mode)")
 
+    def _init_onnx(self) -> None:
+        """Load the selected ONNX model in this process"""
+        onnx_cfg = ONNX_MODELS[self.model_choice]
+        self.onnx_input_size = (onnx_cfg["input_size"], onnx_cfg["input_size"])
+        class_names = onnx_cfg.get("class_names", [])
+        self._onnx_class_names = class_names if class_names else None
+        print(
+            f"ℹ ONNX selected: {self.model_choice} | "
+            f"path={onnx_cfg['path']} | "
+            f"input={self.onnx_input_size[0]} | "
+            f"classes={len(class_names)}"
+        )
+        try:
+            self._load_onnx(onnx_cfg["path"])
+        except ImportError:
+            print("⚠ onnxruntime not installed, skipping ONNX load")
+        except Exception as e:
+            print(f"⚠ ONNX loading failed: {e}")
+            print("  Using YOLO/color detection fallback")
+
+    def _start_worker(self) -> None:
+        """Start the out-of-process ONNX worker; leaves onnx_available False on failure"""
+        from .inference_worker import InferenceWorker
+
+        class_names = ONNX_MODELS[self.model_choice].get("class_names", [])
+        self._onnx_class_names = class_names if class_names else None
+
+        worker = InferenceWorker(self.model_choice)
+        if worker.start():
+            self._worker = worker
+            self.onnx_available = True
+            print(f"✓ ONNX inference worker running ({self.model_choice}, pid={worker.pid})")
+        else:
+            print("⚠ ONNX inference worker failed to start, using in-process inference")
+
+    def _fallback_in_process(self) -> None:
+        """Worker gave up (too many crashes): continue with an in-process session"""
+        print("⚠ ONNX inference worker disabled, falling back to in-process inference")
+        self._worker.stop()
+        self._worker = None
+        self.onnx_available = False
+        self._init_onnx()
+
+    @property
+    def backend(self) -> str:
+        """Inference backend ("onnx", "onnx-worker", "yolo" or "color")"""
+        if self.onnx_available:
+            return "onnx-worker" if self._worker is not None else "onnx"
+        return "yolo" if self.yolo_available else "color"
+
+    def close(self) -> None:
+        """Stop the inference worker process (if any) and release the ONNX session"""
+        if self._worker is not None:
+            self._worker.stop()
+            self._worker = None
+        with self._onnx_lock:
+            self.ort_session = None
+            self._io_binding = None
+            self._output_buffers = None
+            self._input_tensor = None
+            self._batch_tensor = None
+            self._canvas = None
+        self.model = None
+        self.onnx_available = False
+        self.yolo_available = False
+
     def _load_onnx(self, model_rel_path: str) -> None:
-        base_dir = Path(__file__).resolve().parents[1]
-        model_path = base_dir / model_rel_path
+        model_path = _BASE_DIR / model_rel_path
         if not model_path.exists():
             print(f"⚠ ONNX model not found at: {model_path}")
             return
@@ -108,6 +257,7 @@ class ObjectDetector:
 
         self.ort_session = ort.InferenceSession(
             str(model_path),
+            sess_options=self._session_options(ort),
             providers=["CPUExecutionProvider"]
         )
         inputs = self.ort_session.get_inputs()
@@ -118,159 +268,350 @@ class ObjectDetector:
         shape = inputs[0].shape
         if len(shape) >= 4 and isinstance(shape[2], int) and isinstance(shape[3], int):
             self.onnx_input_size = (shape[2], shape[3])
+        self._init_batching(shape[0] if shape else 1)
+
+        self._init_onnx_buffers(outputs)
 
         self.onnx_available = True
         print(f"✓ ONNX model loaded: {model_path}")
 
+    def _init_batching(self, batch_dim) -> None:
+        """Pick max_batch from the model's batch dimension and its configured batch_size"""
+        wanted = int(ONNX_MODELS.get(self.model_choice, {}).get("batch_size", 1))
+        self._batch_tensor = None
+        self._fixed_batch = isinstance(batch_dim, int) and batch_dim > 1
+        if self._fixed_batch:
+            # Static batch export: every call runs batch_dim frames
+            self.max_batch = batch_dim
+        elif isinstance(batch_dim, int):
+            self.max_batch = 1
+            if wanted > 1:
+                print(f"⚠ {self.model_choice} has a fixed batch of 1, batch_size={wanted} ignored "
+                      f"(re-export with benchmark_batching.py --export)")
+        else:
+            self.max_batch = max(1, wanted)
+
+    @staticmethod
+    def _session_options(ort):
+        """SessionOptions built from ONNX_SESSION_OPTIONS"""
+        levels = {
+            "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }
+        modes = {
+            "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+            "parallel": ort.ExecutionMode.ORT_PARALLEL,
+        }
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = levels[ONNX_SESSION_OPTIONS.get("graph_optimization_level", "all")]
+        options.execution_mode = modes[ONNX_SESSION_OPTIONS.get("execution_mode", "sequential")]
+        options.intra_op_num_threads = int(ONNX_SESSION_OPTIONS.get("intra_op_num_threads", 0))
+        options.inter_op_num_threads = int(ONNX_SESSION_OPTIONS.get("inter_op_num_threads", 0))
+        return options
+
+    def _init_onnx_buffers(self, outputs) -> None:
+        """
+        Allocate the persistent input tensor and, with ONNX_IO_BINDING, bind it
+        and every statically shaped output to preallocated memory
+        """
+        h, w = self.onnx_input_size
+        self._canvas = np.empty((h, w, 3), dtype=np.uint8)
+        self._canvas_layout = None
+        self._input_tensor = np.empty((1, 3, h, w), dtype=np.float32)
+        self._output_buffers = None
+        self._io_binding = None
+
+        if not ONNX_IO_BINDING:
+            return
+
+        binding = self.ort_session.io_binding()
+        binding.bind_input(
+            self.ort_input_name, "cpu", 0, np.float32,
+            list(self._input_tensor.shape), self._input_tensor.ctypes.data
+        )
+
+        buffers = []
+        for output in outputs:
+            static = all(isinstance(d, int) and d > 0 for d in output.shape)
+            if static and output.type == "tensor(float)":
+                buf = np.empty(output.shape, dtype=np.float32)
+                binding.bind_output(output.name, "cpu", 0, np.float32, list(buf.shape), buf.ctypes.data)
+                buffers.append(buf)
+            else:
+                binding.bind_output(output.name, "cpu")
+                buffers.append(None)
+
+        self._io_binding = binding
+        self._output_buffers = buffers
+
     def _letterbox(self, img: np.ndarray, new_shape: Tuple[int, int]) -> Tuple[np.ndarray, float, Tuple[float, float]]:
-        shape = img.shape[:2]  # (h, w)
         if isinstance(new_shape, int):
             new_shape = (new_shape, new_shape)
+        return letterbox(img, new_shape)
 
-        r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
-        new_unpad = (int(round(shape[1] * r)), int(round(shape[0] * r)))
-        dw = new_shape[1] - new_unpad[0]
-        dh = new_shape[0] - new_unpad[1]
-        dw /= 2
-        dh /= 2
-
-        if shape[::-1] != new_unpad:
-            img = cv2.resize(img, new_unpad, interpolation=cv2.INTER_LINEAR)
+    def _resolve_label(self, class_id: int) -> Optional[str]:
+        """Label for an ONNX class id (None if outside the model's class list)"""
+        if self._onnx_class_names:
+            if 0 <= class_id < len(self._onnx_class_names):
+                return self._onnx_class_names[class_id]
+            return None
 
-        top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
-        left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
-        img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+        return GROCERY_CLASSES.get(class_id, f"class_{class_id}")
 
-        return img, r, (dw, dh)
+    def _preprocess_onnx(self, frame: Union[FrameContext, np.ndarray]) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+        """
+        Letterbox the frame into the persistent NCHW input tensor
 
-    def _nms(self, boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> List[int]:
-        if len(boxes) == 0:
-            return []
+        The frame is resized straight into the padded canvas (padding is only
+        redrawn when the frame size changes), then BGR->RGB, HWC->CHW, the
+        float conversion and the 1/255 scale happen in a single pass per
+        channel plane. The returned tensor is reused by the next call.
 
-        x1 = boxes[:, 0]
-        y1 = boxes[:, 1]
-        x2 = boxes[:, 2]
-        y2 = boxes[:, 3]
-        areas = (x2 - x1 + 1) * (y2 - y1 + 1)
-        order = scores.argsort()[::-1]
+        Returns:
+            (input tensor, scale ratio, (pad_w, pad_h))
+        """
+        frame = FrameContext.wrap(frame).frame
+        if self._input_tensor is None or self._input_tensor.shape[2:] != tuple(self.onnx_input_size):
+            h, w = self.onnx_input_size
+            self._canvas = np.empty((h, w, 3), dtype=np.uint8)
+            self._canvas_layout = None
+            self._input_tensor = np.empty((1, 3, h, w), dtype=np.float32)
+            self._io_binding = None  # Bound to the old tensor
+
+        ratio, pad = self._fill_input(frame, self._input_tensor[0])
+        return self._input_tensor, ratio, pad
+
+    def _fill_input(self, frame: np.ndarray, planes: np.ndarray) -> Tuple[float, Tuple[float, float]]:
+        """Letterbox frame through the canvas into one (3, h, w) slice of an input tensor"""
+        shape = frame.shape[:2]
+        ratio, (new_w, new_h), pad, (top, left) = letterbox_params(shape, self.onnx_input_size)
+        if self._canvas_layout != shape:
+            self._canvas.fill(114)
+            self._canvas_layout = shape
+
+        inner = self._canvas[top:top + new_h, left:left + new_w]
+        if shape == (new_h, new_w):
+            np.copyto(inner, frame)
+        else:
+            cv2.resize(frame, (new_w, new_h), dst=inner, interpolation=cv2.INTER_LINEAR)
+
+        # Planes go out in reverse order (BGR->RGB); each multiply converts,
+        # scales and writes one contiguous NCHW plane
+        for plane, channel in zip(planes, cv2.split(self._canvas)[::-1]):
+            np.multiply(channel, _INPUT_SCALE, out=plane, casting="unsafe")
+        return ratio, pad
+
+    def _run_onnx(self, input_tensor: np.ndarray) -> List[np.ndarray]:
+        """Run the session on input_tensor (IOBinding when enabled)"""
+        if self._io_binding is None or input_tensor is not self._input_tensor:
+            return self.ort_session.run(self.ort_output_names, {self.ort_input_name: input_tensor})
+
+        self.ort_session.run_with_iobinding(self._io_binding)
+        if all(buf is not None for buf in self._output_buffers):
+            return self._output_buffers
+        allocated = self._io_binding.copy_outputs_to_cpu()
+        return [buf if buf is not None else allocated[i] for i, buf in enumerate(self._output_buffers)]
+
+    def detect_onnx(self, frame: Union[FrameContext, np.ndarray]) -> List[ObjectDetection]:
+        return self.to_detections(self.detect_records(frame))
+
+    def detect_records(self, frame: Union[FrameContext, np.ndarray]) -> np.ndarray:
+        """
+        ONNX detections as a DETECTION_DTYPE structured array, best first
 
-        keep = []
-        while order.size > 0:
-            i = int(order[0])
-            keep.append(i)
+        Memoized on the frame context. Use to_detections() to build
+        ObjectDetection objects for just the rows that are needed.
+        """
+        ctx = FrameContext.wrap(frame)
+        return ctx.memo("object_records", lambda: self._rows_to_records(self._onnx_rows(ctx)))
 
-            xx1 = np.maximum(x1[i], x1[order[1:]])
-            yy1 = np.maximum(y1[i], y1[order[1:]])
-            xx2 = np.minimum(x2[i], x2[order[1:]])
-            yy2 = np.minimum(y2[i], y2[order[1:]])
+    def detect_records_batch(self, frames: Sequence[Union[FrameContext, np.ndarray]]) -> List[np.ndarray]:
+        """
+        detect_records for several frames with batched session calls
 
-            w = np.maximum(0.0, xx2 - xx1 + 1)
-            h = np.maximum(0.0, yy2 - yy1 + 1)
-            inter = w * h
-            iou = inter / (areas[i] + areas[order[1:]] - inter)
+        Falls back to one call per frame without an in-process session or
+        when the model cannot batch. Results are memoized on each context.
+        """
+        contexts = [FrameContext.wrap(frame) for frame in frames]
+        if self._worker is not None or self.max_batch == 1:
+            return [self.detect_records(ctx) for ctx in contexts]
+
+        rows = self.detect_onnx_batch(contexts)
+        return [
+            ctx.memo("object_records", lambda r=r: self._rows_to_records(r))
+            for ctx, r in zip(contexts, rows)
+        ]
+
+    def _onnx_rows(self, ctx: FrameContext) -> np.ndarray:
+        """Compact detections from the worker or the in-process session"""
+        empty = np.zeros((0, 6), dtype=np.float32)
+        if self._worker is not None:
+            rows = self._worker.infer(ctx.frame)
+            if rows is None:
+                if not self._worker.available:
+                    self._fallback_in_process()
+                return empty
+            return rows
 
-            inds = np.where(iou <= iou_threshold)[0]
-            order = order[inds + 1]
+        if not self.onnx_available or self.ort_session is None:
+            return empty
 
-        return keep
+        return self.detect_onnx_array(ctx)
 
-    def _resolve_label(self, class_id: int) -> Optional[str]:
+    def _rows_to_records(self, rows: np.ndarray) -> np.ndarray:
+        """Convert compact [x, y, w, h, conf, class_id] rows to sorted records"""
+        class_ids = rows[:, 5].astype(np.int32)
         if self._onnx_class_names:
-            if 0 <= class_id < len(self._onnx_class_names):
-                return self._onnx_class_names[class_id]
-            return None
+            known = (class_ids >= 0) & (class_ids < len(self._onnx_class_names))
+            rows = rows[known]
+            class_ids = class_ids[known]
+
+        order = np.argsort(-rows[:, 4], kind="stable")
+        rows = rows[order]
+        bbox = rows[:, :4].astype(np.int32)
+
+        records = np.empty(len(rows), dtype=DETECTION_DTYPE)
+        records["bbox"] = bbox
+        records["center"] = bbox[:, :2] + bbox[:, 2:] // 2
+        records["confidence"] = rows[:, 4]
+        records["class_id"] = class_ids[order]
+        records["distance"] = estimate_distances(bbox[:, 2] * bbox[:, 3])
+        return records
+
+    def to_detections(self, records: np.ndarray) -> List[ObjectDetection]:
+        """Materialize ObjectDetection objects for DETECTION_DTYPE records"""
+        columns = zip(
+            records["bbox"].tolist(), records["center"].tolist(), records["confidence"].tolist(),
+            records["class_id"].tolist(), records["distance"].tolist(),
+        )
+        detections = []
+        for bbox, center, confidence, class_id, distance in columns:
+            detections.append(ObjectDetection(
+                found=True,
+                label=self._resolve_label(class_id),
+                confidence=confidence,
+                bbox=tuple(bbox),
+                center=tuple(center),
+                distance=distance,
+                method="onnx"
+            ))
+        return detections
 
-        return GROCERY_CLASSES.get(class_id, f"class_{class_id}")
+    def detect_onnx_array(self, frame: Union[FrameContext, np.ndarray]) -> np.ndarray:
+        """
+        Run the in-process ONNX session and return compact detections
 
-    def _preprocess_onnx(self, frame: np.ndarray) -> Tuple[np.ndarray, float, Tuple[float, float]]:
-        img, ratio, pad = self._letterbox(frame, self.onnx_input_size)
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        img = img.astype(np.float32) / 255.0
-        img = np.transpose(img, (2, 0, 1))
-        img = np.expand_dims(img, axis=0)
-        return img, ratio, pad
+        Args:
+            frame: BGR image or its FrameContext
 
-    def detect_onnx(self, frame: np.ndarray) -> List[ObjectDetection]:
-        if not self.onnx_available or self.ort_session is None:
-            return []
+        Returns:
+            float32 array of shape (N, 6): x, y, w, h, confidence, class_id
+            in frame pixel coordinates
+        """
+        empty = np.zeros((0, 6), dtype=np.float32)
+        if self.ort_session is None:
+            return empty
+
+        frame = FrameContext.wrap(frame).frame
+        with self._onnx_lock:
+            return self._detect_onnx_locked(frame)
 
+    def _detect_onnx_locked(self, frame: np.ndarray) -> np.ndarray:
+        """detect_onnx_array body; the caller holds _onnx_lock (buffers are shared)"""
         input_tensor, ratio, pad = self._preprocess_onnx(frame)
-        outputs = self.ort_session.run(self.ort_output_names, {self.ort_input_name: input_tensor})
-        output = outputs[0]
+        output = self._run_onnx(input_tensor)[0]
 
         if output.ndim == 3:
             output = output[0]
+        return self._decode_onnx(output, ratio, pad, frame.shape)
+
+    def detect_onnx_batch(self, frames: Sequence[Union[FrameContext, np.ndarray]]) -> List[np.ndarray]:
+        """
+        Run the in-process ONNX session on several frames per call
+
+        Frames are letterboxed into a (max_batch, 3, h, w) tensor and run
+        max_batch at a time; a model exported with a fixed batch always gets
+        its full batch (unused slots keep stale data, their outputs are
+        ignored).
 
+        Args:
+            frames: BGR images or FrameContexts
+
+        Returns:
+            One (N, 6) float32 array per frame, as from detect_onnx_array
+        """
+        frames = [FrameContext.wrap(frame).frame for frame in frames]
+        if self.ort_session is None:
+            return [np.zeros((0, 6), dtype=np.float32) for _ in frames]
+        if self.max_batch == 1:
+            return [self.detect_onnx_array(frame) for frame in frames]
+
+        results = []
+        with self._onnx_lock:
+            h, w = self.onnx_input_size
+            if self._batch_tensor is None or self._batch_tensor.shape != (self.max_batch, 3, h, w):
+                self._batch_tensor = np.empty((self.max_batch, 3, h, w), dtype=np.float32)
+                if self._canvas is None or self._canvas.shape[:2] != (h, w):
+                    self._canvas = np.empty((h, w, 3), dtype=np.uint8)
+                    self._canvas_layout = None
+
+            for start in range(0, len(frames), self.max_batch):
+                chunk = frames[start:start + self.max_batch]
+                letterboxes = [self._fill_input(frame, self._batch_tensor[i]) for i, frame in enumerate(chunk)]
+                batch = self._batch_tensor if self._fixed_batch else self._batch_tensor[:len(chunk)]
+                output = self.ort_session.run(self.ort_output_names[:1], {self.ort_input_name: batch})[0]
+                for i, (frame, (ratio, pad)) in enumerate(zip(chunk, letterboxes)):
+                    results.append(self._decode_onnx(output[i], ratio, pad, frame.shape))
+        return results
+
+    def _decode_onnx(self, output: np.ndarray, ratio: float, pad: Tuple[float, float],
+                     frame_shape: Tuple[int, ...]) -> np.ndarray:
+        """One frame's raw (C, A) or (A, C) output -> compact rows in frame pixels"""
+        empty = np.zeros((0, 6), dtype=np.float32)
         if output.shape[0] < output.shape[1] and output.shape[0] < 128:
             output = output.T
 
-        boxes = output[:, :4]
         scores = output[:, 4:]
-        class_ids = np.argmax(scores, axis=1)
-        confidences = scores[np.arange(scores.shape[0]), class_ids]
-
-        keep = confidences >= ONNX_CONFIDENCE_THRESHOLD
+        class_ids = scores.argmax(axis=1)
+        confidences = np.take_along_axis(scores, class_ids[:, None], axis=1)[:, 0]
+
+        keep = np.flatnonzero(confidences >= ONNX_CONFIDENCE_THRESHOLD)
+        if keep.size == 0:
+            return empty
+
+        # cx, cy, w, h -> x, y, w, h (network input pixels)
+        boxes = output[keep, :4].astype(np.float32)
+        boxes[:, :2] -= boxes[:, 2:] / 2
+        confidences = confidences[keep].astype(np.float32)
+        class_ids = class_ids[keep].astype(np.int32)
+
+        keep = _nms_batched(boxes, confidences, class_ids, ONNX_CONFIDENCE_THRESHOLD, ONNX_IOU_THRESHOLD)
+        if keep.size == 0:
+            return empty
         boxes = boxes[keep]
-        confidences = confidences[keep]
-        class_ids = class_ids[keep]
 
-        if len(boxes) == 0:
-            return []
+        # Undo the letterbox, clamp to the frame, truncate to whole pixels
+        max_xy = np.array([frame_shape[1] - 1, frame_shape[0] - 1], dtype=np.float32)
+        offset = np.array(pad, dtype=np.float32)
+        xy1 = np.clip(np.trunc((boxes[:, :2] - offset) / ratio), 0, max_xy)
+        xy2 = np.clip(np.trunc((boxes[:, :2] + boxes[:, 2:] - offset) / ratio), 0, max_xy)
 
-        # xywh -> xyxy
-        xyxy = np.zeros_like(boxes)
-        xyxy[:, 0] = boxes[:, 0] - boxes[:, 2] / 2
-        xyxy[:, 1] = boxes[:, 1] - boxes[:, 3] / 2
-        xyxy[:, 2] = boxes[:, 0] + boxes[:, 2] / 2
-        xyxy[:, 3] = boxes[:, 1] + boxes[:, 3] / 2
+        rows = np.empty((keep.size, 6), dtype=np.float32)
+        rows[:, :2] = xy1
+        rows[:, 2:4] = np.maximum(xy2 - xy1, 0)
+        rows[:, 4] = confidences[keep]
+        rows[:, 5] = class_ids[keep]
+        return rows
 
-        keep_indices = self._nms(xyxy, confidences, ONNX_IOU_THRESHOLD)
-
-        detections = []
-        for idx in keep_indices:
-            class_id = int(class_ids[idx])
-            label = self._resolve_label(class_id)
-            if label is None:
-                continue
-
-            x1, y1, x2, y2 = xyxy[idx]
-            x1 = (x1 - pad[0]) / ratio
-            y1 = (y1 - pad[1]) / ratio
-            x2 = (x2 - pad[0]) / ratio
-            y2 = (y2 - pad[1]) / ratio
-
-            x1 = max(0, min(int(x1), frame.shape[1] - 1))
-            y1 = max(0, min(int(y1), frame.shape[0] - 1))
-            x2 = max(0, min(int(x2), frame.shape[1] - 1))
-            y2 = max(0, min(int(y2), frame.shape[0] - 1))
-
-            w = max(0, x2 - x1)
-            h = max(0, y2 - y1)
-
-            cx = x1 + w // 2
-            cy = y1 + h // 2
-
-            area = w * h
-            distance = estimate_distance(area)
-
-            detections.append(ObjectDetection(
-                found=True,
-                label=label,
-                confidence=float(confidences[idx]),
-                bbox=(x1, y1, w, h),
-                center=(cx, cy),
-                distance=distance,
-                method="onnx"
-            ))
-
-        return detections
-
-    def detect_yolo(self, frame: np.ndarray) -> List[ObjectDetection]:
+    def detect_yolo(self, frame: Union[FrameContext, np.ndarray]) -> List[ObjectDetection]:
         """
         Detect objects using YOLO
 
         Args:
-            frame: BGR image from camera
+            frame: BGR image from camera (or its FrameContext)
 
         Returns:
             List of ObjectDetection results
@@ -280,7 +621,7 @@ class ObjectDetector:
 
         # Run inference
         results = self.model(
-            frame,
+            FrameContext.wrap(frame).frame,
             conf=YOLO_CONFIDENCE_THRESHOLD,
             iou=YOLO_IOU_THRESHOLD,
             verbose=False
@@ -326,48 +667,51 @@ class ObjectDetector:
 
         return detections
 
-    def detect_color(self, frame: np.ndarray) -> Optional[ObjectDetection]:
+    def detect_color(self, frame: Union[FrameContext, np.ndarray]) -> Optional[ObjectDetection]:
         """
         Detect objects using color-based detection (fallback)
 
         Args:
-            frame: BGR image from camera
+            frame: BGR image from camera (or its FrameContext)
 
         Returns:
             Best ObjectDetection result or None
         """
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        labels = self._color_classifier.classify(FrameContext.wrap(frame).hsv)
+        frame_h, frame_w = labels.shape[:2]
 
         best_detection = None
         best_area = 0
 
-        # Check each grocery item color
-        for item_name, color_range in GROCERY_ITEM_COLORS.items():
-            mask = cv2.inRange(hsv, color_range["lower"], color_range["upper"])
-
-            # Morphological operations
-            kernel = np.ones((5, 5), np.uint8)
-            mask = cv2.erode(mask, kernel, iterations=1)
-            mask = cv2.dilate(mask, kernel, iterations=2)
-
-            # Find contours
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for class_id, item_name in enumerate(self._color_classifier.names, start=1):
+            mask = cv2.inRange(labels, class_id, class_id)
+            if not cv2.countNonZero(mask):
+                continue
 
-            if not contours:
+            # Erode + dilate each class's own binary mask (on a label image they
+            # would act as min/max filters and push one class into its neighbour),
+            # only inside the class's bounding box padded by the dilation reach
+            bx, by, bw, bh = cv2.boundingRect(mask)
+            rx, ry = max(bx - _MORPH_PAD, 0), max(by - _MORPH_PAD, 0)
+            rx1, ry1 = min(bx + bw + _MORPH_PAD, frame_w), min(by + bh + _MORPH_PAD, frame_h)
+            roi = cv2.erode(mask[ry:ry1, rx:rx1], _MORPH_KERNEL, iterations=1)
+            roi = cv2.dilate(roi, _MORPH_KERNEL, iterations=2)
+            # Not enough pixels in total for any blob to pass the area check
+            if cv2.countNonZero(roi) <= MIN_OBJECT_AREA:
                 continue
 
-            # Find largest contour for this item
-            largest_contour = max(contours, key=cv2.contourArea)
-            area = cv2.contourArea(largest_contour)
+            n, _, stats, centroids = cv2.connectedComponentsWithStatsWithAlgorithm(
+                roi, 8, cv2.CV_32S, cv2.CCL_GRANA
+            )
+            if n <= 1:
+                continue
 
+            largest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+            area = int(stats[largest, cv2.CC_STAT_AREA])
             if area > MIN_OBJECT_AREA and area > best_area:
-                M = cv2.moments(largest_contour)
-                if M["m00"] == 0:
-                    continue
-
-                cx = int(M["m10"] / M["m00"])
-                cy = int(M["m01"] / M["m00"])
-                x, y, w, h = cv2.boundingRect(largest_contour)
+                x, y, w, h = (int(v) for v in stats[largest, :4])
+                cx, cy = (int(v) for v in centroids[largest])
+                x, y, cx, cy = x + rx, y + ry, cx + rx, cy + ry
 
                 best_area = area
                 best_detection = ObjectDetection(
@@ -382,43 +726,88 @@ class ObjectDetector:
 
         return best_detection
 
-    def detect(self, frame: np.ndarray, max_results: int = 5) -> List[ObjectDetection]:
+    def detect(self, frame: Union[FrameContext, np.ndarray], max_results: int = 5) -> List[ObjectDetection]:
         """
         Detect objects using best available method
 
         Args:
-            frame: BGR image from camera
+            frame: BGR image from camera (or its FrameContext; results are
+                   memoized on the context so a frame is only detected once)
             max_results: Maximum number of detections to return
 
         Returns:
             List of ObjectDetection results
         """
-        # Try ONNX first
+        ctx = FrameContext.wrap(frame)
+
+        # Try ONNX first; only the returned rows become ObjectDetections
         if self.onnx_available:
-            detections = self.detect_onnx(frame)
-            detections = sorted(detections, key=lambda d: d.confidence, reverse=True)
-            return detections[:max_results]
+            return self.to_detections(self.detect_records(ctx)[:max_results])
 
+        return ctx.memo("objects", lambda: self._detect_all(ctx))[:max_results]
+
+    def _detect_all(self, ctx: FrameContext) -> List[ObjectDetection]:
+        """All YOLO or color detections for the frame, best first"""
         # Try YOLO next
         if self.yolo_available:
-            detections = self.detect_yolo(frame)
-            # Sort by confidence and limit results
-            detections = sorted(detections, key=lambda d: d.confidence, reverse=True)
-            return detections[:max_results]
+            detections = self.detect_yolo(ctx)
+            # Sort by confidence
+            return sorted(detections, key=lambda d: d.confidence, reverse=True)
 
         # Fallback to color detection
-        detection = self.detect_color(frame)
+        detection = self.detect_color(ctx)
         return [detection] if detection else []
 
-    def get_best_detection(self, frame: np.ndarray) -> Optional[ObjectDetection]:
+    def get_best_detection(self, frame: Union[FrameContext, np.ndarray]) -> Optional[ObjectDetection]:
         """
         Get single best detection from frame
 
         Args:
-            frame: BGR image from camera
+            frame: BGR image from camera (or its FrameContext)
 
         Returns:
             Best ObjectDetection or None
         """
         detections = self.detect(frame, max_results=1)
         return detections[0] if detections else None
+
+
+def resolve_model_choice(model_choice: str, quantized: bool = False) -> str:
+    """
+    Pick the ONNX_MODELS key to load
+
+    Args:
+        model_choice: Requested key (an "_int8" key is used as given)
+        quantized: Prefer the INT8 variant when it is registered and its file exists
+
+    Returns:
+        model_choice or its INT8 variant
+    """
+    if not quantized or model_choice.endswith(ONNX_QUANTIZED_SUFFIX):
+        return model_choice
+
+    variant = model_choice + ONNX_QUANTIZED_SUFFIX
+    entry = ONNX_MODELS.get(variant)
+    if entry is None or not (_BASE_DIR / entry["path"]).exists():
+        print(f"⚠ No quantized variant of {model_choice}, using FP32 (run quantize_models.py)")
+        return model_choice
+    return variant
+
+
+def _nms_batched(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray,
+                 score_threshold: float, iou_threshold: float) -> np.ndarray:
+    """
+    Class-aware NMS over (x, y, w, h) boxes
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    if hasattr(cv2.dnn, "NMSBoxesBatched"):
+        keep = cv2.dnn.NMSBoxesBatched(boxes, scores, class_ids, score_threshold, iou_threshold)
+    else:
+        # OpenCV < 4.7: shift each class to its own region so boxes of
+        # different classes never overlap, then run plain NMS
+        shifted = boxes.copy()
+        shifted[:, :2] += class_ids[:, None] * (boxes[:, :2] + boxes[:, 2:]).max()
+        keep = cv2.dnn.NMSBoxes(shifted, scores, score_threshold, iou_threshold)
+    return np.asarray(keep, dtype=np.int64).reshape(-1)
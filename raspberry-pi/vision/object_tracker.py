@@ -0,0 +1,379 @@
+"""
+Object Tracker - SORT-style multi-object tracking for SCAN mode
+Detections are associated to tracks by IoU (same label only) so items keep
+stable IDs. Between detector runs each track is moved with sparse Lucas-Kanade
+optical flow on a few corner points inside its box (constant-velocity motion
+when flow fails). The tracker asks for a new detector run when a track has
+coasted too long, its confidence has decayed, or the flow of the selected
+or a just-detected track was lost.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .object_detector import ObjectDetection
+from .config import (
+    TRACK_IOU_THRESHOLD, TRACK_MAX_MISSES, TRACK_REDETECT_INTERVAL_S,
+    TRACK_MIN_CONFIDENCE, TRACK_CONFIDENCE_HALF_LIFE_S, TRACK_SWITCH_MARGIN,
+    TRACK_FLOW_POINTS, TRACK_FLOW_MIN_POINTS, estimate_distance
+)
+
+_LK_PARAMS = dict(
+    winSize=(15, 15),
+    maxLevel=2,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03),
+)
+
+
+@dataclass
+class ObjectTrack:
+    """One tracked item"""
+    track_id: int
+    label: str
+    bbox: np.ndarray                 # float (x, y, w, h)
+    confidence: float                # Detector confidence, decayed while coasting
+    detection_confidence: float      # Confidence at the last detector match
+    method: str                      # Detector that produced the track ("onnx", "yolo", "color")
+    last_detection_ts: float         # Capture time of the last detector match
+    timestamp: float                 # Capture time of bbox
+    velocity: np.ndarray = field(default_factory=lambda: np.zeros(2))  # Center px/s
+    hits: int = 1                    # Detector matches
+    misses: int = 0                  # Consecutive detector runs without a match
+    flow_ok: bool = True             # Has enough flow points to follow (last sampling / propagation)
+    flow_lost: bool = False          # Flow failed since the last detector run (asks for one re-detect)
+    points: Optional[np.ndarray] = None  # (N, 1, 2) float32 flow points
+
+    @property
+    def center(self) -> Tuple[float, float]:
+        x, y, w, h = self.bbox
+        return x + w / 2, y + h / 2
+
+    def to_detection(self) -> ObjectDetection:
+        """ObjectDetection for this track (method "track" unless detected on this frame)"""
+        tracked = self.last_detection_ts < self.timestamp
+        x, y, w, h = (int(round(v)) for v in self.bbox)
+        return ObjectDetection(
+            found=True,
+            label=self.label,
+            confidence=float(self.confidence),
+            bbox=(x, y, w, h),
+            center=(x + w // 2, y + h // 2),
+            distance=estimate_distance(w * h),
+            method="track" if tracked else self.method,
+            track_id=self.track_id,
+        )
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of (N, 4) and (M, 4) xywh boxes"""
+    ax1, ay1 = a[:, 0:1], a[:, 1:2]
+    ax2, ay2 = ax1 + a[:, 2:3], ay1 + a[:, 3:4]
+    bx1, by1 = b[:, 0], b[:, 1]
+    bx2, by2 = bx1 + b[:, 2], by1 + b[:, 3]
+    w = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0, None)
+    h = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0, None)
+    inter = w * h
+    union = a[:, 2:3] * a[:, 3:4] + b[:, 2] * b[:, 3] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+class ObjectTracker:
+    """IoU-associated tracks propagated with optical flow between detector runs"""
+
+    def __init__(
+        self,
+        iou_threshold: float = TRACK_IOU_THRESHOLD,
+        max_misses: int = TRACK_MAX_MISSES,
+        redetect_interval_s: float = TRACK_REDETECT_INTERVAL_S,
+        min_confidence: float = TRACK_MIN_CONFIDENCE,
+        half_life_s: float = TRACK_CONFIDENCE_HALF_LIFE_S,
+    ):
+        """
+        Args:
+            iou_threshold: Minimum IoU to match a detection to a track
+            max_misses: Detector runs a track may go unmatched before it is dropped
+            redetect_interval_s: Longest a track may coast on flow alone
+            min_confidence: Re-detect when the selected track decays below this
+            half_life_s: Confidence half-life while coasting
+        """
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.redetect_interval_s = redetect_interval_s
+        self.min_confidence = min_confidence
+        self.half_life_s = half_life_s
+
+        self.counts: Counter = Counter()  # detect / propagate runs and re-detect reasons
+        self._next_id = 1
+        self.reset()
+
+    def reset(self) -> None:
+        self.tracks: List[ObjectTrack] = []
+        self.selected_id: Optional[int] = None
+        self._prev_gray: Optional[np.ndarray] = None
+        self._timestamp: Optional[float] = None
+
+    def needs_detection(self, timestamp: float) -> Tuple[bool, str]:
+        """
+        Whether the next frame should run the detector
+
+        Returns:
+            (needed, reason)
+        """
+        if not self.tracks:
+            return True, "no tracks"
+        # Only tracks that matter: the reported one and those the last detector
+        # run confirmed (a dying unmatched track must not force re-detection)
+        if any(t.flow_lost for t in self.tracks if t.track_id == self.selected_id or t.misses == 0):
+            return True, "flow lost"
+        oldest = min(t.last_detection_ts for t in self.tracks)
+        if timestamp - oldest >= self.redetect_interval_s:
+            return True, "track aged out"
+        selected = self.best()
+        if selected is not None and self._decayed(selected, timestamp) < self.min_confidence:
+            return True, "confidence dropped"
+        return False, "tracking"
+
+    def update(self, detections: Sequence[ObjectDetection], gray: np.ndarray, timestamp: float) -> List[ObjectTrack]:
+        """
+        Associate a detector run with the tracks
+
+        Args:
+            detections: All detections for the frame
+            gray: Grayscale frame (kept for the next optical flow step, so it
+                  must not be modified afterwards)
+            timestamp: Capture time of the frame
+
+        Returns:
+            Current tracks
+        """
+        self.counts["detect"] += 1
+        dt = self._dt(timestamp)
+        for track in self.tracks:
+            self._coast(track, dt)
+
+        detections = [d for d in detections if d.found and d.bbox is not None]
+        det_boxes = np.array([d.bbox for d in detections], dtype=np.float64).reshape(-1, 4)
+        matched_tracks, matched_dets = set(), set()
+
+        if self.tracks and detections:
+            iou = iou_matrix(np.array([t.bbox for t in self.tracks]), det_boxes)
+            same_label = np.array([[t.label == d.label for d in detections] for t in self.tracks])
+            iou = np.where(same_label, iou, 0.0)
+
+            # Greedy assignment, best overlap first
+            for flat in np.argsort(-iou, axis=None):
+                ti, di = np.unravel_index(flat, iou.shape)
+                if iou[ti, di] < self.iou_threshold:
+                    break
+                if ti in matched_tracks or di in matched_dets:
+                    continue
+                matched_tracks.add(ti)
+                matched_dets.add(di)
+                self._correct(self.tracks[ti], detections[di], gray, timestamp, dt)
+
+        survivors = []
+        for i, track in enumerate(self.tracks):
+            if i not in matched_tracks:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    continue
+                track.confidence = self._decayed(track, timestamp)
+                track.points = self._sample_points(gray, track.bbox)
+                track.flow_ok = self._has_flow(track.points)
+            track.flow_lost = False  # This detector run answered it
+            survivors.append(track)
+
+        for i, detection in enumerate(detections):
+            if i not in matched_dets:
+                survivors.append(self._new_track(detection, gray, timestamp))
+
+        self.tracks = survivors
+        self._set_frame(gray, timestamp)
+        return self.tracks
+
+    def propagate(self, gray: np.ndarray, timestamp: float) -> List[ObjectTrack]:
+        """
+        Move tracks to a frame the detector did not run on
+
+        Returns:
+            Current tracks
+        """
+        self.counts["propagate"] += 1
+        if not self.tracks or self._prev_gray is None:
+            self._set_frame(gray, timestamp)
+            return self.tracks
+
+        dt = self._dt(timestamp)
+        h, w = gray.shape[:2]
+
+        with_points = [t for t in self.tracks if t.points is not None and len(t.points)]
+        moved = set()
+        if with_points:
+            p0 = np.concatenate([t.points for t in with_points])
+            p1, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, p0, None, **_LK_PARAMS)
+            status = status.reshape(-1).astype(bool)
+
+            start = 0
+            for track in with_points:
+                n = len(track.points)
+                ok = status[start:start + n]
+                old, new = track.points[ok], p1[start:start + n][ok]
+                start += n
+                if len(new) >= TRACK_FLOW_MIN_POINTS:
+                    self._apply_flow(track, old.reshape(-1, 2), new.reshape(-1, 2), dt)
+                    track.points = new.reshape(-1, 1, 2)
+                    moved.add(track.track_id)
+
+        survivors = []
+        for track in self.tracks:
+            if track.track_id not in moved:
+                self._coast(track, dt)
+                if track.flow_ok:
+                    # Had flow until now; a box without features (e.g. a
+                    # textureless color blob) just coasts
+                    track.flow_lost = True
+                track.flow_ok = False
+                track.points = None
+            track.timestamp = timestamp
+            track.confidence = self._decayed(track, timestamp)
+
+            x, y, bw, bh = track.bbox
+            if x + bw <= 0 or y + bh <= 0 or x >= w or y >= h:
+                continue  # Left the frame
+            survivors.append(track)
+
+        self.tracks = survivors
+        self._set_frame(gray, timestamp)
+        return self.tracks
+
+    def best(self) -> Optional[ObjectTrack]:
+        """
+        Track to report, sticking with the previous choice unless another
+        track is more confident by TRACK_SWITCH_MARGIN
+        """
+        if not self.tracks:
+            self.selected_id = None
+            return None
+
+        best = max(self.tracks, key=lambda t: t.confidence)
+        current = next((t for t in self.tracks if t.track_id == self.selected_id), None)
+        if current is not None and current.confidence + TRACK_SWITCH_MARGIN >= best.confidence:
+            best = current
+        self.selected_id = best.track_id
+        return best
+
+    def stats(self) -> dict:
+        return {"tracks": len(self.tracks), "counts": dict(self.counts)}
+
+    def format_stats(self) -> str:
+        """One-line summary for logging"""
+        runs = self.counts["detect"] + self.counts["propagate"]
+        detect_pct = 100.0 * self.counts["detect"] / runs if runs else 0.0
+        reasons = ", ".join(f"{k}={v}" for k, v in sorted(self.counts.items()) if k.startswith("redetect:"))
+        return f"{len(self.tracks)} tracks | detector on {detect_pct:.0f}% of tracked frames | {reasons}"
+
+    def note_redetect(self, reason: str) -> None:
+        """Count why a detector run was requested"""
+        self.counts[f"redetect:{reason}"] += 1
+
+    # Internals
+
+    def _dt(self, timestamp: float) -> float:
+        return max(timestamp - self._timestamp, 0.0) if self._timestamp is not None else 0.0
+
+    def _set_frame(self, gray: np.ndarray, timestamp: float) -> None:
+        self._prev_gray = gray
+        self._timestamp = timestamp
+
+    def _decayed(self, track: ObjectTrack, timestamp: float) -> float:
+        age = max(timestamp - track.last_detection_ts, 0.0)
+        return track.detection_confidence * 0.5 ** (age / self.half_life_s)
+
+    @staticmethod
+    def _coast(track: ObjectTrack, dt: float) -> None:
+        """Constant-velocity motion model"""
+        track.bbox[:2] += track.velocity * dt
+
+    @staticmethod
+    def _apply_flow(track: ObjectTrack, old: np.ndarray, new: np.ndarray, dt: float) -> None:
+        """Median translation and scale of the track's flow points"""
+        shift = np.median(new - old, axis=0)
+        scale = 1.0
+        if len(old) >= 2:
+            d_old = np.linalg.norm(old - old.mean(axis=0), axis=1)
+            d_new = np.linalg.norm(new - new.mean(axis=0), axis=1)
+            valid = d_old > 1.0
+            if valid.any():
+                scale = float(np.clip(np.median(d_new[valid] / d_old[valid]), 0.8, 1.25))
+
+        cx, cy = track.center
+        cx, cy = cx + shift[0], cy + shift[1]
+        bw, bh = track.bbox[2] * scale, track.bbox[3] * scale
+        track.bbox = np.array([cx - bw / 2, cy - bh / 2, bw, bh])
+        if dt > 0:
+            track.velocity = 0.5 * track.velocity + 0.5 * shift / dt
+        track.flow_ok = True
+
+    def _correct(self, track: ObjectTrack, detection: ObjectDetection, gray: np.ndarray,
+                 timestamp: float, dt: float) -> None:
+        """Snap a matched track to its detection"""
+        bbox = np.array(detection.bbox, dtype=np.float64)
+        if dt > 0:
+            old_center = np.array(track.center)
+            new_center = bbox[:2] + bbox[2:] / 2
+            track.velocity = 0.5 * track.velocity + 0.5 * (new_center - old_center) / dt
+        track.bbox = bbox
+        track.confidence = track.detection_confidence = detection.confidence
+        track.method = detection.method
+        track.last_detection_ts = track.timestamp = timestamp
+        track.hits += 1
+        track.misses = 0
+        track.points = self._sample_points(gray, bbox)
+        track.flow_ok = self._has_flow(track.points)
+
+    def _new_track(self, detection: ObjectDetection, gray: np.ndarray, timestamp: float) -> ObjectTrack:
+        bbox = np.array(detection.bbox, dtype=np.float64)
+        track = ObjectTrack(
+            track_id=self._next_id,
+            label=detection.label,
+            bbox=bbox,
+            confidence=detection.confidence,
+            detection_confidence=detection.confidence,
+            method=detection.method,
+            last_detection_ts=timestamp,
+            timestamp=timestamp,
+            points=self._sample_points(gray, bbox),
+        )
+        track.flow_ok = self._has_flow(track.points)
+        self._next_id += 1
+        return track
+
+    @staticmethod
+    def _has_flow(points: Optional[np.ndarray]) -> bool:
+        """Enough points for optical flow to move a box"""
+        return points is not None and len(points) >= TRACK_FLOW_MIN_POINTS
+
+    @staticmethod
+    def _sample_points(gray: np.ndarray, bbox: np.ndarray) -> Optional[np.ndarray]:
+        """Corner features inside the (slightly shrunk) box, in frame coordinates"""
+        h, w = gray.shape[:2]
+        x, y, bw, bh = bbox
+        x0 = int(max(x + bw * 0.1, 0))
+        y0 = int(max(y + bh * 0.1, 0))
+        x1 = int(min(x + bw * 0.9, w))
+        y1 = int(min(y + bh * 0.9, h))
+        if x1 - x0 < 4 or y1 - y0 < 4:
+            return None
+
+        points = cv2.goodFeaturesToTrack(
+            gray[y0:y1, x0:x1], maxCorners=TRACK_FLOW_POINTS, qualityLevel=0.01, minDistance=3
+        )
+        if points is None:
+            return None
+        points[:, 0, 0] += x0
+        points[:, 0, 1] += y0
+        return points.astype(np.float32)
@@ -0,0 +1,219 @@
+"""
+Person Detectors - Interchangeable person search backends for FallDetector
+Each backend finds the largest person in an image. FallDetector picks the
+image (pyramid level, grayscale or color) through image_for() and only
+crops to an ROI around the last person box when supports_roi is set.
+
+    hog  - OpenCV's default HOG people detector (upright people only)
+    mog2 - Largest foreground blob from MOG2 background subtraction; catches
+           people lying down, but only while the camera is stationary
+    onnx - Person model from ONNX_MODELS, run through ObjectDetector's session
+"""
+
+from pathlib import Path
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .frame_context import FrameContext
+from .config import (
+    FALL_HOG_SCALE,
+    FALL_MOG2_HISTORY,
+    FALL_MOG2_VAR_THRESHOLD,
+    FALL_MOG2_MIN_AREA_FRACTION,
+    FALL_MOG2_WARMUP_FRAMES,
+    FALL_ONNX_MODEL,
+    ONNX_MODELS,
+)
+
+_BASE_DIR = Path(__file__).resolve().parents[1]
+
+Box = Tuple[int, int, int, int]  # (x, y, w, h)
+
+
+class PersonDetector:
+    """Base class: find the largest person in an image"""
+
+    name = "base"
+    supports_roi = False  # detect() may be given a crop of the image
+
+    def image_for(self, ctx: FrameContext, level: int) -> Tuple[np.ndarray, int]:
+        """
+        Image to search for a frame at the requested pyramid level
+
+        Returns:
+            (image, scale from image to frame pixels)
+        """
+        if level <= 0:
+            return ctx.frame, 1
+        return ctx.pyramid(level), 2 ** level
+
+    def detect(self, image: np.ndarray) -> Optional[Box]:
+        """Largest person in image coordinates (None if nobody found)"""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Forget state carried between frames"""
+
+    def close(self) -> None:
+        """Release models and sessions"""
+
+
+class HogPersonDetector(PersonDetector):
+    """OpenCV's default HOG + linear SVM people detector"""
+
+    name = "hog"
+    supports_roi = True
+
+    def __init__(self, hog_scale: float = FALL_HOG_SCALE):
+        """
+        Args:
+            hog_scale: detectMultiScale pyramid step
+        """
+        self.hog_scale = hog_scale
+        self.hog = cv2.HOGDescriptor()
+        self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+
+    def detect(self, image: np.ndarray) -> Optional[Box]:
+        boxes, _ = self.hog.detectMultiScale(
+            image,
+            winStride=(8, 8),
+            padding=(8, 8),
+            scale=self.hog_scale,
+        )
+        if boxes is None or len(boxes) == 0:
+            return None
+
+        # Pick the largest detected person
+        x, y, w, h = max(boxes, key=lambda b: b[2] * b[3])
+        return int(x), int(y), int(w), int(h)
+
+
+class Mog2PersonDetector(PersonDetector):
+    """Largest moving blob against a learned background (stationary cart only)"""
+
+    name = "mog2"
+
+    def __init__(
+        self,
+        history: int = FALL_MOG2_HISTORY,
+        var_threshold: float = FALL_MOG2_VAR_THRESHOLD,
+        min_area_fraction: float = FALL_MOG2_MIN_AREA_FRACTION,
+        warmup_frames: int = FALL_MOG2_WARMUP_FRAMES,
+    ):
+        """
+        Args:
+            history: Frames the background model averages over (at the fall
+                     detection rate, not the camera rate)
+            var_threshold: Squared Mahalanobis distance for a foreground pixel
+            min_area_fraction: Smallest blob, as a fraction of the image area
+            warmup_frames: Frames learned before blobs are reported
+        """
+        self.history = history
+        self.var_threshold = var_threshold
+        self.min_area_fraction = min_area_fraction
+        self.warmup_frames = warmup_frames
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        self.reset()
+
+    def reset(self) -> None:
+        self._subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=self.history, varThreshold=self.var_threshold, detectShadows=False
+        )
+        self._frames = 0
+
+    def image_for(self, ctx: FrameContext, level: int) -> Tuple[np.ndarray, int]:
+        # Grayscale at every level: a third of the work and no color noise
+        return ctx.pyramid(level), 2 ** max(level, 0)
+
+    def detect(self, image: np.ndarray) -> Optional[Box]:
+        self._frames += 1
+        if self._frames <= self.warmup_frames:
+            self._subtractor.apply(image)
+            return None
+        # MOG2's automatic rate (1 / frames seen) would absorb someone lying
+        # still within seconds of startup; learn at the full-history rate
+        mask = self._subtractor.apply(image, learningRate=1.0 / self.history)
+
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self._kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self._kernel, iterations=2)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        if count <= 1:
+            return None
+
+        # Label 0 is the background
+        best = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+        if stats[best, cv2.CC_STAT_AREA] < self.min_area_fraction * image.shape[0] * image.shape[1]:
+            return None
+        x, y, w, h = stats[best, :4]
+        return int(x), int(y), int(w), int(h)
+
+
+class OnnxPersonDetector(PersonDetector):
+    """Person class of an ONNX detection model, through ObjectDetector"""
+
+    name = "onnx"
+
+    def __init__(self, model_choice: str = FALL_ONNX_MODEL):
+        """
+        Args:
+            model_choice: Key into ONNX_MODELS; its class_names should keep
+                          only the person class
+        """
+        from .object_detector import ObjectDetector
+
+        self.model_choice = model_choice
+        # In-process session: fall detection already runs on its own stage thread
+        self.detector = ObjectDetector(use_yolo=True, use_worker=False, model_choice=model_choice)
+
+    @property
+    def available(self) -> bool:
+        return self.detector.onnx_available
+
+    def image_for(self, ctx: FrameContext, level: int) -> Tuple[np.ndarray, int]:
+        # The letterbox resizes to the model input anyway
+        return ctx.frame, 1
+
+    def detect(self, image: np.ndarray) -> Optional[Box]:
+        records = self.detector.detect_records(image)
+        if len(records) == 0:
+            return None
+        areas = records["bbox"][:, 2] * records["bbox"][:, 3]
+        x, y, w, h = records["bbox"][int(np.argmax(areas))]
+        return int(x), int(y), int(w), int(h)
+
+    def close(self) -> None:
+        self.detector.close()
+
+
+PERSON_DETECTORS = {
+    HogPersonDetector.name: HogPersonDetector,
+    Mog2PersonDetector.name: Mog2PersonDetector,
+    OnnxPersonDetector.name: OnnxPersonDetector,
+}
+
+
+def create_person_detector(name: str, hog_scale: float = FALL_HOG_SCALE) -> PersonDetector:
+    """
+    Build a backend by name, falling back to HOG if the ONNX model cannot load
+
+    Args:
+        name: Key into PERSON_DETECTORS
+        hog_scale: detectMultiScale pyramid step for the HOG backend
+    """
+    if name not in PERSON_DETECTORS:
+        raise ValueError(f"Unknown person detector '{name}' (available: {', '.join(PERSON_DETECTORS)})")
+    if name == HogPersonDetector.name:
+        return HogPersonDetector(hog_scale)
+    if name == OnnxPersonDetector.name:
+        # Checked up front so ObjectDetector does not fall back to loading YOLO
+        cfg = ONNX_MODELS.get(FALL_ONNX_MODEL)
+        if cfg is not None and (_BASE_DIR / cfg["path"]).exists():
+            detector = OnnxPersonDetector(FALL_ONNX_MODEL)
+            if detector.available:
+                return detector
+            detector.close()
+        print(f"⚠ ONNX person model '{FALL_ONNX_MODEL}' unavailable, fall detection using HOG")
+        return HogPersonDetector(hog_scale)
+    return PERSON_DETECTORS[name]()
@@ -4,9 +4,10 @@ Person Tracker - Color-based marker detection for following
 
 import cv2
 import numpy as np
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 from dataclasses import dataclass
 from collections import deque
+from .frame_context import FrameContext
 from .config import (
     PERSON_MARKER_COLORS, DEFAULT_MARKER,
     MIN_CONTOUR_AREA, estimate_distance
@@ -53,26 +54,26 @@ class PersonTracker:
 
         print(f"✓ PersonTracker initialized (marker: {marker_color})")
 
-    def calibrate(self, frame: np.ndarray) -> bool:
+    def calibrate(self, frame: Union[FrameContext, np.ndarray]) -> bool:
         """
         Calibrate to the marker color in center of frame
 
         Args:
-            frame: BGR image from camera
+            frame: BGR image from camera (or its FrameContext)
 
         Returns:
             True if calibration successful
         """
-        h, w = frame.shape[:2]
+        hsv = FrameContext.wrap(frame).hsv
+        h, w = hsv.shape[:2]
 
         # Get center region (100x100 pixels)
-        center_region = frame[h//2-50:h//2+50, w//2-50:w//2+50]
+        hsv_region = hsv[h//2-50:h//2+50, w//2-50:w//2+50]
 
-        if center_region.size == 0:
+        if hsv_region.size == 0:
             return False
 
-        # Convert to HSV and get average color
-        hsv_region = cv2.cvtColor(center_region, cv2.COLOR_BGR2HSV)
+        # Average color of the center region
         avg_hsv = np.mean(hsv_region, axis=(0, 1))
 
         # Set bounds with tolerance
@@ -84,19 +85,20 @@ class PersonTracker:
         print(f"✓ Calibrated to HSV: {avg_hsv}")
         return True
 
-    def detect(self, frame: np.ndarray) -> PersonDetection:
+    def detect(self, frame: Union[FrameContext, np.ndarray]) -> PersonDetection:
         """
         Detect person marker in frame
 
         Args:
-            frame: BGR image from camera
+            frame: BGR image from camera (or its FrameContext)
 
         Returns:
             PersonDetection result
         """
-        # Convert to HSV
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        ctx = FrameContext.wrap(frame)
+        return ctx.memo("person", lambda: self._detect(ctx.hsv))
 
+    def _detect(self, hsv: np.ndarray) -> PersonDetection:
         # Create mask for target color
         mask = cv2.inRange(hsv, self.hsv_lower, self.hsv_upper)
 
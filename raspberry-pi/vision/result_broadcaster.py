@@ -0,0 +1,129 @@
+"""
+Result Broadcaster - Versioned latest-value slot for processed frames
+Any number of readers can peek at the newest result, wait for one newer than
+a version they have seen, or subscribe to a stream. Reading never consumes,
+so slow readers cannot steal results from (or starve) fast ones.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+from .frame_pool import FrameRef
+
+
+@dataclass
+class PublishedResult:
+    """
+    One processed frame as seen by a reader
+
+    The reader owns frame_ref and must release it (or use the object as a
+    context manager) once it is done with the pixels.
+    """
+    version: int
+    frame_ref: FrameRef
+    result: Any  # VisionResult
+    capture_time: float = 0.0  # ms
+    process_time: float = 0.0  # ms
+
+    def release(self) -> None:
+        self.frame_ref.release()
+
+    def __enter__(self) -> "PublishedResult":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class ResultBroadcaster:
+    """Single-writer, multi-reader publication slot holding the newest result"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._current: Optional[PublishedResult] = None
+        self._version = 0
+        self._closed = False
+
+    @property
+    def version(self) -> int:
+        """Version of the newest published result (0 = nothing yet)"""
+        return self._version
+
+    def publish(self, frame_ref: FrameRef, result: Any, capture_time: float = 0.0, process_time: float = 0.0) -> int:
+        """
+        Replace the current result; takes ownership of frame_ref
+
+        Returns:
+            New version number
+        """
+        with self._cond:
+            old = self._current
+            self._version += 1
+            self._current = PublishedResult(self._version, frame_ref, result, capture_time, process_time)
+            self._cond.notify_all()
+            version = self._version
+
+        # Drop the slot's reference to the previous frame outside the lock;
+        # readers that copied it hold their own references.
+        if old is not None:
+            old.release()
+        return version
+
+    def _snapshot(self) -> Optional[PublishedResult]:
+        # Caller holds self._cond
+        current = self._current
+        if current is None:
+            return None
+        return PublishedResult(
+            current.version,
+            current.frame_ref.retain(),
+            current.result,
+            current.capture_time,
+            current.process_time,
+        )
+
+    def latest(self) -> Optional[PublishedResult]:
+        """Newest result without blocking (None before the first publish)"""
+        with self._cond:
+            return self._snapshot()
+
+    def wait_newer(self, version: int, timeout: Optional[float] = None) -> Optional[PublishedResult]:
+        """
+        Block until a result newer than `version` is published
+
+        Returns:
+            The newest result, or None on timeout/close
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._version > version or self._closed, timeout):
+                return None
+            if self._version <= version:
+                return None
+            return self._snapshot()
+
+    def subscribe(self, timeout: Optional[float] = None) -> Iterator[PublishedResult]:
+        """
+        Stream of results, newest-only
+
+        A subscriber that falls behind skips straight to the newest result
+        instead of queueing. The stream ends on close() or timeout.
+        """
+        seen = 0
+        while True:
+            published = self.wait_newer(seen, timeout)
+            if published is None:
+                return
+            seen = published.version
+            yield published
+
+    def close(self) -> None:
+        """Wake all waiters and release the held frame"""
+        with self._cond:
+            self._closed = True
+            old = self._current
+            self._current = None
+            self._cond.notify_all()
+        if old is not None:
+            old.release()
@@ -0,0 +1,259 @@
+"""
+Safety Events - Priority bus for alerts that must reach the app immediately
+Falls, emergency stops, lost targets and obstacles are published from any
+thread and handed straight to subscribers (the websocket server pushes them
+to every client) instead of waiting for the next status broadcast. Events are
+numbered; those that need an acknowledgement stay pending until a client acks
+them, and trigger -> dispatch -> ack latency is measured per event.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from .latency import LatencyTracker, STAGE_ALERT_DISPATCH, STAGE_ALERT_ACK, STAGE_ALERT_E2E
+from .config import (
+    SAFETY_EVENT_PRIORITY,
+    SAFETY_EVENT_REQUIRE_ACK,
+    SAFETY_EVENT_MIN_INTERVAL_S,
+    SAFETY_ACK_RESEND_S,
+    SAFETY_ACK_MAX_RESENDS,
+    SAFETY_EVENT_HISTORY,
+)
+
+logger = logging.getLogger(__name__)
+
+# Event kinds
+EVENT_FALL = "fall"
+EVENT_EMERGENCY_STOP = "emergency_stop"
+EVENT_TARGET_LOST = "target_lost"
+EVENT_OBSTACLE = "obstacle"
+
+
+@dataclass
+class SafetyEvent:
+    """One alert and its delivery state (times are time.monotonic())"""
+    seq: int
+    kind: str
+    priority: int              # Lower is more urgent
+    message: str = ""
+    data: dict = field(default_factory=dict)
+    requires_ack: bool = True
+    trigger_ts: float = 0.0    # When the cause was observed (frame capture time)
+    published: float = 0.0
+    timestamp: str = ""        # Wall-clock publish time for the app
+    dispatched: float = 0.0    # First sent to every connected client
+    last_sent: float = 0.0
+    sends: int = 0
+    acked: float = 0.0
+    acked_by: str = ""
+
+    @property
+    def pending(self) -> bool:
+        """Still waiting for an acknowledgement"""
+        return self.requires_ack and not self.acked
+
+    def to_message(self) -> dict:
+        """websocket "safety_event" message"""
+        return {
+            "type": "safety_event",
+            "seq": self.seq,
+            "event": self.kind,
+            "priority": self.priority,
+            "message": self.message,
+            "data": self.data,
+            "requires_ack": self.requires_ack,
+            "resend": self.sends,       # Earlier deliveries of this event
+            "timestamp": self.timestamp,
+        }
+
+    def latencies_ms(self) -> Dict[str, float]:
+        """Delivery latencies known so far"""
+        start = self.trigger_ts or self.published
+        out = {"detect_to_publish": (self.published - start) * 1000}
+        if self.dispatched:
+            out["dispatch"] = (self.dispatched - self.published) * 1000
+        if self.acked:
+            out["ack"] = (self.acked - self.published) * 1000
+            out["end_to_end"] = (self.acked - start) * 1000
+        return out
+
+
+class SafetyEventBus:
+    """Thread-safe publisher of numbered safety events with ack tracking"""
+
+    def __init__(
+        self,
+        latency: Optional[LatencyTracker] = None,
+        history: int = SAFETY_EVENT_HISTORY,
+        min_interval_s: float = SAFETY_EVENT_MIN_INTERVAL_S,
+    ):
+        """
+        Args:
+            latency: Tracker that receives the alert_* stage latencies
+            history: Recent events kept for acks, new clients and stats
+            min_interval_s: Repeats of one kind within this are dropped
+        """
+        self.latency = latency
+        self.min_interval_s = min_interval_s
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._events: Deque[SafetyEvent] = deque(maxlen=history)
+        self._last_by_kind: Dict[str, float] = {}
+        self._subscribers: List[Callable[[SafetyEvent], None]] = []
+        self.counts: Counter = Counter()  # Published / suppressed per kind
+
+    def subscribe(self, callback: Callable[[SafetyEvent], None]) -> Callable[[], None]:
+        """
+        Call callback(event) on every publish, on the publishing thread
+        (callbacks must only hand the event off, e.g. to an event loop)
+
+        Returns:
+            Function that removes the subscription
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def publish(self, kind: str, message: str = "", data: Optional[dict] = None,
+                trigger_ts: float = 0.0, force: bool = False) -> Optional[SafetyEvent]:
+        """
+        Publish an event from any thread
+
+        Args:
+            kind: EVENT_* name
+            message: Human-readable text for the app
+            data: Extra JSON-serializable fields
+            trigger_ts: time.monotonic() when the cause was observed
+                        (0 = now); measured latency starts here
+            force: Publish even within min_interval_s of the last one
+
+        Returns:
+            The event, or None if it was suppressed as a repeat
+        """
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_by_kind.get(kind)
+            if not force and last is not None and now - last < self.min_interval_s:
+                self.counts[f"{kind}_suppressed"] += 1
+                return None
+            self._last_by_kind[kind] = now
+            self._seq += 1
+            event = SafetyEvent(
+                seq=self._seq,
+                kind=kind,
+                priority=SAFETY_EVENT_PRIORITY.get(kind, len(SAFETY_EVENT_PRIORITY)),
+                message=message,
+                data=data or {},
+                requires_ack=kind in SAFETY_EVENT_REQUIRE_ACK,
+                trigger_ts=trigger_ts if trigger_ts and trigger_ts <= now else now,
+                published=now,
+                timestamp=datetime.now().isoformat(),
+            )
+            self._events.append(event)
+            self.counts[kind] += 1
+            subscribers = list(self._subscribers)
+
+        logger.warning(f"🚨 Safety event #{event.seq} {kind}: {message}")
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Safety event subscriber failed: {e}")
+        return event
+
+    def mark_sent(self, event: SafetyEvent, now: Optional[float] = None) -> None:
+        """Record a delivery to the connected clients (the first one sets dispatch latency)"""
+        now = now or time.monotonic()
+        with self._lock:
+            first = not event.dispatched
+            if first:
+                event.dispatched = now
+            event.sends += 1
+            event.last_sent = now
+        if first and self.latency is not None:
+            self.latency.record(STAGE_ALERT_DISPATCH, (now - event.published) * 1000)
+
+    def ack(self, seq: int, client: str = "") -> bool:
+        """
+        Acknowledge an event (the first ack per event counts)
+
+        Returns:
+            True if seq is a recent event
+        """
+        now = time.monotonic()
+        with self._lock:
+            event = next((e for e in self._events if e.seq == seq), None)
+            if event is None:
+                return False
+            first = not event.acked
+            if first:
+                event.acked = now
+                event.acked_by = client
+        if first:
+            logger.info(f"Safety event #{seq} acknowledged by {client or 'client'} "
+                        f"after {(now - event.published) * 1000:.0f}ms")
+            if self.latency is not None:
+                self.latency.record(STAGE_ALERT_ACK, (now - event.published) * 1000)
+                self.latency.record(STAGE_ALERT_E2E, (now - event.trigger_ts) * 1000)
+        return True
+
+    def pending(self) -> List[SafetyEvent]:
+        """Unacknowledged events, most urgent first"""
+        with self._lock:
+            events = [e for e in self._events if e.pending]
+        return sorted(events, key=lambda e: (e.priority, e.seq))
+
+    def due_for_resend(self, interval_s: float = SAFETY_ACK_RESEND_S,
+                       max_resends: int = SAFETY_ACK_MAX_RESENDS) -> List[SafetyEvent]:
+        """Sent but unacknowledged events whose resend interval has passed"""
+        now = time.monotonic()
+        return [
+            e for e in self.pending()
+            if e.sends and e.sends <= max_resends and now - e.last_sent >= interval_s
+        ]
+
+    def recent(self, limit: int = 20) -> List[SafetyEvent]:
+        """Newest events last"""
+        with self._lock:
+            return list(self._events)[-limit:]
+
+    def stats(self) -> dict:
+        """Event counts, pending acks and delivery latency over the kept history"""
+        with self._lock:
+            events = list(self._events)
+            counts = dict(self.counts)
+        latencies: Dict[str, List[float]] = {}
+        for event in events:
+            for name, value in event.latencies_ms().items():
+                latencies.setdefault(name, []).append(value)
+        return {
+            "counts": counts,
+            "pending": sum(1 for e in events if e.pending),
+            "latency_ms": {
+                name: {"mean": float(np.mean(values)), "max": float(np.max(values)), "count": len(values)}
+                for name, values in latencies.items()
+            },
+        }
+
+    def format_stats(self) -> str:
+        """One-line summary for logs"""
+        s = self.stats()
+        parts = [f"{sum(v for k, v in s['counts'].items() if not k.endswith('_suppressed'))} events",
+                 f"{s['pending']} unacked"]
+        for name in ("dispatch", "ack", "end_to_end"):
+            if name in s["latency_ms"]:
+                stats = s["latency_ms"][name]
+                parts.append(f"{name} {stats['mean']:.0f}ms (max {stats['max']:.0f})")
+        return " | ".join(parts)
@@ -0,0 +1,240 @@
+"""
+Frame Scheduler - Latency-budget adaptive frame processing
+Replaces fixed frame skipping: each mode has a target latency and result
+rate, stage costs are tracked with an EWMA, and every frame gets a decision
+(process / skip / drop, plus which optional detectors to run) with a reason.
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional, Tuple
+
+from .config import (
+    SCHEDULER_BUDGETS, SCHEDULER_DETECTOR_RATES_HZ, SCHEDULER_EWMA_ALPHA,
+    PARALLEL_STAGES_ENABLED, STAGE_TIMEOUTS_MS,
+)
+
+# Decision actions
+ACTION_PROCESS = "process"  # Run detectors on this frame
+ACTION_SKIP = "skip"        # Reuse the cached result for this frame
+ACTION_DROP = "drop"        # Frame is stale and a newer one is waiting; publish nothing
+
+# Detector stages per mode: (required, optional)
+MODE_STAGES = {
+    "follow": (("aruco",), ("fall",)),
+    "scan": (("objects",), ()),
+}
+
+# Stages that run on the stage executor alongside the serial ones
+PARALLEL_STAGES = ("fall",)
+
+
+@dataclass
+class ModeBudget:
+    """Per-mode scheduling targets"""
+    target_latency_ms: float  # Max frame age when its result is ready
+    target_rate_hz: float     # Desired processed-result rate
+
+
+@dataclass
+class ScheduleDecision:
+    """What the scheduler decided for one frame, and why"""
+    frame_seq: int
+    mode: str
+    action: str
+    reason: str
+    detectors: Tuple[str, ...] = field(default_factory=tuple)
+    frame_age_ms: float = 0.0
+    predicted_ms: float = 0.0
+
+    @property
+    def should_process(self) -> bool:
+        return self.action == ACTION_PROCESS
+
+    def runs(self, detector: str) -> bool:
+        return detector in self.detectors
+
+
+class FrameScheduler:
+    """Decides per frame whether to process, reuse the cached result, or drop"""
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, dict]] = None,
+        detector_rates_hz: Optional[Dict[str, float]] = None,
+        alpha: float = SCHEDULER_EWMA_ALPHA,
+        history: int = 100,
+        parallel_stages: Optional[Tuple[str, ...]] = None,
+        stage_timeouts_ms: Optional[Dict[str, float]] = None,
+    ):
+        budgets = budgets if budgets is not None else SCHEDULER_BUDGETS
+        self.budgets = {mode: ModeBudget(**cfg) for mode, cfg in budgets.items()}
+        self.detector_rates_hz = dict(
+            detector_rates_hz if detector_rates_hz is not None else SCHEDULER_DETECTOR_RATES_HZ
+        )
+        self.alpha = alpha
+        if parallel_stages is None:
+            parallel_stages = PARALLEL_STAGES if PARALLEL_STAGES_ENABLED else ()
+        self.parallel_stages = tuple(parallel_stages)
+        self.stage_timeouts_ms = dict(stage_timeouts_ms if stage_timeouts_ms is not None else STAGE_TIMEOUTS_MS)
+
+        self.costs: Dict[str, float] = {}  # EWMA cost per stage (ms)
+        self.frame_interval_ms: Optional[float] = None  # EWMA of capture spacing
+        self._last_capture_ts: Optional[float] = None
+        self._last_processed_ts: Dict[str, float] = {}  # mode -> capture ts
+        self._last_detector_ts: Dict[str, float] = {}   # detector -> capture ts
+
+        self.counts: Counter = Counter()
+        self.recent: Deque[ScheduleDecision] = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def _ewma(self, old: Optional[float], value: float) -> float:
+        return value if old is None else old + self.alpha * (value - old)
+
+    def observe(self, stage: str, cost_ms: float) -> None:
+        """Feed a measured stage cost into the EWMA"""
+        with self._lock:
+            self.costs[stage] = self._ewma(self.costs.get(stage), cost_ms)
+
+    def expected_cost(self, stages) -> float:
+        """
+        Predicted wall time for running stages on one frame
+
+        Serial stages add up. A parallel stage overlaps them and can only
+        extend the frame by its timeout past the end of the serial work.
+        """
+        serial = sum(self.costs.get(s, 0.0) for s in stages if s not in self.parallel_stages)
+        total = serial
+        for stage in stages:
+            if stage in self.parallel_stages:
+                cost = self.costs.get(stage, 0.0)
+                timeout = self.stage_timeouts_ms.get(stage)
+                if timeout is not None:
+                    cost = min(cost, serial + timeout)
+                total = max(total, cost)
+        return total
+
+    def decide(
+        self,
+        mode: str,
+        frame_seq: int,
+        capture_ts: float,
+        backlog: int = 0,
+        has_cached: bool = True,
+        now: Optional[float] = None,
+        lossless: bool = False,
+    ) -> ScheduleDecision:
+        """
+        Decide what to do with a frame
+
+        Args:
+            mode: Camera mode value ("follow" / "scan")
+            frame_seq: Frame sequence number
+            capture_ts: time.monotonic() capture time of the frame
+            backlog: Newer frames already waiting behind this one
+            has_cached: Whether a cached result for this mode exists
+            now: Current monotonic time (defaults to time.monotonic())
+            lossless: Unpaced replay - every frame is processed with every
+                      detector (wall-clock read times say nothing about the
+                      recording, so rate skips and stale drops would pick a
+                      machine-speed-dependent subset of frames)
+
+        Returns:
+            ScheduleDecision
+        """
+        if now is None:
+            now = time.monotonic()
+        budget = self.budgets[mode]
+        required, optional = MODE_STAGES[mode]
+        age_ms = max(0.0, (now - capture_ts) * 1000)
+
+        with self._lock:
+            if self._last_capture_ts is not None and capture_ts > self._last_capture_ts:
+                self.frame_interval_ms = self._ewma(
+                    self.frame_interval_ms, (capture_ts - self._last_capture_ts) * 1000
+                )
+            self._last_capture_ts = capture_ts
+            half_frame = (self.frame_interval_ms or 0.0) / 2
+
+            period_ms = 1000.0 / budget.target_rate_hz
+            last_ts = self._last_processed_ts.get(mode)
+            since_ms = (capture_ts - last_ts) * 1000 if last_ts is not None else float("inf")
+
+            if not has_cached:
+                action, reason = ACTION_PROCESS, "no cached result for mode"
+            elif lossless:
+                action, reason = ACTION_PROCESS, "lossless replay"
+            elif backlog > 0 and age_ms > budget.target_latency_ms:
+                action = ACTION_DROP
+                reason = f"stale: age {age_ms:.0f}ms > {budget.target_latency_ms:.0f}ms with newer frame queued"
+            elif since_ms + half_frame < period_ms:
+                action = ACTION_SKIP
+                reason = f"rate: {since_ms:.0f}ms since last result < {period_ms:.0f}ms period"
+            else:
+                action, reason = ACTION_PROCESS, "due"
+
+            detectors: Tuple[str, ...] = ()
+            predicted = 0.0
+            if action == ACTION_PROCESS:
+                detectors = required
+                for detector in optional:
+                    if lossless or self._optional_due(detector, capture_ts, half_frame, age_ms, detectors, budget):
+                        detectors = detectors + (detector,)
+                predicted = self.expected_cost(detectors)
+
+                if age_ms + predicted > budget.target_latency_ms:
+                    reason += f" (over budget: {age_ms:.0f}+{predicted:.0f}ms > {budget.target_latency_ms:.0f}ms)"
+
+                self._last_processed_ts[mode] = capture_ts
+                for detector in detectors:
+                    self._last_detector_ts[detector] = capture_ts
+
+            decision = ScheduleDecision(
+                frame_seq=frame_seq,
+                mode=mode,
+                action=action,
+                reason=reason,
+                detectors=detectors,
+                frame_age_ms=age_ms,
+                predicted_ms=predicted,
+            )
+            self.counts[action] += 1
+            self.recent.append(decision)
+
+        return decision
+
+    def _optional_due(self, detector, capture_ts, half_frame, age_ms, detectors, budget) -> bool:
+        """Run an optional detector when due by rate and it fits the latency budget"""
+        rate = self.detector_rates_hz.get(detector)
+        if not rate:
+            return True
+
+        period_ms = 1000.0 / rate
+        last_ts = self._last_detector_ts.get(detector)
+        since_ms = (capture_ts - last_ts) * 1000 if last_ts is not None else float("inf")
+        if since_ms + half_frame < period_ms:
+            return False
+
+        fits = age_ms + self.expected_cost(detectors + (detector,)) <= budget.target_latency_ms
+        overdue = since_ms >= 2 * period_ms  # Never starve it entirely
+        return fits or overdue
+
+    def stats(self) -> dict:
+        """Counters, EWMA costs and the most recent decision"""
+        with self._lock:
+            last = self.recent[-1] if self.recent else None
+            return {
+                "counts": dict(self.counts),
+                "costs_ms": dict(self.costs),
+                "frame_interval_ms": self.frame_interval_ms,
+                "last_decision": last,
+            }
+
+    def format_summary(self) -> str:
+        """One-line summary for logging"""
+        with self._lock:
+            costs = ", ".join(f"{k}={v:.1f}" for k, v in sorted(self.costs.items()))
+            counts = ", ".join(f"{k}={v}" for k, v in sorted(self.counts.items()))
+        return f"decisions [{counts}] | cost EWMA ms [{costs}]"
@@ -0,0 +1,104 @@
+"""
+Stage Executor - Run independent vision stages concurrently
+OpenCV releases the GIL inside detectMultiScale/detectMarkers, so slow stages
+(HOG fall detection) can run on a small thread pool next to fast ones (ArUco).
+Each stage is single-flight: if it is still busy with an older frame, the
+caller gets the last completed value flagged as stale instead of waiting.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class StageResult:
+    """Outcome of one stage for the current frame"""
+    value: Any = None
+    stale: bool = False       # Value comes from an earlier frame
+    timed_out: bool = False   # Stage did not finish within its timeout
+    elapsed_ms: float = 0.0   # Run time of the computation that produced value
+
+
+class StageExecutor:
+    """Single-flight, per-stage background execution with timeouts"""
+
+    def __init__(self, max_workers: int = 2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vision-stage")
+        self._futures: Dict[str, Future] = {}
+        self._fresh: Dict[str, bool] = {}       # Pending future was submitted for the current frame
+        self._last: Dict[str, StageResult] = {}  # Last completed result per stage
+        self._lock = threading.Lock()
+
+    def submit(self, stage: str, fn: Callable[..., Any], *args,
+               on_skip: Optional[Callable[[], None]] = None) -> bool:
+        """
+        Start fn(*args) for this frame unless the stage is still busy
+
+        Args:
+            stage: Stage name
+            fn: Callable to run on the pool
+            on_skip: Called if the stage was busy and fn was not started
+                     (e.g. to release a retained frame)
+
+        Returns:
+            True if started, False if an earlier run is still in flight
+        """
+        with self._lock:
+            pending = self._futures.get(stage)
+            if pending is not None and not pending.done():
+                self._fresh[stage] = False
+                if on_skip is not None:
+                    on_skip()
+                return False
+
+            self._futures[stage] = self._pool.submit(self._timed, fn, *args)
+            self._fresh[stage] = True
+            return True
+
+    @staticmethod
+    def _timed(fn, *args):
+        t_start = time.time()
+        value = fn(*args)
+        return value, (time.time() - t_start) * 1000
+
+    def collect(self, stage: str, timeout: Optional[float] = None) -> StageResult:
+        """
+        Get the stage result for the current frame
+
+        Waits up to timeout for an in-flight run. On timeout (or if the stage
+        was busy with an older frame) returns the last completed value with
+        stale=True; the run keeps going and is picked up later.
+        """
+        with self._lock:
+            future = self._futures.get(stage)
+            fresh = self._fresh.get(stage, False)
+
+        last = self._last.get(stage, StageResult())
+        if future is None:
+            return StageResult(last.value, stale=True, elapsed_ms=last.elapsed_ms)
+
+        try:
+            value, elapsed_ms = future.result(timeout=timeout)
+        except FutureTimeout:
+            return StageResult(last.value, stale=True, timed_out=True, elapsed_ms=last.elapsed_ms)
+        except Exception as e:
+            logger.error(f"Stage '{stage}' failed: {e}")
+            with self._lock:
+                if self._futures.get(stage) is future:
+                    self._futures.pop(stage)
+            return StageResult(last.value, stale=True, elapsed_ms=last.elapsed_ms)
+
+        result = StageResult(value, stale=not fresh, elapsed_ms=elapsed_ms)
+        with self._lock:
+            if self._futures.get(stage) is future:
+                self._futures.pop(stage)
+            self._last[stage] = StageResult(value, elapsed_ms=elapsed_ms)
+        return result
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)